@@ -0,0 +1,226 @@
+# api.py
+"""
+Asyncio library API for platform-cli: no click, no printing, plain data back.
+
+Blocking boto3 calls run on one bounded thread pool, and every service has
+its own semaphore (per event loop), so a single loop can drive hundreds of
+concurrent operations without overrunning any one AWS API. The click
+commands are thin wrappers around these coroutines.
+"""
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import aws_clients
+
+MAX_WORKERS = int(os.getenv("PLATFORM_CLI_API_WORKERS", "64"))
+# concurrent calls allowed per service; PLATFORM_CLI_API_LIMIT_<SERVICE> overrides
+SERVICE_LIMITS = {"ec2": 16, "s3": 32, "route53": 4, "ssm": 8, "cleanup": 2}
+DEFAULT_SERVICE_LIMIT = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+_semaphores = weakref.WeakKeyDictionary()  # event loop -> {service: Semaphore}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="platform-cli")
+    return _executor
+
+
+def _semaphore(service):
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if service not in per_loop:
+        limit = int(os.getenv(f"PLATFORM_CLI_API_LIMIT_{service.upper()}",
+                              SERVICE_LIMITS.get(service, DEFAULT_SERVICE_LIMIT)))
+        per_loop[service] = asyncio.Semaphore(limit)
+    return per_loop[service]
+
+
+async def run(service, fn, *args, **kwargs):
+    """Run a blocking call on the shared executor under the service's semaphore."""
+    async with _semaphore(service):
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def _iter_pages(service, paginator, **kwargs):
+    """Async-iterate a boto3 paginator, fetching each page on the executor."""
+    pages = iter(paginator.paginate(**kwargs))
+    done = object()
+    while True:
+        page = await run(service, next, pages, done)
+        if page is done:
+            return
+        yield page
+
+
+# ---------- EC2 ----------
+def _instance_record(inst, region):
+    tags = {t["Key"]: t["Value"] for t in inst.get("Tags", [])}
+    return {
+        "region": region,
+        "id": inst["InstanceId"],
+        "name": tags.get("Name"),
+        "owner": tags.get("Owner"),
+        "state": inst["State"]["Name"],
+        "type": inst["InstanceType"],
+        "public_ip": inst.get("PublicIpAddress"),
+        "launch_time": inst.get("LaunchTime"),
+        "tags": tags,
+    }
+
+
+def instance_filters(owner=None, name_prefix=None, state=None):
+    filters = [{"Name": "tag:CreatedBy", "Values": ["platform-cli"]}]
+    if owner:
+        filters.append({"Name": "tag:Owner", "Values": [owner]})
+    if name_prefix:
+        filters.append({"Name": "tag:Name", "Values": [f"{name_prefix}*"]})
+    if state:
+        filters.append({"Name": "instance-state-name", "Values": [state]})
+    return filters
+
+
+async def iter_instances(owner=None, name_prefix=None, state=None, regions=None, on_error=None):
+    """
+    Async generator of platform-cli instance records. All regions are paged
+    concurrently and records are yielded as soon as each page arrives.
+    A failing region raises, unless on_error(region, exc) is given to absorb it.
+    """
+    regions = regions or [aws_clients.default_region()]
+    filters = instance_filters(owner, name_prefix, state)
+    queue = asyncio.Queue(maxsize=len(regions) * 2)
+    finished = object()
+
+    async def _region(region):
+        try:
+            paginator = aws_clients.client("ec2", region).get_paginator("describe_instances")
+            async for page in _iter_pages("ec2", paginator, Filters=filters):
+                records = [_instance_record(i, region) for r in page.get("Reservations", [])
+                           for i in r.get("Instances", [])]
+                await queue.put((region, records, None))
+        except Exception as e:
+            await queue.put((region, None, e))
+        finally:
+            await queue.put((region, finished, None))
+
+    tasks = [asyncio.create_task(_region(r)) for r in regions]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            region, records, error = await queue.get()
+            if records is finished:
+                remaining -= 1
+            elif error is not None:
+                if on_error is None:
+                    raise error
+                on_error(region, error)
+            else:
+                for rec in records:
+                    yield rec
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def list_instances(owner=None, name_prefix=None, state=None, regions=None):
+    return [rec async for rec in iter_instances(owner, name_prefix, state, regions)]
+
+
+# ---------- S3 ----------
+async def create_bucket(name, visibility="private", owner=None, region=None):
+    """Create and tag a bucket; returns {"name", "region", "visibility"}."""
+    import s3_manager
+    return await run("s3", s3_manager.make_bucket, name, visibility, owner, region)
+
+
+async def list_buckets(owner=None, name_prefix=None):
+    """Return [{"name", "region", "tags"}] for platform-cli buckets."""
+    import s3_manager
+
+    def _list():
+        buckets = [b for b in aws_clients.client("s3").list_buckets().get("Buckets", [])
+                   if not name_prefix or b["Name"].startswith(name_prefix)]
+        regions = {b["Name"]: b.get("BucketRegion") for b in buckets}
+        return [{"name": name, "region": regions[name], "tags": tags}
+                for name, tags in s3_manager.iter_bucket_tags(buckets)
+                if tags.get("CreatedBy") == "platform-cli" and (not owner or tags.get("Owner") == owner)]
+
+    return sorted(await run("s3", _list), key=lambda b: b["name"])
+
+
+# ---------- Route53 ----------
+async def list_zones():
+    def _list():
+        paginator = aws_clients.client("route53").get_paginator("list_hosted_zones")
+        return [{"id": z["Id"].split("/")[-1], "name": z["Name"],
+                 "private": bool(z.get("Config", {}).get("PrivateZone")),
+                 "record_count": z.get("ResourceRecordSetCount")}
+                for page in paginator.paginate() for z in page.get("HostedZones", [])]
+
+    return await run("route53", _list)
+
+
+async def upsert_records(zone_id, record_sets, wait=False):
+    """
+    UPSERT the given ResourceRecordSets in packed change batches.
+    Returns {"changes": [ChangeInfo...], "waited": seconds or None}.
+    """
+    import route53_records
+
+    changes = [{"Action": "UPSERT", "ResourceRecordSet": rr} for rr in record_sets]
+    infos = await run("route53", route53_records.submit_changes, zone_id.split("/")[-1], changes)
+    waited = await wait_for_changes(infos) if wait else None
+    return {"changes": infos, "waited": waited}
+
+
+async def wait_for_changes(change_infos, timeout=900):
+    """
+    Async route53_records.wait_for_changes: only the get_change calls take a
+    route53 slot, the backoff sleeps don't. Returns the seconds spent waiting.
+    """
+    import route53_records
+
+    pending = route53_records.pending_change_ids(change_infos)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    delay = route53_records.WAIT_INITIAL_DELAY
+    while pending:
+        statuses = await asyncio.gather(*(run("route53", route53_records.change_status, cid) for cid in pending))
+        pending -= {cid for cid, status in statuses if status == "INSYNC"}
+        if not pending:
+            break
+        if loop.time() - started + delay > timeout:
+            raise TimeoutError(f"{len(pending)} Route53 change(s) still PENDING after {timeout}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * route53_records.WAIT_BACKOFF, route53_records.WAIT_MAX_DELAY)
+    return loop.time() - started
+
+
+# ---------- cleanup ----------
+async def cleanup_plan(owner=None, only=None, instance_ids=None, name_prefix=None,
+                       bucket_names=None, zone_ids=None, regions=None, s3_stats=False, log=None):
+    """
+    Discover cleanup targets; returns the JSON-serializable plan. Discovery
+    errors go to log(line) if given (it runs on a worker thread).
+    """
+    import cleanup
+    return await run("cleanup", cleanup.build_plan, owner, only, instance_ids, name_prefix,
+                     bucket_names, zone_ids, regions, s3_stats, log)
+
+
+async def execute_cleanup_plan(plan, concurrency=None, log=None):
+    """
+    Re-verify and delete a plan; returns {"skipped": [...], "results": [...]}
+    with one result per deletion task. Progress lines go to log(line) if given.
+    """
+    import cleanup
+    return await run("cleanup", cleanup.execute_plan, plan, False, concurrency, log=log)
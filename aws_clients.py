@@ -0,0 +1,84 @@
+# aws_clients.py
+"""
+Process-wide boto3 session / client registry.
+
+Every module asks for clients through `client(service, region)` instead of
+building its own session at import time, so a command only pays for the
+clients it actually uses and all of them share one credential chain and
+one connection pool per (service, region). Every client is also wired to
+the shared rate limiter in ratelimit.py.
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+import calltrace
+import config
+import ratelimit
+
+_lock = threading.RLock()
+_session = None
+_clients = {}
+_resources = {}
+
+
+def client_config():
+    """
+    botocore Config shared by all clients. Tunable via PLATFORM_CLI_* env vars
+    or the config file ([client] / [retry] sections, see config.py).
+    """
+    return Config(
+        max_pool_connections=int(config.get_number("client", "max_pool", "PLATFORM_CLI_MAX_POOL", 50, int)),
+        tcp_keepalive=config.get("client", "keepalive", "PLATFORM_CLI_KEEPALIVE", "1") != "0",
+        retries={
+            "max_attempts": int(config.get_number("retry", "max_attempts", "PLATFORM_CLI_MAX_ATTEMPTS", 10, int)),
+            # adaptive = standard retries + botocore's own client-side backoff on throttling
+            "mode": config.get("retry", "mode", "PLATFORM_CLI_RETRY_MODE", "adaptive"),
+        },
+    )
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = boto3.session.Session()
+    return _session
+
+
+def default_region():
+    return get_session().region_name or os.getenv("AWS_REGION") or "us-east-1"
+
+
+def client(service, region=None):
+    """Return the shared client for (service, region); created on first use."""
+    key = (service, region or default_region())
+    c = _clients.get(key)
+    if c is None:
+        with _lock:
+            c = _clients.get(key)
+            if c is None:
+                c = get_session().client(service, region_name=key[1], config=client_config())
+                ratelimit.instrument(c, service, key[1])
+                if calltrace.enabled():
+                    calltrace.instrument(c, service, key[1])
+                _clients[key] = c
+    return c
+
+
+def resource(service, region=None):
+    """Return the shared resource for (service, region), reusing the registry client."""
+    key = (service, region or default_region())
+    r = _resources.get(key)
+    if r is None:
+        with _lock:
+            r = _resources.get(key)
+            if r is None:
+                r = get_session().resource(service, region_name=key[1], config=client_config())
+                # share the pooled low-level client instead of opening a second pool
+                r.meta.client = client(service, key[1])
+                _resources[key] = r
+    return r
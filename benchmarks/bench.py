@@ -0,0 +1,345 @@
+# benchmarks/bench.py
+"""
+Scale benchmarks for platform-cli against a local moto server.
+
+Each scenario seeds a fresh moto server with a parametrized number of
+resources, then runs the real CLI (`python cli.py ...`) in a subprocess
+pointed at it (AWS_ENDPOINT_URL) with --trace-file, and records:
+
+  wall_s       wall time of the command
+  calls        AWS API calls made (from the trace file), also per operation
+  peak_rss_mb  peak resident memory of the command process
+
+Results are compared with benchmarks/baselines.json. Call counts are
+deterministic, so any operation called more often than in the baseline
+fails the run. Wall time and memory depend on the machine: they are shown
+next to the baseline but only gate the run when a tolerance is given.
+
+    pip install -r dev-requirements.txt
+    python benchmarks/bench.py                         # small scale, compare with baseline
+    python benchmarks/bench.py --scale large --only ec2_list
+    python benchmarks/bench.py --set buckets=5000 --save-baseline
+    python benchmarks/bench.py --time-tolerance 0.5    # also fail on 50% slower (same machine only)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines.json")
+REGION = "us-east-1"
+OWNER = "bench"
+TAGS = [{"Key": "CreatedBy", "Value": "platform-cli"}, {"Key": "Owner", "Value": OWNER}]
+
+SCALES = {
+    "small": {"instances": 200, "buckets": 100, "objects": 2000, "records": 2000},
+    "medium": {"instances": 2000, "buckets": 1000, "objects": 20000, "records": 5000},
+    "large": {"instances": 10000, "buckets": 10000, "objects": 100000, "records": 20000},
+}
+SEED_WORKERS = 32
+# moto versions whose S3 internals _patch_moto_s3 was written against (needed by cleanup_s3 only)
+MOTO_S3_PATCH_VERSIONS = {"5.2.4"}
+
+
+# ---------- seeding ----------
+def _clients(endpoint):
+    session = boto3.session.Session(aws_access_key_id="bench", aws_secret_access_key="bench", region_name=REGION)
+    cfg = Config(max_pool_connections=SEED_WORKERS, retries={"max_attempts": 10, "mode": "standard"})
+    return {svc: session.client(svc, endpoint_url=endpoint, config=cfg) for svc in ("ec2", "s3", "route53")}
+
+
+def seed_instances(c, p):
+    ami = c["ec2"].describe_images(Owners=["amazon"])["Images"][0]["ImageId"]
+    left = p["instances"]
+    while left:
+        n = min(left, 1000)
+        c["ec2"].run_instances(
+            ImageId=ami, InstanceType="t3.micro", MinCount=n, MaxCount=n,
+            TagSpecifications=[{"ResourceType": "instance", "Tags": TAGS + [{"Key": "Name", "Value": "bench"}]}])
+        left -= n
+
+
+def seed_buckets(c, p):
+    def _make(i):
+        name = f"bench-{i:06d}"
+        c["s3"].create_bucket(Bucket=name)
+        # every other bucket is someone else's, so the owner filter has work to do
+        tags = TAGS if i % 2 == 0 else TAGS[:1] + [{"Key": "Owner", "Value": "other"}]
+        c["s3"].put_bucket_tagging(Bucket=name, Tagging={"TagSet": tags})
+
+    with ThreadPoolExecutor(SEED_WORKERS) as pool:
+        list(pool.map(_make, range(p["buckets"])))
+
+
+def seed_versioned_bucket(c, p):
+    s3 = c["s3"]
+    s3.create_bucket(Bucket="bench-versioned")
+    s3.put_bucket_tagging(Bucket="bench-versioned", Tagging={"TagSet": TAGS})
+    s3.put_bucket_versioning(Bucket="bench-versioned", VersioningConfiguration={"Status": "Enabled"})
+    # two versions per key: objects = total object versions
+    keys = [f"data/{i // 100:04d}/obj-{i:07d}" for i in range(max(1, p["objects"] // 2))]
+    with ThreadPoolExecutor(SEED_WORKERS) as pool:
+        for _ in range(2):
+            list(pool.map(lambda k: s3.put_object(Bucket="bench-versioned", Key=k, Body=b"x"), keys))
+
+
+def seed_zone(c, p):
+    r53 = c["route53"]
+    zid = r53.create_hosted_zone(Name="bench.example.com", CallerReference=str(time.time()))["HostedZone"]["Id"]
+    zid = zid.split("/")[-1]
+    r53.change_tags_for_resource(ResourceType="hostedzone", ResourceId=zid, AddTags=TAGS)
+    changes = [{"Action": "CREATE", "ResourceRecordSet": {
+        "Name": f"host-{i:06d}.bench.example.com.", "Type": "A", "TTL": 300,
+        "ResourceRecords": [{"Value": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}]}}
+        for i in range(p["records"])]
+    for i in range(0, len(changes), 500):
+        r53.change_resource_record_sets(HostedZoneId=zid, ChangeBatch={"Changes": changes[i:i + 500]})
+
+
+def bucket_gone(c, p):
+    names = {b["Name"] for b in c["s3"].list_buckets()["Buckets"]}
+    if "bench-versioned" in names:
+        raise RuntimeError("cleanup left bench-versioned behind")
+
+
+def zone_gone(c, p):
+    if c["route53"].list_hosted_zones()["HostedZones"]:
+        raise RuntimeError("cleanup left the hosted zone behind")
+
+
+# name -> (seed functions, cli argv, post-run check, needs the moto S3 patch)
+SCENARIOS = {
+    "ec2_list": ([seed_instances], ["ec2", "list"], None, False),
+    "s3_list": ([seed_buckets], ["s3", "list"], None, False),
+    "cleanup_s3": ([seed_versioned_bucket], ["cleanup", "--yes"], bucket_gone, True),
+    "cleanup_route53": ([seed_zone], ["cleanup", "--yes"], zone_gone, False),
+}
+
+
+# ---------- running ----------
+def _patch_moto_s3():
+    """
+    cleanup deletes each page of versions while listing the next one. Real S3
+    treats the key/version-id markers as positions; moto needs the marker
+    version to still exist (else the listing comes back empty) and its key
+    store can hand out None for a key deleted mid-iteration. This replaces
+    both internals, so it only runs on the moto versions it was checked against.
+    """
+    import moto
+
+    if moto.__version__ not in MOTO_S3_PATCH_VERSIONS:
+        sys.exit(f"cleanup_s3 needs moto {', '.join(sorted(MOTO_S3_PATCH_VERSIONS))} (found {moto.__version__}): "
+                 "it patches moto S3 internals that change between releases. Install dev-requirements.txt, "
+                 "or check _patch_moto_s3 against this version and add it to MOTO_S3_PATCH_VERSIONS.")
+    from moto.s3.models import S3Backend
+    from moto.s3.utils import _VersionedKeyStore
+
+    def _iterlists(self):
+        for key in self._self_iterable():
+            versions = self.getlist(key)
+            if versions is not None:
+                yield key, versions
+
+    _VersionedKeyStore._iterlists = _VersionedKeyStore.iterlists = _iterlists
+    list_object_versions = S3Backend.list_object_versions
+
+    def _list_object_versions(self, bucket_name, delimiter=None, key_marker=None, max_keys=1000,
+                              prefix="", version_id_marker=None):
+        if not (key_marker and version_id_marker) or delimiter:
+            return list_object_versions(self, bucket_name, delimiter, key_marker, max_keys, prefix,
+                                        version_id_marker)
+        # one consistent snapshot, then resume after the marker version, or at the
+        # first remaining version of key_marker if it has been deleted meanwhile
+        versions, _, markers, _, _ = list_object_versions(self, bucket_name, None, None, None, prefix, None)
+        items = sorted((v for v in versions + markers if v.name >= key_marker),
+                       key=lambda v: (v.name, -v.last_modified.timestamp()))
+        ids = [v.version_id for v in items]
+        if version_id_marker in ids:
+            items = items[ids.index(version_id_marker) + 1:]
+        page = items[:max_keys]
+        last = page[-1] if len(items) > max_keys else None
+        return ([v for v in page if v in versions], [], [v for v in page if v not in versions],
+                last.name if last else None, last.version_id if last else None)
+
+    S3Backend.list_object_versions = _list_object_versions
+
+
+def _reset(endpoint):
+    import urllib.request
+    urllib.request.urlopen(urllib.request.Request(f"{endpoint}/moto-api/reset", method="POST")).read()
+
+
+# runs cli.py and records its own peak RSS (VmHWM) at exit; the rusage of a forked
+# child would include the benchmark process (and the in-process moto server)
+_RUNNER = """
+import atexit, runpy, sys
+def _hwm(path=sys.argv[1]):
+    with open("/proc/self/status") as f:
+        kb = next(int(l.split()[1]) for l in f if l.startswith("VmHWM:"))
+    with open(path, "w") as out:
+        out.write(str(kb))
+atexit.register(_hwm)
+sys.argv = sys.argv[2:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def run_cli(endpoint, argv, workdir):
+    """Run cli.py against the moto endpoint; returns wall time, peak RSS (MB) and the trace lines."""
+    trace_path = os.path.join(workdir, "trace.jsonl")
+    rss_path = os.path.join(workdir, "rss")
+    env = dict(os.environ,
+               AWS_ENDPOINT_URL=endpoint, AWS_ACCESS_KEY_ID="bench", AWS_SECRET_ACCESS_KEY="bench",
+               AWS_DEFAULT_REGION=REGION, USER=OWNER,
+               PLATFORM_CLI_CACHE_DIR=os.path.join(workdir, "cache"),
+               PLATFORM_CLI_CONFIG=os.path.join(workdir, "none.ini"))
+    # benchmark the code, not the client-side rate limiter
+    for svc in ("EC2", "S3", "ROUTE53", "SSM", "STS"):
+        env[f"PLATFORM_CLI_RATE_{svc}"] = "0"
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _RUNNER, rss_path, os.path.join(ROOT, "cli.py"),
+                           "--trace-file", trace_path] + argv,
+                          cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited {proc.returncode}:\n{proc.stderr.decode(errors='replace')}")
+    with open(trace_path, encoding="utf-8") as f:
+        calls = [json.loads(line) for line in f if line.strip()]
+    with open(rss_path, encoding="utf-8") as f:
+        rss_kb = int(f.read())
+    return wall, rss_kb / 1024, calls, proc.stdout.decode(errors="replace")
+
+
+def run_scenario(endpoint, name, params):
+    seeders, argv, check, _ = SCENARIOS[name]
+    _reset(endpoint)
+    clients = _clients(endpoint)
+    started = time.perf_counter()
+    for seed in seeders:
+        seed(clients, params)
+    seeded = time.perf_counter() - started
+    with tempfile.TemporaryDirectory() as workdir:
+        wall, rss, calls, output = run_cli(endpoint, argv, workdir)
+    if check:
+        try:
+            check(clients, params)
+        except RuntimeError as e:
+            raise RuntimeError(f"{name}: {e}\n{output[-2000:]}") from None
+    per_op = {}
+    for c in calls:
+        op = f"{c['service']}.{c['operation']}"
+        per_op[op] = per_op.get(op, 0) + 1
+    return {"params": params, "wall_s": round(wall, 3), "calls": len(calls),
+            "retries": sum(c["retries"] for c in calls), "peak_rss_mb": round(rss, 1),
+            "per_operation": dict(sorted(per_op.items())), "seed_s": round(seeded, 1)}
+
+
+# ---------- baselines ----------
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(result, baseline, time_tol=None, mem_tol=None):
+    """Return a list of regression messages (empty if within tolerance)."""
+    if not baseline or baseline.get("params") != result["params"]:
+        return []
+    problems = []
+    before, after = baseline.get("per_operation", {}), result["per_operation"]
+    for op in sorted(after):
+        if after[op] > before.get(op, 0):
+            problems.append(f"{op} {before.get(op, 0)} -> {after[op]} calls")
+    if time_tol is not None and result["wall_s"] > baseline["wall_s"] * (1 + time_tol):
+        problems.append(f"wall {baseline['wall_s']:.2f}s -> {result['wall_s']:.2f}s")
+    if mem_tol is not None and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + mem_tol):
+        problems.append(f"peak RSS {baseline['peak_rss_mb']:.0f}MB -> {result['peak_rss_mb']:.0f}MB")
+    return problems
+
+
+def _vs(value, baseline, key):
+    """'12.3 (+8%)' against the baseline value, or just the value."""
+    ref = (baseline or {}).get(key)
+    if not ref:
+        return f"{value:.1f}"
+    return f"{value:.1f} ({(value - ref) / ref:+.0%})"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=N",
+                    help="override a resource count, e.g. --set records=50000")
+    ap.add_argument("--only", action="append", choices=sorted(SCENARIOS), help="scenario to run (repeatable)")
+    ap.add_argument("--baseline", default=BASELINES)
+    ap.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    ap.add_argument("--time-tolerance", type=float, default=None, metavar="FRACTION",
+                    help="also fail when wall time grows by more than this (baselines are machine specific)")
+    ap.add_argument("--memory-tolerance", type=float, default=None, metavar="FRACTION",
+                    help="also fail when peak memory grows by more than this")
+    ap.add_argument("--json", metavar="PATH", help="also write the results to this file")
+    args = ap.parse_args(argv)
+
+    params = dict(SCALES[args.scale])
+    for item in args.set:
+        key, _, value = item.partition("=")
+        if key not in params:
+            ap.error(f"unknown count {key!r} (one of {', '.join(params)})")
+        params[key] = int(value)
+    label = args.scale if not args.set else f"{args.scale}+" + ",".join(sorted(args.set))
+
+    import logging
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    scenarios = args.only or list(SCENARIOS)
+    if any(SCENARIOS[name][3] for name in scenarios):
+        _patch_moto_s3()
+    from moto.server import ThreadedMotoServer
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint = f"http://{host}:{port}"
+
+    baselines = load_baselines(args.baseline)
+    results, failed = {}, False
+    try:
+        print(f"{'scenario':<18} {'calls':>7} {'baseline':>8} {'retries':>7} {'wall s':>14} {'peak MB':>14}"
+              "  (seed s)")
+        for name in scenarios:
+            res = run_scenario(endpoint, name, params)
+            results[name] = res
+            baseline = baselines.get(label, {}).get(name)
+            if baseline and baseline.get("params") != res["params"]:
+                baseline = None
+            problems = compare(res, baseline, args.time_tolerance, args.memory_tolerance)
+            mark = "  REGRESSION: " + "; ".join(problems) if problems else ""
+            failed = failed or bool(problems)
+            print(f"{name:<18} {res['calls']:>7} {baseline['calls'] if baseline else '-':>8} {res['retries']:>7} "
+                  f"{_vs(res['wall_s'], baseline, 'wall_s'):>14} {_vs(res['peak_rss_mb'], baseline, 'peak_rss_mb'):>14}"
+                  f"  ({res['seed_s']}){mark}")
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({label: results}, f, indent=2)
+    if args.save_baseline:
+        baselines.setdefault(label, {}).update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline} ({label})")
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# cache.py
+"""
+Small on-disk caches for platform-cli, stored under the user's cache dir
+($PLATFORM_CLI_CACHE_DIR, else $XDG_CACHE_HOME/platform-cli, else ~/.cache/platform-cli).
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+
+_instances = weakref.WeakSet()
+
+
+def cache_dir():
+    base = os.getenv("PLATFORM_CLI_CACHE_DIR") or os.path.join(
+        os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "platform-cli")
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+class TTLCache:
+    """
+    JSON-file backed key/value cache with a per-cache TTL (seconds).
+
+    Entries are kept in memory after the first read and written back once
+    (at exit or on flush()), so hot paths never touch the disk twice. A flush
+    re-reads the file and applies only this process's changes, so entries
+    other processes wrote in the meantime survive.
+    """
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+        self._data = None
+        self._changes = {}  # key -> entry put since the last flush, or None if invalidated
+        self._cleared = False
+        self._dirty = False
+        self._registered = False
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    @property
+    def path(self):
+        return os.path.join(cache_dir(), f"{self.name}.json")
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is None or time.time() - entry["t"] > self.ttl:
+            return default
+        return entry["v"]
+
+    def put(self, key, value):
+        with self._lock:
+            self._load()[key] = self._changes[key] = {"t": time.time(), "v": value}
+            self._mark_dirty()
+
+    def invalidate(self, key=None):
+        with self._lock:
+            data = self._load()
+            if key is None:
+                data.clear()
+                self._changes.clear()
+                self._cleared = True
+            else:
+                data.pop(key, None)
+                self._changes[key] = None
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if not self._registered:
+            self._registered = True
+            atexit.register(self.flush)
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = {} if self._cleared else self._read()
+            for key, entry in self._changes.items():
+                if entry is None:
+                    merged.pop(key, None)
+                elif key not in merged or merged[key]["t"] <= entry["t"]:
+                    merged[key] = entry
+            now = time.time()
+            live = {k: e for k, e in merged.items() if now - e["t"] <= self.ttl}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(live, f)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+            self._data = live
+            self._changes.clear()
+            self._cleared = self._dirty = False
+
+    def reload(self):
+        """Write pending changes, then forget the in-memory copy so the next read sees the file."""
+        self.flush()
+        with self._lock:
+            self._data = None
+
+
+def reload_all():
+    """reload() every cache; long-lived processes (the daemon) call this between commands."""
+    for c in list(_instances):
+        c.reload()
@@ -0,0 +1,192 @@
+# calltrace.py
+"""
+Per-API-call tracing for `cli --trace-calls` / `--trace-file`.
+
+When enabled, every registry client gets before-call / after-call /
+after-call-error handlers that time each operation (including retries),
+count retries and the bytes sent/received, and optionally append one JSON
+line per call to a trace file. Nothing is registered unless tracing is
+turned on, so normal runs pay nothing.
+"""
+import json
+import math
+import sys
+import threading
+import time
+
+_lock = threading.Lock()
+_enabled = False
+_calls = {}          # (service, operation) -> list of per-call dicts
+_trace_file = None
+_started = None
+
+# keys stashed in botocore's per-request context between before-call and after-call
+_START = "platform_cli_trace_start"
+_SENT = "platform_cli_trace_sent"
+
+
+def enabled():
+    return _enabled
+
+
+def enable(trace_file=None):
+    """Start tracing every client (existing and future); optionally write JSONL to trace_file."""
+    global _enabled, _trace_file, _started
+    import aws_clients
+
+    with _lock:
+        if _enabled:
+            return
+        _enabled = True
+        _started = time.perf_counter()
+        if trace_file:
+            _trace_file = open(trace_file, "w", encoding="utf-8")
+    for (service, region), c in list(aws_clients._clients.items()):
+        instrument(c, service, region)
+
+
+def reset():
+    """Stop tracing and forget recorded calls (the handlers stay attached but go idle)."""
+    global _enabled, _trace_file
+    with _lock:
+        _enabled = False
+        _calls.clear()
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    if isinstance(body, dict):  # query-protocol params, urlencoded later
+        return sum(len(str(k)) + len(str(v)) + 2 for k, v in body.items())
+    try:
+        return len(body)
+    except TypeError:
+        pass
+    try:
+        # file-like bodies (botocore wraps bytes in BytesIO too): measure by seeking, never read
+        pos = body.tell()
+        end = body.seek(0, 2)
+        body.seek(pos)
+        return end - pos
+    except (AttributeError, OSError, ValueError):
+        return 0  # non-seekable streams: size unknown without reading them
+
+
+def _received_size(http_response, model):
+    if http_response is None:
+        return 0
+    length = (http_response.headers or {}).get("content-length")
+    if length:
+        return int(length)
+    if model.has_streaming_output:
+        return 0  # the caller has not read the body yet; reading it here would consume it
+    return len(http_response.content or b"")  # chunked responses carry no Content-Length
+
+
+def _record(service, region, operation, context, status, error=None, received=0):
+    started = context.pop(_START, None)
+    if started is None or not _enabled:
+        return
+    retries = max(0, context.get("retries", {}).get("attempt", 1) - 1)
+    call = {
+        "t": round(started - _started, 4),
+        "service": service,
+        "region": region,
+        "operation": operation,
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+        "status": status,
+        "retries": retries,
+        "sent": context.pop(_SENT, 0),
+        "received": received,
+    }
+    if error:
+        call["error"] = error
+    with _lock:
+        _calls.setdefault((service, operation), []).append(call)
+        if _trace_file is not None:
+            _trace_file.write(json.dumps(call, sort_keys=True) + "\n")
+
+
+def instrument(client, service, region):
+    """Attach the trace handlers to one client (called by aws_clients while tracing is on)."""
+    events = client.meta.events
+    service_id = client.meta.service_model.service_id.hyphenize()
+
+    def _before_call(model=None, params=None, context=None, **kwargs):
+        if not _enabled:
+            return
+        context[_START] = time.perf_counter()
+        context[_SENT] = _body_size((params or {}).get("body"))  # params is the serialized request dict
+
+    def _after_call(http_response=None, parsed=None, model=None, context=None, **kwargs):
+        received = _received_size(http_response, model)
+        error = (parsed or {}).get("Error", {}).get("Code")
+        _record(service, region, model.name, context,
+                http_response.status_code if http_response else None, error, received)
+
+    def _after_call_error(event_name=None, exception=None, context=None, **kwargs):
+        # botocore sends no model with this event: the operation is the last part of its name
+        _record(service, region, event_name.rsplit(".", 1)[-1], context, None, type(exception).__name__)
+
+    events.register(f"before-call.{service_id}", _before_call, unique_id="platform-cli-trace-before")
+    events.register(f"after-call.{service_id}", _after_call, unique_id="platform-cli-trace-after")
+    events.register(f"after-call-error.{service_id}", _after_call_error, unique_id="platform-cli-trace-error")
+    return client
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def summary():
+    """Rows of per (service, operation) aggregates, slowest total time first."""
+    with _lock:
+        groups = {k: list(v) for k, v in _calls.items()}
+    rows = []
+    for (service, operation), calls in groups.items():
+        ms = sorted(c["ms"] for c in calls)
+        rows.append({
+            "service": service, "operation": operation, "calls": len(calls),
+            "errors": sum(1 for c in calls if c.get("error")),
+            "p50": _percentile(ms, 50), "p95": _percentile(ms, 95), "max": ms[-1],
+            "total": sum(ms), "retries": sum(c["retries"] for c in calls),
+            "sent": sum(c["sent"] for c in calls), "received": sum(c["received"] for c in calls),
+        })
+    return sorted(rows, key=lambda r: -r["total"])
+
+
+def _fmt_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+
+def print_summary(stream=None):
+    """Print the per-operation table to stderr and close the trace file."""
+    global _trace_file
+    if not _enabled:
+        return
+    stream = stream or sys.stderr
+    rows = summary()
+    header = f"{'service':<10} {'operation':<32} {'calls':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} " \
+             f"{'max ms':>8} {'retries':>7} {'sent':>9} {'recv':>9}"
+    print(f"\n{header}", file=stream)
+    for r in rows:
+        print(f"{r['service']:<10} {r['operation']:<32} {r['calls']:>6} {r['errors']:>4} {r['p50']:>8.1f} "
+              f"{r['p95']:>8.1f} {r['max']:>8.1f} {r['retries']:>7} {_fmt_bytes(r['sent']):>9} "
+              f"{_fmt_bytes(r['received']):>9}", file=stream)
+    total = sum(r["calls"] for r in rows)
+    print(f"{total} AWS calls in {time.perf_counter() - _started:.2f}s", file=stream)
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
@@ -1,11 +1,35 @@
 # cleanup.py
+import datetime
+import json
 import os
-import boto3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from botocore.exceptions import ClientError
 
+import aws_clients
+
 TAG_CREATEDBY_KEY = "CreatedBy"
 TAG_CREATEDBY_VAL = "platform-cli"
 TAG_OWNER_KEY = "Owner"
+SERVICES = ("ec2", "s3", "route53")
+_LABELS = {"ec2": "EC2", "s3": "S3", "route53": "Route53"}
+PLAN_VERSION = 1
+DEFAULT_CONCURRENCY = int(os.getenv("PLATFORM_CLI_CLEANUP_CONCURRENCY", "16"))
+
+_print_lock = threading.RLock()  # nested wrappers share it
+
+def _serialized(log):
+    """
+    The log callback as called from worker threads: one line at a time.
+    log=None discards the messages (the library API reports results instead).
+    """
+    if log is None:
+        return lambda msg: None
+
+    def _log(msg):
+        with _print_lock:
+            log(msg)
+    return _log
 
 def _default_owner():
     return os.getenv("USER") or os.getenv("USERNAME") or "unknown"
@@ -17,154 +41,450 @@ def cleanup_resources(
     instance_ids=None,         # iterable of EC2 instance IDs to delete explicitly
     name_prefix=None,          # prefix to match EC2 Name tag / S3 bucket / Zone name
     bucket_names=None,         # iterable of bucket names
-    zone_ids=None              # iterable of hosted zone IDs (Z...)
+    zone_ids=None,             # iterable of hosted zone IDs (Z...)
+    concurrency=None,          # max parallel deletions across all services
+    regions=None,              # EC2 regions to scan (default: the default region)
+    s3_stats=False,            # measure each bucket so the plan shows its size
+    log=print                  # called with every progress/error line
 ):
+    log = _serialized(log)
+    owner = owner or _default_owner()
+    only = set(only or SERVICES)
+    log(f"=== cleanup platform-cli (owner={owner}, dry_run={dry_run}, only={','.join(sorted(only))}) ===")
+    plan = build_plan(owner, only, instance_ids, name_prefix, bucket_names, zone_ids, regions, s3_stats, log)
+    # just discovered from live tags: no need to check them again
+    result = execute_plan(plan, dry_run=dry_run, concurrency=concurrency, verify=False, log=log)
+    log("=== done ===")
+    return result
+
+# ---------- plan / execute ----------
+def build_plan(owner=None, only=None, instance_ids=None, name_prefix=None, bucket_names=None, zone_ids=None,
+               regions=None, s3_stats=False, log=print):
+    """
+    Discover EC2, S3 and Route53 targets in parallel; returns a JSON-serializable plan.
+    With s3_stats every bucket entry also gets its object/version counts and size.
+    """
     owner = owner or _default_owner()
-    only = set(only or ["ec2", "s3", "route53"])
-    print(f"=== cleanup platform-cli (owner={owner}, dry_run={dry_run}, only={','.join(sorted(only))}) ===")
-    if "ec2" in only:
-        cleanup_ec2(dry_run, owner, instance_ids, name_prefix)
-    if "s3" in only:
-        cleanup_s3(dry_run, owner, bucket_names, name_prefix)
-    if "route53" in only:
-        cleanup_route53(dry_run, owner, zone_ids, name_prefix)
-    print("=== done ===")
+    only = set(only or SERVICES)
+    discover = {
+        "ec2": lambda: discover_ec2(owner, instance_ids, name_prefix, regions, log),
+        "s3": lambda: discover_s3(owner, bucket_names, name_prefix, s3_stats, log),
+        "route53": lambda: discover_route53(owner, zone_ids, name_prefix, log),
+    }
+    plan = {
+        "version": PLAN_VERSION,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "owner": owner,
+        "only": sorted(only),
+    }
+    with ThreadPoolExecutor(max_workers=len(SERVICES)) as pool:
+        futures = {svc: pool.submit(discover[svc]) for svc in SERVICES if svc in only}
+        for svc in SERVICES:
+            plan[svc] = futures[svc].result() if svc in futures else []
+    return plan
+
+def write_plan(plan, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=2)
+        f.write("\n")
+
+def read_plan(path):
+    with open(path, encoding="utf-8") as f:
+        plan = json.load(f)
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"unsupported cleanup plan version: {plan.get('version')!r}")
+    return plan
+
+def print_plan(plan, log=print):
+    ec2_by_region = _group_instances(plan.get("ec2", []))
+    if not ec2_by_region and "ec2" in plan.get("only", SERVICES):
+        log("EC2: nothing to delete.")
+    for region, ids in ec2_by_region.items():
+        log(f"EC2: terminating {ids}" + (f" in {region}" if len(ec2_by_region) > 1 else ""))
+    for b in plan.get("s3", []):
+        log(f"S3: deleting bucket {b['name']}" + (_bucket_estimate(b["stats"]) if b.get("stats") else ""))
+    for z in plan.get("route53", []):
+        log(f"Route53: purge records and delete zone {z['name']} ({z['id']})")
+
+def verify_plan(plan, log=print):
+    """
+    Re-check the CreatedBy/Owner tags of every plan entry (a saved plan may be
+    stale or hand-edited); returns the plan without the entries that no longer match.
+    """
+    return _verify(plan, _serialized(log))[0]
+
+def _verify(plan, log):
+    """(verified plan, [(service, dropped entry)])"""
+    owner = plan.get("owner") or _default_owner()
+    checks = {"ec2": _verified_instances, "s3": _verified_buckets, "route53": _verified_zones}
+    verified, skipped = dict(plan), []
+    for svc, check in checks.items():
+        entries = plan.get(svc, [])
+        if not entries:
+            continue
+        keep = check(entries, owner, log)
+        for e in entries:
+            if e not in keep:
+                skipped.append((svc, e))
+                log(f"{_LABELS[svc]}: skipping {e.get('id') or e.get('name')}: "
+                    f"gone or not tagged CreatedBy={TAG_CREATEDBY_VAL}, Owner={owner}")
+        verified[svc] = keep
+    return verified, skipped
+
+def _is_owned(tags, owner):
+    return tags.get(TAG_CREATEDBY_KEY) == TAG_CREATEDBY_VAL and tags.get(TAG_OWNER_KEY) == owner
+
+def execute_plan(plan, dry_run=False, concurrency=None, verify=True, log=print):
+    """
+    Delete everything in plan without rediscovering it. Work fans out across
+    services and resources, at most `concurrency` deletions at a time.
+    With verify (the default) each entry's tags are re-checked first.
+
+    Returns {"skipped": [{"service", "entry"}], "results": [...]}, one result
+    per deletion task ({"service", "target", "ok", "error", ...}).
+    """
+    log = _serialized(log)
+    skipped = []
+    if verify:
+        plan, skipped = _verify(plan, log)
+    summary = {"skipped": [{"service": svc, "entry": e} for svc, e in skipped], "results": []}
+    print_plan(plan, log)
+    if dry_run:
+        return summary
+    tasks = []
+    for region, ids in _group_instances(plan.get("ec2", [])).items():
+        for i in range(0, len(ids), EC2_TERMINATE_BATCH):
+            tasks.append(("ec2", ids[i:i + EC2_TERMINATE_BATCH], _terminate_instances, region))
+    for b in plan.get("s3", []):
+        tasks.append(("s3", b["name"], _delete_bucket, b.get("region")))
+    for z in plan.get("route53", []):
+        tasks.append(("route53", z["id"], _delete_zone))
+    if not tasks:
+        return summary
+    with ThreadPoolExecutor(max_workers=concurrency or DEFAULT_CONCURRENCY) as pool:
+        futures = {pool.submit(fn, target, *args, log=log): (svc, target) for svc, target, fn, *args in tasks}
+        for fut in as_completed(futures):
+            svc, target = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                log(f"cleanup: task failed: {e}")
+                result = {"ok": False, "error": str(e)}
+            summary["results"].append(dict(result, service=svc, target=target))
+    return summary
+
+def _run_single(service, dry_run, entries, log=print):
+    plan = {svc: [] for svc in SERVICES}
+    plan.update({"only": [service], service: entries})
+    return execute_plan(plan, dry_run=dry_run, verify=False, log=log)
+
+def _group_instances(instances):
+    by_region = {}
+    for i in instances:
+        by_region.setdefault(i.get("region") or aws_clients.default_region(), []).append(i["id"])
+    return by_region
 
 # ---------- EC2 ----------
-def cleanup_ec2(dry_run, owner, instance_ids, name_prefix):
-    ec2r = boto3.resource("ec2")
-    ec2 = boto3.client("ec2")
+EC2_TERMINATE_BATCH = 1000
+
+def cleanup_ec2(dry_run, owner, instance_ids, name_prefix, regions=None, log=print):
+    return _run_single("ec2", dry_run, discover_ec2(owner, instance_ids, name_prefix, regions, log), log)
+
+def discover_ec2(owner, instance_ids, name_prefix, regions=None, log=print):
+    """
+    Return plan entries ({"id", "name", "region"}) for the owner's platform-cli
+    instances, scanning all given regions concurrently.
+    """
+    from regions import fan_out
 
     # בסיס: CreatedBy & Owner
     filters = [
         {"Name": f"tag:{TAG_CREATEDBY_KEY}", "Values": [TAG_CREATEDBY_VAL]},
         {"Name": f"tag:{TAG_OWNER_KEY}", "Values": [owner]},
+        {"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]},
     ]
     if name_prefix:
         filters.append({"Name": "tag:Name", "Values": [f"{name_prefix}*"]})
 
     # אם נתנו IDs ספציפיים – נשתמש בהם, אבל עדיין נוודא תגיות
-    ids = []
     if instance_ids:
-        # סנן רק כאלה שבאמת נוצרו ע"י הכלי ושייכים ל-owner
-        desc = ec2.describe_instances(InstanceIds=list(instance_ids))
-        for r in desc.get("Reservations", []):
-            for i in r.get("Instances", []):
-                tags = {t["Key"]: t["Value"] for t in i.get("Tags", [])}
-                if tags.get(TAG_CREATEDBY_KEY) == TAG_CREATEDBY_VAL and tags.get(TAG_OWNER_KEY) == owner:
-                    ids.append(i["InstanceId"])
+        kwargs = {"InstanceIds": list(instance_ids)}
     else:
-        ids = [i.id for i in ec2r.instances.filter(Filters=filters)]
+        kwargs = {"Filters": filters}
 
-    if not ids:
-        print("EC2: nothing to delete.")
-        return
+    def _scan(region):
+        found = []
+        paginator = aws_clients.client("ec2", region).get_paginator("describe_instances")
+        try:
+            for page in paginator.paginate(**kwargs):
+                for r in page.get("Reservations", []):
+                    for i in r.get("Instances", []):
+                        tags = {t["Key"]: t["Value"] for t in i.get("Tags", [])}
+                        # סנן רק כאלה שבאמת נוצרו ע"י הכלי ושייכים ל-owner
+                        if tags.get(TAG_CREATEDBY_KEY) == TAG_CREATEDBY_VAL and tags.get(TAG_OWNER_KEY) == owner:
+                            found.append({"id": i["InstanceId"], "name": tags.get("Name"), "region": region})
+        except ClientError as e:
+            # explicit IDs only exist in one region; elsewhere they are simply not found
+            if not (instance_ids and "NotFound" in e.response.get("Error", {}).get("Code", "")):
+                raise
+        return found
 
-    print(f"EC2: terminating {ids}")
-    if dry_run:
-        return
+    found = []
+    for region, entries, error in fan_out(regions or [aws_clients.default_region()], _scan):
+        if error:
+            _serialized(log)(f"EC2: {region}: discovery error: {error}")
+            continue
+        found.extend(entries)
+    return sorted(found, key=lambda i: (i["region"], i["id"]))
+
+EC2_FILTER_VALUES = 200  # values per describe_instances filter
+
+def _verified_instances(entries, owner, log):
+    """Plan entries whose instance still carries our tags (missing IDs just drop out)."""
+    from regions import fan_out
+
+    by_region = _group_instances(entries)
+
+    def _check(region):
+        ec2 = aws_clients.client("ec2", region)
+        ids = by_region[region]
+        owned = set()
+        # an instance-id filter (unlike InstanceIds) does not fail on IDs that no longer exist
+        for i in range(0, len(ids), EC2_FILTER_VALUES):
+            for page in ec2.get_paginator("describe_instances").paginate(
+                    Filters=[{"Name": "instance-id", "Values": ids[i:i + EC2_FILTER_VALUES]}]):
+                for r in page.get("Reservations", []):
+                    for inst in r.get("Instances", []):
+                        if _is_owned({t["Key"]: t["Value"] for t in inst.get("Tags", [])}, owner):
+                            owned.add(inst["InstanceId"])
+        return owned
+
+    owned = {}
+    for region, ids, error in fan_out(list(by_region), _check):
+        if error:
+            log(f"EC2: {region}: cannot verify plan entries: {error}")
+            ids = set()
+        owned[region] = ids
+    return [e for e in entries if e["id"] in owned.get(e.get("region") or aws_clients.default_region(), ())]
+
+def _terminate_instances(ids, region, log):
     try:
-        ec2r.instances.filter(InstanceIds=ids).terminate()
+        aws_clients.client("ec2", region).terminate_instances(InstanceIds=ids)
+        log(f"EC2: terminate requested for {len(ids)} instance(s) in {region}")
+        return {"ok": True, "error": None, "region": region}
     except ClientError as e:
-        print(f"EC2: error terminating: {e}")
+        log(f"EC2: error terminating: {e}")
+        return {"ok": False, "error": str(e), "region": region}
 
 # ---------- S3 ----------
-def cleanup_s3(dry_run, owner, bucket_names, name_prefix):
-    s3 = boto3.client("s3")
-    s3r = boto3.resource("s3")
+S3_DELETE_BATCH = 1000  # delete_objects maximum
+S3_DELETE_WORKERS = int(os.getenv("PLATFORM_CLI_S3_DELETE_WORKERS", "8"))
+S3_MAX_KEY_ERRORS_SHOWN = 20  # per bucket; the rest are only counted
+S3_PROGRESS_EVERY = 50  # batches
+S3_STATS_BUCKETS = 4  # buckets measured at once for --s3-stats (each lists with its own pool)
+S3_BATCH_SECONDS = 0.5  # rough latency of one 1,000-key delete_objects call, for plan estimates
+
+def cleanup_s3(dry_run, owner, bucket_names, name_prefix, log=print):
+    return _run_single("s3", dry_run, discover_s3(owner, bucket_names, name_prefix, log=log), log)
+
+def discover_s3(owner, bucket_names, name_prefix, with_stats=False, log=print):
+    """Return plan entries ({"name", "region"[, "stats"]}) for the owner's platform-cli buckets."""
+    # ייבוא עצל - משתמשים במטמון התגיות ובאזור של כל bucket מ-s3_manager
+    from s3_manager import iter_bucket_tags, get_bucket_region
+
+    s3 = aws_clients.client("s3")
     resp = s3.list_buckets()
 
     targets = set(bucket_names or [])
+    candidates = []
     for b in resp.get("Buckets", []):
         name = b["Name"]
         if name_prefix and not name.startswith(name_prefix):
             # אם יש לנו רשימה מפורשת של שמות, נבדוק אותה בהמשך
             if name not in targets:
                 continue
-        try:
-            t = s3.get_bucket_tagging(Bucket=name)
-            tags = {x["Key"]: x["Value"] for x in t.get("TagSet", [])}
-        except ClientError:
-            continue
-        if tags.get(TAG_CREATEDBY_KEY) != TAG_CREATEDBY_VAL or tags.get(TAG_OWNER_KEY) != owner:
-            continue
         if bucket_names and name not in targets:
             continue
+        candidates.append(b)
 
-        print(f"S3: deleting bucket {name}")
-        if dry_run:
+    regions = {b["Name"]: b.get("BucketRegion") for b in candidates}
+    found = []
+    # deletion is decided on the tags as they are now, not as cached minutes ago
+    for name, tags in iter_bucket_tags(candidates, fresh=True):
+        if tags.get(TAG_CREATEDBY_KEY) != TAG_CREATEDBY_VAL or tags.get(TAG_OWNER_KEY) != owner:
             continue
-        bucket = s3r.Bucket(name)
-        try:
-            bucket.object_versions.all().delete()
-        except ClientError:
-            pass
+        found.append({"name": name, "region": get_bucket_region(name, regions.get(name))})
+    if with_stats and found:
+        import s3_stats
+        with ThreadPoolExecutor(max_workers=min(S3_STATS_BUCKETS, len(found))) as pool:
+            futures = {pool.submit(s3_stats.bucket_stats, b["name"], region=b["region"]): b for b in found}
+            for fut in as_completed(futures):
+                b = futures[fut]
+                try:
+                    stats = fut.result()
+                except ClientError as e:
+                    _serialized(log)(f"S3: {b['name']}: cannot measure bucket: {e}")
+                    continue
+                b["stats"] = {k: v for k, v in stats.items() if k != "histogram"}
+    return sorted(found, key=lambda b: b["name"])
+
+def _bucket_estimate(stats):
+    """' (N versions, size, ~K delete requests, ~T)' for print_plan."""
+    from s3_stats import human_bytes
+    keys = stats["objects"] + stats["versions"] + stats["delete_markers"]
+    batches = -(-keys // S3_DELETE_BATCH)
+    seconds = batches * S3_BATCH_SECONDS / S3_DELETE_WORKERS
+    return (f" ({keys} object versions/markers, {human_bytes(stats['bytes'])}, "
+            f"~{batches} delete requests, ~{seconds:.0f}s)")
+
+def _verified_buckets(entries, owner, log):
+    """Plan entries whose bucket tags (read now, not from the cache) still match."""
+    from s3_manager import get_bucket_tags
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tags = list(pool.map(lambda b: get_bucket_tags(b["name"], b.get("region"), fresh=True), entries))
+    return [b for b, t in zip(entries, tags) if _is_owned(t, owner)]
+
+def _delete_bucket(name, region, log):
+    deleted, errors = empty_bucket(name, region, log=log)
+    result = {"ok": False, "error": None, "deleted": deleted, "errors": errors}
+    if errors:
+        result["error"] = f"{errors} object(s) could not be deleted"
+        log(f"S3: {name}: {errors} object(s) could not be deleted; leaving bucket in place")
+        return result
+    try:
+        aws_clients.client("s3", region).delete_bucket(Bucket=name)
+        log(f"S3: {name}: deleted ({deleted} object versions removed)")
+        result["ok"] = True
+    except ClientError as e:
+        log(f"S3: error deleting bucket {name}: {e}")
+        result["error"] = str(e)
+    return result
+
+def _iter_delete_batches(s3, bucket):
+    """Stream full delete_objects batches of every version and delete marker in the bucket."""
+    batch = []
+    for page in s3.get_paginator("list_object_versions").paginate(Bucket=bucket):
+        for v in page.get("Versions", []) + page.get("DeleteMarkers", []):
+            batch.append({"Key": v["Key"], "VersionId": v["VersionId"]})
+            if len(batch) == S3_DELETE_BATCH:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def empty_bucket(name, region=None, workers=None, log=print):
+    """
+    Delete all object versions, delete markers and unfinished multipart uploads.
+    Listing is streamed; at most 2*workers batches are held in memory.
+    Returns (deleted, errors).
+    """
+    _log = _serialized(log)
+    s3 = aws_clients.client("s3", region)
+    workers = workers or S3_DELETE_WORKERS
+    stats = {"deleted": 0, "errors": 0, "batches": 0}
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def _report_errors(errs):
+        with lock:
+            first = stats["errors"]
+            stats["errors"] += len(errs)
+        for e in errs[:max(0, S3_MAX_KEY_ERRORS_SHOWN - first)]:
+            _log(f"S3: {name}: cannot delete {e.get('Key')} ({e.get('VersionId')}): {e.get('Code')} {e.get('Message', '')}")
+
+    def _delete(batch):
         try:
-            bucket.objects.all().delete()
-        except ClientError:
-            pass
+            resp = s3.delete_objects(Bucket=name, Delete={"Objects": batch, "Quiet": True})
+            errs = resp.get("Errors", [])
+        except Exception as e:  # whole batch failed (ClientError, connection error, ...)
+            err = getattr(e, "response", {}).get("Error", {})
+            errs = [{"Key": o["Key"], "VersionId": o["VersionId"],
+                     "Code": err.get("Code") or type(e).__name__, "Message": err.get("Message") or str(e)}
+                    for o in batch]
+        if errs:
+            _report_errors(errs)
+        with lock:
+            stats["deleted"] += len(batch) - len(errs)
+            stats["batches"] += 1
+            if stats["batches"] % S3_PROGRESS_EVERY == 0:
+                _log(f"S3: {name}: {stats['deleted']} deleted, {stats['errors']} errors so far")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
         try:
-            bucket.delete()
+            for batch in _iter_delete_batches(s3, name):
+                in_flight.acquire()
+                pool.submit(_delete, batch).add_done_callback(lambda _f: in_flight.release())
         except ClientError as e:
-            print(f"S3: error deleting bucket {name}: {e}")
+            _log(f"S3: {name}: listing error: {e}")
+            with lock:
+                stats["errors"] += 1
+
+    try:
+        for page in s3.get_paginator("list_multipart_uploads").paginate(Bucket=name):
+            for u in page.get("Uploads", []):
+                s3.abort_multipart_upload(Bucket=name, Key=u["Key"], UploadId=u["UploadId"])
+    except ClientError as e:
+        _log(f"S3: {name}: error aborting multipart uploads: {e}")
+
+    if stats["errors"] > S3_MAX_KEY_ERRORS_SHOWN:
+        _log(f"S3: {name}: ... {stats['errors'] - S3_MAX_KEY_ERRORS_SHOWN} more key errors not shown")
+    return stats["deleted"], stats["errors"]
 
 # ---------- Route53 ----------
-def cleanup_route53(dry_run, owner, zone_ids, name_prefix):
-    r53 = boto3.client("route53")
+def cleanup_route53(dry_run, owner, zone_ids, name_prefix, log=print):
+    return _run_single("route53", dry_run, discover_route53(owner, zone_ids, name_prefix, log), log)
+
+def discover_route53(owner, zone_ids, name_prefix, log=print):
+    """Return plan entries ({"id", "name"}) for the owner's platform-cli hosted zones."""
+    import route53_records
+
+    _log = _serialized(log)
+    r53 = aws_clients.client("route53")
     try:
-        zones = r53.list_hosted_zones()["HostedZones"]
+        zones = [z for page in r53.get_paginator("list_hosted_zones").paginate() for z in page["HostedZones"]]
     except ClientError as e:
-        print(f"Route53: list_hosted_zones error: {e}")
-        return
+        _log(f"Route53: list_hosted_zones error: {e}")
+        return []
 
     wanted_ids = set(zone_ids or [])
+    candidates = {}
     for z in zones:
         zid = z["Id"].split("/")[-1]
         zname = z["Name"].rstrip(".")
-        if name_prefix and not zname.startswith(name_prefix):
-            if zone_ids and zid not in wanted_ids:
-                continue
-        try:
-            tagres = r53.list_tags_for_resource(ResourceType="hostedzone", ResourceId=zid)
-            tags = {t["Key"]: t["Value"] for t in tagres["ResourceTagSet"].get("Tags", [])}
-        except ClientError:
-            continue
-        if tags.get(TAG_CREATEDBY_KEY) != TAG_CREATEDBY_VAL or tags.get(TAG_OWNER_KEY) != owner:
+        if name_prefix and not zname.startswith(name_prefix) and zid not in wanted_ids:
             continue
         if zone_ids and zid not in wanted_ids:
             continue
+        candidates[zid] = zname
 
-        print(f"Route53: purge records and delete zone {zname} ({zid})")
-        if dry_run:
-            continue
+    failed = set()
+    tags = route53_records.zone_tags(candidates, failed=failed)
+    for zid in sorted(failed):
+        _log(f"Route53: cannot read the tags of {candidates[zid]} ({zid}); left out of the plan")
+    return [{"id": zid, "name": zname} for zid, zname in candidates.items() if _is_owned(tags.get(zid, {}), owner)]
 
-        # מחיקת רשומות שאינן NS/SOA במנות
-        try:
-            rrsets = r53.list_resource_record_sets(HostedZoneId=zid)["ResourceRecordSets"]
-        except ClientError as e:
-            print(f"Route53: list RR error for {zid}: {e}")
-            continue
+def _verified_zones(entries, owner, log):
+    import route53_records
 
-        changes = []
-        for rr in rrsets:
-            if rr["Type"] in ("NS", "SOA"):
-                continue
-            change = {"Action": "DELETE", "ResourceRecordSet": {"Name": rr["Name"], "Type": rr["Type"]}}
-            if "AliasTarget" in rr:
-                change["ResourceRecordSet"]["AliasTarget"] = rr["AliasTarget"]
-            else:
-                change["ResourceRecordSet"]["TTL"] = rr["TTL"]
-                change["ResourceRecordSet"]["ResourceRecords"] = rr.get("ResourceRecords", [])
-            changes.append(change)
-
-        for i in range(0, len(changes), 90):
-            batch = changes[i:i+90]
-            try:
-                r53.change_resource_record_sets(HostedZoneId=zid, ChangeBatch={"Changes": batch})
-            except ClientError as e:
-                print(f"Route53: change batch error in {zid}: {e}")
+    tags = route53_records.zone_tags(z["id"] for z in entries)
+    return [z for z in entries if _is_owned(tags.get(z["id"], {}), owner)]
 
-        try:
-            r53.delete_hosted_zone(Id=zid)
-        except ClientError as e:
-            print(f"Route53: delete zone error {zid}: {e}")
+def _delete_zone(zid, log):
+    import route53_records
+
+    # מחיקת רשומות שאינן NS/SOA בזרם, במנות מלאות
+    changes = (route53_records.delete_change(rr) for rr in route53_records.iter_non_default_records(zid))
+    try:
+        route53_records.submit_changes(zid, changes)
+    except ClientError as e:
+        log(f"Route53: change batch error in {zid}: {e}")
+        return {"ok": False, "error": str(e)}
+
+    try:
+        aws_clients.client("route53").delete_hosted_zone(Id=zid)
+        log(f"Route53: zone {zid} deleted")
+        return {"ok": True, "error": None}
+    except ClientError as e:
+        log(f"Route53: delete zone error {zid}: {e}")
+        return {"ok": False, "error": str(e)}
@@ -1,30 +1,102 @@
+import importlib
+
 import click
-from ec2_manager import ec2_group
-from s3_manager import s3_group
-from route53_manager import route53_group
 
-@click.group()
-def cli():
-    """platform-cli: AWS resource manager (EC2, S3, Route53)"""
-    pass
 
-cli.add_command(ec2_group, name='ec2')
-cli.add_command(s3_group, name='s3')
-cli.add_command(route53_group, name='route53')
-from cleanup import cleanup_resources  # ייבוא הפונקציה מקובץ cleanup.py
+class LazyGroup(click.Group):
+    """click Group that imports a subcommand's module only when it is invoked."""
+
+    def __init__(self, *args, lazy_subcommands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # name -> "module:attribute"
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_subcommands:
+            module_name, attr = self.lazy_subcommands[cmd_name].split(":")
+            return getattr(importlib.import_module(module_name), attr)
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(cls=LazyGroup, lazy_subcommands={
+    "ec2": "ec2_manager:ec2_group",
+    "s3": "s3_manager:s3_group",
+    "route53": "route53_manager:route53_group",
+    "inventory": "inventory:inventory_group",
+    "daemon": "daemon:daemon_group",
+    "shell": "daemon:shell_cmd",
+})
+@click.option("--trace-calls", is_flag=True,
+              help="Time every AWS call and print a per-operation summary (stderr) at exit")
+@click.option("--trace-file", type=click.Path(dir_okay=False, writable=True),
+              help="Also write one JSON line per AWS call to this file (implies --trace-calls)")
+@click.option("--output", type=click.Choice(["text", "jsonl", "csv"]), default=None,
+              help="Output format for list commands: text (default), jsonl or csv")
+@click.option("--fields", default=None, help="Comma-separated fields for list commands")
+@click.pass_context
+def cli(ctx, trace_calls, trace_file, output, fields):
+    """platform-cli: AWS resource manager (EC2, S3, Route53)"""
+    ctx.ensure_object(dict).update(output=output, fields=fields)
+    if trace_calls or trace_file:
+        import calltrace
+        calltrace.enable(trace_file)
+        ctx.call_on_close(calltrace.print_summary)
 
 @cli.command("cleanup")
 @click.option("--yes", is_flag=True, help="דלג על שאלה ומחק מיד")
 @click.option("--dry-run", is_flag=True, help="הצגה בלבד (לא מוחק בפועל)")
-def cleanup_cmd(yes, dry_run):
+@click.option("--plan-out", type=click.Path(dir_okay=False, writable=True),
+              help="Write the discovered cleanup plan (JSON) to this file and exit without deleting")
+@click.option("--plan-in", type=click.Path(exists=True, dir_okay=False),
+              help="Execute a plan written by --plan-out (no rediscovery)")
+@click.option("--concurrency", type=click.IntRange(min=1), default=None,
+              help="Max parallel deletions across all services (default 16)")
+@click.option("--all-regions", is_flag=True, help="Look for EC2 instances in every enabled region")
+@click.option("--regions", default=None, help="Comma-separated EC2 regions to clean up")
+@click.option("--s3-stats", is_flag=True,
+              help="Measure every bucket first so the plan shows its size and an estimated delete time")
+def cleanup_cmd(yes, dry_run, plan_out, plan_in, concurrency, all_regions, regions, s3_stats):
     """מוחק את כל המשאבים עם CreatedBy=platform-cli (EC2/S3/Route53)"""
+    import cleanup  # ייבוא עצל - boto3 נטען רק כשצריך
+    if plan_out and plan_in:
+        raise click.UsageError("--plan-out and --plan-in are mutually exclusive")
+    if plan_in and s3_stats:
+        raise click.UsageError("--s3-stats applies to discovery; a --plan-in plan keeps the stats it was written with")
+    if all_regions or regions:
+        from regions import resolve_regions
+        regions = resolve_regions(all_regions, regions)
+    if plan_out:
+        import asyncio, api
+        plan = asyncio.run(api.cleanup_plan(regions=regions, s3_stats=s3_stats, log=click.echo))
+        cleanup.write_plan(plan, plan_out)
+        cleanup.print_plan(plan)
+        click.echo(f"plan written to {plan_out}")
+        return
+    if plan_in:
+        try:
+            plan = cleanup.read_plan(plan_in)
+        except ValueError as e:
+            raise click.ClickException(str(e))
     if not yes and not dry_run:
         confirm = input("פעולה הרסנית! למחוק את כל משאבי platform-cli? הקלידי YES: ")
         if confirm.strip().lower() != "yes":
             click.echo("בוטל.")
             return
-    cleanup_resources(dry_run=dry_run)
+    if plan_in:
+        print(f"=== cleanup platform-cli from plan {plan_in} (owner={plan['owner']}, dry_run={dry_run}) ===")
+        cleanup.execute_plan(plan, dry_run=dry_run, concurrency=concurrency)
+        print("=== done ===")
+    else:
+        cleanup.cleanup_resources(dry_run=dry_run, concurrency=concurrency, regions=regions, s3_stats=s3_stats)
 
 if __name__ == '__main__':
+    import sys
+    from daemon import maybe_forward
+    # a running `daemon start` serves the command from its warm process
+    code = maybe_forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
     cli()
-
@@ -0,0 +1,57 @@
+# config.py
+"""
+Optional INI config file for platform-cli tuning knobs.
+
+Looked up at $PLATFORM_CLI_CONFIG, else $XDG_CONFIG_HOME/platform-cli/config.ini,
+else ~/.config/platform-cli/config.ini. Environment variables always win over
+the file, e.g.:
+
+    [retry]
+    mode = adaptive
+    max_attempts = 10
+
+    [rate_limits]
+    # requests per second (0 = unlimited); service or service.region
+    ec2 = 20
+    route53 = 5
+    s3.eu-west-1 = 40
+"""
+import configparser
+import os
+import threading
+
+_lock = threading.Lock()
+_parser = None
+
+
+def config_path():
+    if os.getenv("PLATFORM_CLI_CONFIG"):
+        return os.path.expanduser(os.getenv("PLATFORM_CLI_CONFIG"))
+    base = os.getenv("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "platform-cli", "config.ini")
+
+
+def _load():
+    global _parser
+    if _parser is None:
+        with _lock:
+            if _parser is None:
+                parser = configparser.ConfigParser()
+                parser.read(config_path(), encoding="utf-8")
+                _parser = parser
+    return _parser
+
+
+def get(section, key, env=None, default=None):
+    """Setting lookup: env var (if given) > config file > default."""
+    if env and os.getenv(env) not in (None, ""):
+        return os.getenv(env)
+    return _load().get(section, key, fallback=default)
+
+
+def get_number(section, key, env=None, default=0, cast=float):
+    value = get(section, key, env)
+    try:
+        return cast(value) if value is not None else default
+    except ValueError:
+        return default
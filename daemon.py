@@ -0,0 +1,398 @@
+# daemon.py
+"""
+Warm platform-cli: an interactive `shell` and a local Unix-socket daemon.
+
+Both run many commands in one process, so boto3 is imported once, the
+session and its credentials are resolved once, pooled (TLS) connections
+stay open, and the AMI / bucket-tag / region caches stay in memory.
+
+`daemon start` listens on a Unix socket (mode 0600). While it runs,
+`python cli.py ...` forwards its arguments there (see maybe_forward) and
+streams the output back, unless PLATFORM_CLI_DAEMON=0, the command reads
+stdin (a `-` argument, or a pipe or file on stdin), runs long (LOCAL_WHEN:
+uploads, syncs, cleanup --yes, --wait, ...), or the caller's user, AWS_* /
+PLATFORM_CLI_* environment or config files differ from the daemon's — then
+the command simply runs locally. Commands are executed one at a time, in
+the caller's working directory, after re-reading the on-disk caches; the
+daemon has no terminal, so a forwarded command that prompts fails and asks
+for --yes.
+
+This module is imported on every invocation: keep its imports light.
+"""
+import hashlib
+import io
+import json
+import os
+import socket
+import stat
+import sys
+
+import click
+
+PROTOCOL = 1
+LOCAL_ONLY = {"shell", "daemon"}  # never forwarded
+# long-running commands, local when given one of the flags (None: always): a forwarded one would hold
+# the daemon (and its run lock) until it ends, and Ctrl-C only kills the client
+LOCAL_WHEN = {
+    ("ec2", "list"): ("--watch", "--until"),
+    ("ec2", "create"): ("--wait-running",),
+    ("s3", "upload-file"): None,
+    ("s3", "sync-dir"): None,
+    ("s3", "stats"): None,
+    ("cleanup",): ("--yes",),
+    ("route53", "create-zone"): ("--wait",),
+    ("route53", "upsert"): ("--wait",),
+    ("route53", "sync"): ("--wait",),
+    ("route53", "import"): ("--wait",),
+    ("route53", "delete-zone"): ("--wait",),
+}
+_GLOBAL_VALUE_OPTIONS = {"--trace-file", "--output", "--fields"}  # cli() options that take a value
+
+
+def socket_path():
+    if os.getenv("PLATFORM_CLI_SOCKET"):
+        return os.getenv("PLATFORM_CLI_SOCKET")
+    from cache import cache_dir
+    return os.path.join(os.getenv("XDG_RUNTIME_DIR") or cache_dir(), "platform-cli.sock")
+
+
+def _settings_files(environ):
+    """AWS config/credentials files and the platform-cli INI, as botocore and config.py find them."""
+    home = os.path.expanduser("~")
+    if environ.get("PLATFORM_CLI_CONFIG"):
+        ini = os.path.expanduser(environ["PLATFORM_CLI_CONFIG"])
+    else:
+        base = environ.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+        ini = os.path.join(base, "platform-cli", "config.ini")
+    return [os.path.expanduser(environ.get("AWS_CONFIG_FILE") or os.path.join(home, ".aws", "config")),
+            os.path.expanduser(environ.get("AWS_SHARED_CREDENTIALS_FILE") or os.path.join(home, ".aws", "credentials")),
+            ini]
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def env_fingerprint(environ=None):
+    """
+    Hash of the settings a command depends on (environment, including the user
+    that owns new resources, plus the mtimes of the AWS and platform-cli config
+    files); the daemon only serves matching callers.
+    """
+    environ = os.environ if environ is None else environ
+    keys = sorted(k for k in environ if (k.startswith("AWS_") or k.startswith("PLATFORM_CLI_")
+                                         or k in ("USER", "USERNAME"))
+                  and k not in ("PLATFORM_CLI_SOCKET", "PLATFORM_CLI_DAEMON"))
+    files = [(path, _mtime(path)) for path in _settings_files(environ)]
+    return hashlib.sha256(json.dumps([[(k, environ[k]) for k in keys], files]).encode()).hexdigest()
+
+
+# ---------- framing: a JSON header line, optionally followed by `n` raw bytes ----------
+def _send(sock, header, payload=b""):
+    if payload:
+        header = dict(header, n=len(payload))
+    sock.sendall(json.dumps(header).encode() + b"\n" + payload)
+
+
+def _recv(rfile):
+    line = rfile.readline()
+    if not line:
+        return None, b""
+    header = json.loads(line)
+    return header, rfile.read(header["n"]) if header.get("n") else b""
+
+
+# ---------- client side ----------
+def _request(message, timeout=None):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(socket_path())
+    _send(sock, message)
+    return sock
+
+
+def _runs_locally(argv):
+    """True for commands that must not be forwarded: LOCAL_ONLY groups and LOCAL_WHEN flags."""
+    i = 0
+    while i < len(argv) and argv[i].startswith("-"):  # global options before the subcommand
+        i += 2 if argv[i] in _GLOBAL_VALUE_OPTIONS else 1
+    if argv[i:i + 1] and argv[i] in LOCAL_ONLY:
+        return True
+    for command, flags in LOCAL_WHEN.items():
+        if tuple(argv[i:i + len(command)]) == command:
+            rest = argv[i + len(command):]
+            return flags is None or any(a.split("=", 1)[0] in flags for a in rest)
+    return False
+
+
+def _stdin_has_data():
+    """True when stdin is a pipe or a file the command may read; terminals, /dev/null and a closed stdin are not."""
+    try:
+        mode = os.fstat(0).st_mode
+    except OSError:
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode) or stat.S_ISSOCK(mode)
+
+
+def maybe_forward(argv):
+    """
+    Run argv in the daemon if one is listening; returns the exit code, or None
+    when the command should run in this process instead.
+    """
+    if os.getenv("PLATFORM_CLI_DAEMON") == "0" or _runs_locally(argv):
+        return None
+    if "-" in argv or _stdin_has_data():
+        return None  # stdin is not forwarded: input the command may read needs this process
+    if not os.path.exists(socket_path()):
+        return None
+    try:
+        sock = _request({"v": PROTOCOL, "argv": argv, "cwd": os.getcwd(), "env": env_fingerprint()})
+        rfile = sock.makefile("rb")
+        first = True
+        while True:
+            header, payload = _recv(rfile)
+            if header is None:
+                if first:
+                    return None  # daemon went away before answering: run locally
+                raise ConnectionError("daemon closed the connection")
+            first = False
+            if header.get("fallback"):
+                return None
+            if "exit" in header:
+                return header["exit"]
+            stream = sys.stdout if header["s"] == "out" else sys.stderr
+            stream.buffer.write(payload)
+            stream.flush()
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None  # stale socket
+
+
+# ---------- server side ----------
+class _NoInput(io.StringIO):
+    """Empty stdin that remembers whether the command tried to read it (a prompt)."""
+    prompted = False
+
+    def read(self, size=-1):
+        self.prompted = True
+        return super().read(size)
+
+    def readline(self, size=-1):
+        self.prompted = True
+        return super().readline(size)
+
+
+class _FrameWriter(io.RawIOBase):
+    """Raw stream that ships every write to the client as one frame."""
+
+    def __init__(self, sock, name):
+        super().__init__()
+        self.sock, self.name = sock, name
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            _send(self.sock, {"s": self.name}, bytes(data))
+        return len(data)
+
+
+def _run(argv, cwd, sock):
+    """Run one cli command with stdout/stderr bound to the client; returns its exit code."""
+    import cache
+    from cli import cli
+
+    cache.reload_all()  # local runs may have written the cache files since the last command
+    # stdin is never forwarded (callers with piped input run locally), so prompts hit EOF
+    saved = sys.stdin, sys.stdout, sys.stderr, os.getcwd()
+    sys.stdin = stdin = _NoInput()
+    sys.stdout = io.TextIOWrapper(io.BufferedWriter(_FrameWriter(sock, "out")),
+                                  encoding="utf-8", line_buffering=True, write_through=True)
+    sys.stderr = io.TextIOWrapper(io.BufferedWriter(_FrameWriter(sock, "err")),
+                                  encoding="utf-8", line_buffering=True, write_through=True)
+    try:
+        os.chdir(cwd)
+        cli.main(argv, prog_name="platform-cli", standalone_mode=True)
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except EOFError:
+        code = 1
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        code = 1
+    finally:
+        if stdin.prompted:
+            # click turns the EOF into "Aborted!"; say why
+            click.echo("aborted: the daemon cannot answer prompts; use --yes (or PLATFORM_CLI_DAEMON=0)", err=True)
+        import calltrace
+        calltrace.reset()  # --trace-calls applies to one command, not the daemon's lifetime
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except OSError:
+                pass
+        sys.stdin, sys.stdout, sys.stderr = saved[:3]
+        os.chdir(saved[3])
+    return code
+
+
+def serve(path=None):
+    """Serve forwarded commands on a Unix socket until stopped."""
+    import signal
+    import socketserver
+    import threading
+    import time
+
+    import aws_clients
+
+    path = path or socket_path()
+    fingerprint = env_fingerprint()
+    run_lock = threading.Lock()  # commands share process-wide stdio and cwd
+    state = {"started": time.time(), "served": 0}
+    aws_clients.get_session().get_credentials()  # resolve credentials up front
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            header, _ = _recv(self.rfile)
+            if header is None:
+                return
+            if header.get("control") == "status":
+                _send(self.request, {"pid": os.getpid(), "uptime": time.time() - state["started"],
+                                     "served": state["served"], "socket": path})
+                return
+            if header.get("control") == "stop":
+                _send(self.request, {"stopping": True})
+                threading.Thread(target=server.shutdown, daemon=True).start()
+                return
+            if header.get("v") != PROTOCOL or header.get("env") != fingerprint:
+                _send(self.request, {"fallback": True})
+                return
+            with run_lock:
+                code = _run(header["argv"], header["cwd"], self.request)
+                state["served"] += 1
+            _send(self.request, {"exit": code})
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(path):
+        try:
+            _request({"control": "status"}, timeout=2).close()
+            raise click.ClickException(f"a daemon is already listening on {path}")
+        except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+            os.unlink(path)  # stale socket from a crashed daemon
+    old_umask = os.umask(0o177)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+# ---------- commands ----------
+@click.group(name="daemon")
+def daemon_group():
+    """Background process that keeps AWS sessions warm for forwarded commands"""
+
+
+@daemon_group.command("start")
+@click.option("--foreground", is_flag=True, help="Run in this terminal instead of detaching")
+def start_cmd(foreground):
+    """Start the daemon (later commands are forwarded to it automatically)"""
+    path = socket_path()
+    if foreground:
+        click.echo(f"platform-cli daemon listening on {path} (pid {os.getpid()})")
+        serve(path)
+        return
+    import subprocess
+    import time
+    subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py"),
+                      "daemon", "start", "--foreground"],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    for _ in range(100):
+        if os.path.exists(path):
+            click.echo(f"daemon started ({path})")
+            return
+        time.sleep(0.1)
+    raise click.ClickException("daemon did not start; try 'daemon start --foreground' to see why")
+
+
+def _control(command):
+    try:
+        sock = _request({"control": command}, timeout=5)
+    except (ConnectionRefusedError, FileNotFoundError):
+        raise click.ClickException("no daemon running")
+    with sock:
+        header, _ = _recv(sock.makefile("rb"))
+    return header
+
+
+@daemon_group.command("stop")
+def stop_cmd():
+    """Stop the daemon"""
+    _control("stop")
+    click.echo("daemon stopping")
+
+
+@daemon_group.command("status")
+def status_cmd():
+    """Show whether the daemon is running"""
+    st = _control("status")
+    click.echo(f"running: pid {st['pid']}, up {st['uptime']:.0f}s, {st['served']} command(s) served, {st['socket']}")
+
+
+@click.command("shell")
+def shell_cmd():
+    """Interactive shell: run many commands in one warm process"""
+    import shlex
+    from cli import cli
+
+    try:
+        import readline  # noqa: F401  (line editing and history when available)
+    except ImportError:
+        pass
+    click.echo("platform-cli shell — type a command (e.g. 'ec2 list'), 'help', or 'exit'")
+    while True:
+        try:
+            line = input("platform-cli> ")
+        except (EOFError, KeyboardInterrupt):
+            click.echo()
+            return
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            click.echo(f"error: {e}", err=True)
+            continue
+        if not argv:
+            continue
+        if argv[0] in ("exit", "quit"):
+            return
+        if argv[0] == "help":
+            argv = ["--help"]
+        if argv[0] in LOCAL_ONLY:
+            click.echo(f"'{argv[0]}' is not available inside the shell", err=True)
+            continue
+        try:
+            cli.main(argv, prog_name="platform-cli", standalone_mode=True)
+        except SystemExit:
+            pass
+        except KeyboardInterrupt:
+            click.echo("interrupted", err=True)
+        except Exception as e:
+            # one failing command must not end the session
+            click.echo(f"error: {e}", err=True)
+        finally:
+            import calltrace
+            calltrace.reset()
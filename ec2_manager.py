@@ -1,67 +1,117 @@
 # ec2_manager.py
+import asyncio
+import datetime
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import click
-import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, WaiterError
 
-# ---- session/region ----
-_session = boto3.session.Session()
-_region = _session.region_name or os.getenv("AWS_REGION") or "us-east-1"
-ec2 = boto3.client("ec2", region_name=_region)
-ssm = boto3.client("ssm", region_name=_region)
+import aws_clients
+import ec2_watch
+from output import Emitter, output_options
+from regions import fan_out, region_options, resolve_regions
+from utils import duration_option, resolve_ami
+
+# ---- clients (created lazily from the shared registry) ----
+def _ec2():
+    return aws_clients.client("ec2")
 
 ALLOWED_TYPES = {"t3.micro", "t2.small"}
-MAX_RUNNING = 2  # guardrail
+MAX_RUNNING = int(os.getenv("PLATFORM_CLI_MAX_RUNNING", "2"))  # guardrail
+# new instance IDs can take a moment to become visible to create_tags
+TAG_RETRY_DELAYS = (0.5, 1, 2, 4, 8)  # seconds
 
 def _username():
     return os.getenv("USER") or os.getenv("USERNAME") or "unknown"
 
-def _count_running_cli_instances():
-    resp = ec2.describe_instances(
-        Filters=[
-            {"Name": "instance-state-name", "Values": ["running", "pending"]},
-            {"Name": "tag:CreatedBy", "Values": ["platform-cli"]},
-        ]
-    )
-    return sum(len(r["Instances"]) for r in resp.get("Reservations", []))
-
-def _ensure_cli_instance(iid: str):
-    res = ec2.describe_instances(InstanceIds=[iid])
-    inst = res["Reservations"][0]["Instances"][0]
-    tags = {t["Key"]: t["Value"] for t in inst.get("Tags", [])}
-    if tags.get("CreatedBy") != "platform-cli":
-        click.echo("refusing: instance was not created by platform-cli", err=True)
-        raise SystemExit(2)
-    return inst
+def _count_running_cli_instances(regions=None):
+    """Guardrail count; PLATFORM_CLI_GUARDRAIL_REGIONS=all|a,b widens it beyond the default region."""
+    if regions is None:
+        scope = os.getenv("PLATFORM_CLI_GUARDRAIL_REGIONS")
+        regions = resolve_regions(all_regions=scope == "all", regions=None if scope == "all" else scope)
+
+    def _count(region):
+        # one server-side filtered query: only our running/pending instances come back
+        pages = aws_clients.client("ec2", region).get_paginator("describe_instances").paginate(
+            Filters=[{"Name": "tag:CreatedBy", "Values": ["platform-cli"]},
+                     {"Name": "instance-state-name", "Values": ["running", "pending"]}],
+            PaginationConfig={"PageSize": 1000})
+        return sum(len(r.get("Instances", [])) for page in pages for r in page.get("Reservations", []))
+
+    total = 0
+    for region, count, error in fan_out(regions, _count):
+        if error:
+            raise click.ClickException(f"guardrail: cannot count instances in {region}: {error}")
+        total += count
+    return total
+
+def _resolve_ami(ami: str, refresh=False):
+    """Return AMI ID. Supports literals (ami-xxxx), 'amazon-linux', 'ubuntu' via SSM (cached)."""
+    try:
+        ami_id = resolve_ami(ami, refresh=refresh)
+    except (ValueError, ClientError):
+        ami_id = None
+    if not ami_id:
+        raise click.ClickException("could not resolve AMI; pass --ami ami-xxxxxxxx or use 'amazon-linux'/'ubuntu'")
+    return ami_id
 
-def _resolve_ami(ami: str):
-    """Return AMI ID. Supports literals (ami-xxxx), 'amazon-linux', 'ubuntu' via SSM."""
+def _check_ami(ami, refresh):
+    ami_id = _resolve_ami(ami, refresh=refresh)
     if ami.startswith("ami-"):
-        return ami
-    names = []
-    if ami == "amazon-linux":
-        names = [
-            "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-6.1-x86_64",
-            "/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2",
-        ]
-    elif ami == "ubuntu":
-        names = [
-            "/aws/service/canonical/ubuntu/server/24.04/stable/current/amd64/hvm/ebs-gp3/ami-id",
-            "/aws/service/canonical/ubuntu/server/22.04/stable/current/amd64/hvm/ebs-gp2/ami-id",
-        ]
-    for name in names:
+        # literal IDs are not checked by resolve_ami; SSM aliases always name a real image
+        _ec2().describe_images(ImageIds=[ami_id])
+    return ami_id
+
+def _check_network(subnet_id, sg_ids):
+    """Subnet and security groups exist, and the groups belong to the subnet's VPC."""
+    vpc_id = None
+    if subnet_id:
+        vpc_id = _ec2().describe_subnets(SubnetIds=[subnet_id])["Subnets"][0]["VpcId"]
+    if sg_ids:
+        groups = _ec2().describe_security_groups(GroupIds=list(sg_ids))["SecurityGroups"]
+        foreign = [g["GroupId"] for g in groups if vpc_id and g["VpcId"] != vpc_id]
+        if foreign:
+            raise click.ClickException(f"security group(s) {', '.join(foreign)} are not in {subnet_id}'s VPC {vpc_id}")
+
+def _preflight(count, ami, refresh_ami, key_name, subnet_id, sg_ids):
+    """
+    Guardrail count, AMI resolution and subnet / security group / key pair
+    validation, all at once. Returns the AMI ID; every problem found is
+    reported together before anything is launched.
+    """
+    checks = {
+        "guardrail": _count_running_cli_instances,
+        "ami": lambda: _check_ami(ami, refresh_ami),
+    }
+    if subnet_id or sg_ids:
+        checks["network"] = lambda: _check_network(subnet_id, sg_ids)
+    if key_name:
+        checks["key pair"] = lambda: _ec2().describe_key_pairs(KeyNames=[key_name])
+    with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+        futures = {what: pool.submit(fn) for what, fn in checks.items()}
+    results, problems = {}, []
+    for what, fut in futures.items():
         try:
-            return ssm.get_parameter(Name=name)["Parameter"]["Value"]
-        except ClientError:
-            continue
-    raise click.ClickException("could not resolve AMI; pass --ami ami-xxxxxxxx or use 'amazon-linux'/'ubuntu'")
+            results[what] = fut.result()
+        except click.ClickException as e:
+            problems.append(e.format_message())
+        except ClientError as e:
+            problems.append(f"{what}: {e.response.get('Error', {}).get('Message') or e}")
+    if "guardrail" in results and results["guardrail"] + count > MAX_RUNNING:
+        problems.insert(0, f"guardrail: you already have {results['guardrail']} running/pending, "
+                           f"+{count} would exceed max={MAX_RUNNING}")
+    if problems:
+        raise click.ClickException("pre-flight failed:\n  " + "\n  ".join(problems))
+    return results["ami"]
 
 @click.group(name="ec2")
 def ec2_group():
     """Manage EC2 instances created by platform-cli"""
 
 @ec2_group.command("create")
-@click.option("--name", required=True, help="Name tag")
+@click.option("--name", required=True, help="Name tag; may be a template such as web-{i} (i = 1..count)")
 @click.option("--ami", default="amazon-linux", show_default=True,
               help="amazon-linux | ubuntu | ami-xxxxxxxxxxxxxxxxx")
 @click.option("--instance-type", type=click.Choice(sorted(ALLOWED_TYPES)),
@@ -69,27 +119,27 @@ def ec2_group():
 @click.option("--key-name", default=None, help="EC2 key pair name")
 @click.option("--sg-id", multiple=True, help="SecurityGroupIds (sg-...) — can repeat")
 @click.option("--subnet-id", default=None, help="SubnetId (optional)")
-def create_instance(name, ami, instance_type, key_name, sg_id, subnet_id):
-    """Create a new EC2 instance (guardrail: max 2 running/pending)"""
-    running = _count_running_cli_instances()
-    if running >= MAX_RUNNING:
-        raise click.ClickException(f"guardrail: you already have {running} running/pending (max={MAX_RUNNING})")
-
-    ami_id = _resolve_ami(ami)
+@click.option("--count", default=1, show_default=True, type=click.IntRange(min=1),
+              help="Number of instances to launch in one run_instances call")
+@click.option("--wait-running", is_flag=True, help="Wait until all new instances are running")
+@click.option("--refresh-ami", is_flag=True, help="Ignore the cached AMI lookup and ask SSM again")
+def create_instance(name, ami, instance_type, key_name, sg_id, subnet_id, count, wait_running, refresh_ami):
+    """Create EC2 instances (guardrail: max running/pending, default 2)"""
+    names = _render_names(name, count)
+    ami_id = _preflight(count, ami, refresh_ami, key_name, subnet_id, sg_id)
 
     try:
+        tags = [
+            {"Key": "CreatedBy", "Value": "platform-cli"},
+            {"Key": "Owner", "Value": _username()},
+        ]
+        if len(set(names)) == 1:
+            tags.insert(0, {"Key": "Name", "Value": names[0]})
         kwargs = {
             "ImageId": ami_id,
             "InstanceType": instance_type,
-            "MinCount": 1, "MaxCount": 1,
-            "TagSpecifications": [{
-                "ResourceType": "instance",
-                "Tags": [
-                    {"Key": "Name", "Value": name},
-                    {"Key": "CreatedBy", "Value": "platform-cli"},
-                    {"Key": "Owner", "Value": _username()},
-                ]
-            }],
+            "MinCount": count, "MaxCount": count,
+            "TagSpecifications": [{"ResourceType": "instance", "Tags": tags}],
         }
         if key_name:
             kwargs["KeyName"] = key_name
@@ -98,55 +148,268 @@ def create_instance(name, ami, instance_type, key_name, sg_id, subnet_id):
         if sg_id:
             kwargs["SecurityGroupIds"] = list(sg_id)  # IDs only
 
-        resp = ec2.run_instances(**kwargs)
-        iid = resp["Instances"][0]["InstanceId"]
-        click.echo(f"instance created: {iid}")
+        resp = _ec2().run_instances(**kwargs)
     except ClientError as e:
         click.echo(f"error creating instance: {e}", err=True)
+        return
+
+    ids = [i["InstanceId"] for i in sorted(resp["Instances"], key=lambda i: i.get("AmiLaunchIndex", 0))]
+    for iid, n in zip(ids, names):
+        click.echo(f"instance created: {iid}" + (f"  {n}" if count > 1 else ""))
+    if len(set(names)) > 1:
+        errors = _tag_names(ids, names)
+        if errors:
+            detail = "\n  ".join(f"{iid}: {e}" for iid, e in errors.items())
+            raise click.ClickException(f"launched {len(ids)} instance(s), Name tagging failed for {len(errors)} "
+                                       f"(CreatedBy/Owner are set):\n  {detail}")
+    if wait_running:
+        # one waiter over all IDs instead of polling each instance
+        try:
+            _ec2().get_waiter("instance_running").wait(InstanceIds=ids)
+        except WaiterError as e:
+            raise click.ClickException(f"launched {len(ids)} instance(s), but they did not reach running: {e}")
+        click.echo(f"running: {len(ids)} instance(s)")
+
+def _render_names(template, count):
+    if "{" not in template:
+        return [template] * count
+    try:
+        return [template.format(i=i) for i in range(1, count + 1)]
+    except (KeyError, IndexError, ValueError) as e:
+        raise click.BadParameter(f"invalid name template {template!r}: {e}", param_hint="--name")
+
+def _tag_name(iid, name):
+    """Set the Name tag of a just-launched instance; returns the ClientError if it failed."""
+    for delay in TAG_RETRY_DELAYS + (None,):
+        try:
+            _ec2().create_tags(Resources=[iid], Tags=[{"Key": "Name", "Value": name}])
+            return None
+        except ClientError as e:
+            if delay is None or e.response.get("Error", {}).get("Code") != "InvalidInstanceID.NotFound":
+                return e
+            time.sleep(delay)
+
+def _tag_names(ids, names):
+    """{instance_id: error} for the Name tags that could not be set."""
+    # per-instance Name tags differ, so they cannot ride on the single run_instances call
+    with ThreadPoolExecutor(max_workers=min(8, len(ids))) as pool:
+        errors = dict(zip(ids, pool.map(_tag_name, ids, names)))
+    return {iid: e for iid, e in errors.items() if e is not None}
+
+def _instance_line(name, iid, state, itype, ip, region=None):
+    line = f"{name or '-'}\t{iid}\t{state}\t{itype}\t{ ip or '-' }"
+    return f"{region}\t{line}" if region else line
+
+INSTANCE_FIELDS = ("region", "id", "name", "owner", "state", "type", "public_ip", "launch_time", "tags")
+
+def _instance_emitter(output_format, fields, multi):
+    default = ("name", "id", "state", "type", "public_ip")
+    return Emitter(output_format, fields, (("region",) + default) if multi else default, INSTANCE_FIELDS,
+                   text=lambda r: _instance_line(r["name"], r["id"], r["state"], r["type"], r["public_ip"],
+                                                 r["region"] if multi else None))
 
 @ec2_group.command("list")
-def list_instances():
+@click.option("--cached", is_flag=True, help="Answer from the local inventory (see 'inventory refresh')")
+@click.option("--owner", default=None, help="Only instances with this Owner tag")
+@click.option("--name-prefix", default=None, help="Only instances whose Name tag starts with this")
+@click.option("--state", default=None, help="Only instances in this state")
+@click.option("--older-than", default=None, callback=duration_option, help="Only instances launched before, e.g. 12h, 7d")
+@click.option("--watch", is_flag=True, help="Keep polling and print only changes (state, public IP)")
+@click.option("--until", type=click.Choice(ec2_watch.STATES), default=None,
+              help="With --watch (implied): exit once every instance is in this state")
+@click.option("--id", "iids", multiple=True, help="With --watch: follow these instance IDs only — can repeat")
+@click.option("--interval", default=ec2_watch.DEFAULT_INTERVAL, show_default=True, type=click.FloatRange(min=0.5),
+              help="With --watch: shortest poll interval in seconds (grows while nothing changes)")
+@click.option("--timeout", default=None, callback=duration_option, help="With --watch: give up after e.g. 10m")
+@region_options
+@output_options
+def list_instances(cached, owner, name_prefix, state, older_than, watch, until, iids, interval, timeout,
+                   all_regions, regions, output_format, fields):
     """List platform-cli instances"""
-    paginator = ec2.get_paginator("describe_instances")
-    filters = [{"Name": "tag:CreatedBy", "Values": ["platform-cli"]}]
-    any_found = False
-    for page in paginator.paginate(Filters=filters):
-        for r in page.get("Reservations", []):
-            for i in r.get("Instances", []):
-                any_found = True
-                tags = {t["Key"]: t["Value"] for t in i.get("Tags", [])}
-                click.echo(
-                    f"{tags.get('Name','-')}\t{i['InstanceId']}\t{i['State']['Name']}\t{i['InstanceType']}\t{ i.get('PublicIpAddress','-') }"
-                )
-    if not any_found:
-        click.echo("No platform-cli instances found.")
+    multi = bool(all_regions or regions)
+    if watch or until:
+        if cached or multi:
+            raise click.UsageError("--watch works on live data in a single region (no --cached/--regions)")
+        _watch_instances(owner, name_prefix, state, older_than, until, iids, interval, timeout,
+                         output_format, fields)
+        return
+    if iids or timeout:
+        raise click.UsageError("--id and --timeout are only used with --watch")
+    out = _instance_emitter(output_format, fields, multi)
+    if cached:
+        import inventory
+        for r in inventory.query_instances(owner, name_prefix, state, older_than,
+                                           regions=resolve_regions(all_regions, regions) if multi else None):
+            out.emit({
+                "region": r["region"], "id": r["id"], "name": r["name"], "owner": r["owner"],
+                "state": r["state"], "type": r["instance_type"], "public_ip": r["public_ip"],
+                "launch_time": (datetime.datetime.fromtimestamp(r["launched_at"], datetime.timezone.utc)
+                                if r["launched_at"] else None),
+                "tags": json.loads(r["tags"] or "{}"),
+            })
+        out.finish("No platform-cli instances found.")
+        return
+
+    import api
+    cutoff = time.time() - older_than if older_than else None
+
+    def _region_error(region, error):
+        click.echo(f"{region}: error listing instances: {error}", err=True)
+
+    async def _stream():
+        # records arrive page by page (from every region concurrently with --all-regions/--regions)
+        async for inst in api.iter_instances(owner, name_prefix, state,
+                                             resolve_regions(all_regions, regions) if multi else None,
+                                             on_error=_region_error if multi else None):
+            if cutoff and inst["launch_time"].timestamp() >= cutoff:
+                continue
+            out.emit(inst)
 
-@ec2_group.command("start")
-@click.option("--id", "iid", required=True, help="InstanceId")
-def start_instance(iid):
-    _ensure_cli_instance(iid)
     try:
-        ec2.start_instances(InstanceIds=[iid])
-        click.echo("starting...")
+        asyncio.run(_stream())
     except ClientError as e:
-        click.echo(f"error starting: {e}", err=True)
+        raise click.ClickException(f"error listing instances: {e}")
+    out.finish("No platform-cli instances found.")
 
-@ec2_group.command("stop")
-@click.option("--id", "iid", required=True, help="InstanceId")
-def stop_instance(iid):
-    _ensure_cli_instance(iid)
+def _watch_instances(owner, name_prefix, state, older_than, until, iids, interval, timeout, output_format, fields):
+    import api
+    out = Emitter(output_format, fields, ec2_watch.EVENT_FIELDS, ec2_watch.EVENT_FIELDS, text=ec2_watch.event_text)
+    watcher = ec2_watch.Watcher(_ec2(), ids=iids or None, filters=api.instance_filters(owner, name_prefix, state),
+                                until=until, interval=interval, timeout=timeout,
+                                cutoff=time.time() - older_than if older_than else None)
     try:
-        ec2.stop_instances(InstanceIds=[iid])
-        click.echo("stopping...")
+        for event in watcher.events():
+            out.emit(event)
     except ClientError as e:
-        click.echo(f"error stopping: {e}", err=True)
+        raise click.ClickException(f"error describing instances: {e}")
+    except KeyboardInterrupt:
+        return
+    out.finish()
+    if watcher.outcome == "none":
+        raise click.ClickException("No platform-cli instances found.")
+    if watcher.outcome == "failed":
+        raise click.ClickException(f"terminated before reaching {until}: {', '.join(watcher.failed)}")
+    if watcher.outcome == "timeout" and until:
+        details = []
+        if watcher.failed:
+            details.append(f"terminated: {', '.join(watcher.failed)}")
+        if watcher.missing:
+            details.append(f"never found: {', '.join(watcher.missing)}")
+        raise click.ClickException(f"timed out waiting for {until}" + (f" ({'; '.join(details)})" if details else ""))
 
-@ec2_group.command("terminate")
-@click.option("--id", "iid", required=True, help="InstanceId")
-def terminate_instance(iid):
-    _ensure_cli_instance(iid)
+# ---- start / stop / terminate ----
+EC2_ID_BATCH = 1000  # instance IDs per describe/lifecycle call
+
+# action -> (client method, response key, progress word)
+_LIFECYCLE = {
+    "start": ("start_instances", "StartingInstances", "starting"),
+    "stop": ("stop_instances", "StoppingInstances", "stopping"),
+    "terminate": ("terminate_instances", "TerminatingInstances", "terminating"),
+}
+
+def _target_options(f):
+    f = click.option("--all-owners", is_flag=True, help="Selectors match every user's instances, not just yours")(f)
+    f = click.option("--owner", default=None, help="Only instances with this Owner tag (selectors default to you)")(f)
+    f = click.option("--state", default=None, help="Only instances in this state (e.g. running, stopped)")(f)
+    f = click.option("--name-prefix", default=None, help="Only instances whose Name tag starts with this")(f)
+    f = click.option("--id", "iids", multiple=True, help="InstanceId — can repeat")(f)
+    return f
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _select_cli_instances(iids, name_prefix=None, state=None, owner=None):
+    """
+    Resolve explicit IDs and/or selectors to platform-cli instances using
+    chunked describe_instances calls. Refuses (exit 2) if any explicit ID
+    was not created by platform-cli.
+    """
+    def _matches(inst, tags):
+        return ((not name_prefix or tags.get("Name", "").startswith(name_prefix))
+                and (not state or inst["State"]["Name"] == state)
+                and (not owner or tags.get("Owner") == owner))
+
+    paginator = _ec2().get_paginator("describe_instances")
+    if iids:
+        requests = [{"InstanceIds": chunk} for chunk in _chunks(list(dict.fromkeys(iids)), EC2_ID_BATCH)]
+    else:
+        filters = [{"Name": "tag:CreatedBy", "Values": ["platform-cli"]}]
+        if name_prefix:
+            filters.append({"Name": "tag:Name", "Values": [f"{name_prefix}*"]})
+        if state:
+            filters.append({"Name": "instance-state-name", "Values": [state]})
+        if owner:
+            filters.append({"Name": "tag:Owner", "Values": [owner]})
+        requests = [{"Filters": filters}]
+
+    selected, refused = [], []
     try:
-        ec2.terminate_instances(InstanceIds=[iid])
-        click.echo("terminating...")
+        for kwargs in requests:
+            for page in paginator.paginate(**kwargs):
+                for r in page.get("Reservations", []):
+                    for inst in r.get("Instances", []):
+                        tags = {t["Key"]: t["Value"] for t in inst.get("Tags", [])}
+                        if tags.get("CreatedBy") != "platform-cli":
+                            refused.append(inst["InstanceId"])
+                        elif _matches(inst, tags):
+                            selected.append(inst)
     except ClientError as e:
-        click.echo(f"error terminating: {e}", err=True)
+        raise click.ClickException(f"error describing instances: {e}")
+    if refused:
+        click.echo(f"refusing: not created by platform-cli: {', '.join(refused)}", err=True)
+        raise SystemExit(2)
+    return selected
+
+_CONFIRM_SHOWN = 20
+
+def _lifecycle(action, iids, name_prefix, state, owner, all_owners=False, yes=True):
+    if not (iids or name_prefix or state or owner):
+        raise click.UsageError("pass --id and/or a selector (--name-prefix, --state, --owner)")
+    if owner and all_owners:
+        raise click.UsageError("--owner and --all-owners are mutually exclusive")
+    if not iids and not all_owners:
+        owner = owner or _username()  # selectors only reach your own instances unless asked
+    method, key, word = _LIFECYCLE[action]
+    selected = _select_cli_instances(iids, name_prefix, state, owner)
+    targets = [i["InstanceId"] for i in selected]
+    if not targets:
+        click.echo("No matching platform-cli instances.")
+        return
+    if not iids and not yes:
+        for inst in selected[:_CONFIRM_SHOWN]:
+            name = next((t["Value"] for t in inst.get("Tags", []) if t["Key"] == "Name"), "-")
+            click.echo(f" - {name}\t{inst['InstanceId']}\t{inst['State']['Name']}")
+        if len(selected) > _CONFIRM_SHOWN:
+            click.echo(f" - ... and {len(selected) - _CONFIRM_SHOWN} more")
+        click.confirm(f"{action} these {len(targets)} instance(s)?", abort=True)
+    click.echo(f"{word} {len(targets)} instance(s)...")
+    for chunk in _chunks(targets, EC2_ID_BATCH):
+        try:
+            resp = getattr(_ec2(), method)(InstanceIds=chunk)
+        except ClientError as e:
+            click.echo(f"error {word} {len(chunk)} instance(s): {e}", err=True)
+            continue
+        for change in resp.get(key, []):
+            click.echo(f"{change['InstanceId']}\t{change['PreviousState']['Name']} -> {change['CurrentState']['Name']}")
+
+_yes_option = click.option("--yes", is_flag=True, help="Don't ask for confirmation when selecting by selector")
+
+@ec2_group.command("start")
+@_target_options
+def start_instance(iids, name_prefix, state, owner, all_owners):
+    """Start platform-cli instances by ID and/or selector"""
+    _lifecycle("start", iids, name_prefix, state, owner, all_owners)
+
+@ec2_group.command("stop")
+@_target_options
+@_yes_option
+def stop_instance(iids, name_prefix, state, owner, all_owners, yes):
+    """Stop platform-cli instances by ID and/or selector"""
+    _lifecycle("stop", iids, name_prefix, state, owner, all_owners, yes)
+
+@ec2_group.command("terminate")
+@_target_options
+@_yes_option
+def terminate_instance(iids, name_prefix, state, owner, all_owners, yes):
+    """Terminate platform-cli instances by ID and/or selector"""
+    _lifecycle("terminate", iids, name_prefix, state, owner, all_owners, yes)
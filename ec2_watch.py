@@ -0,0 +1,165 @@
+# ec2_watch.py
+"""
+`ec2 list --watch`: poll instances from one warm client and report only changes.
+
+Instances are found with the usual server-side filters; with --until (or
+explicit IDs) only the IDs still short of the target state are polled, so
+the payload shrinks as the fleet settles. The poll interval doubles while
+nothing changes (capped lower while an instance is in a transitional
+state) and drops back to the minimum after every change.
+"""
+import datetime
+import os
+import time
+
+from botocore.exceptions import ClientError
+
+DEFAULT_INTERVAL = 2.0  # seconds
+MAX_INTERVAL = float(os.getenv("PLATFORM_CLI_WATCH_MAX_INTERVAL", "30"))
+TRANSITIONAL_MAX_INTERVAL = 8.0  # something is about to change: don't back off far
+TRANSITIONAL_STATES = {"pending", "stopping", "shutting-down"}
+STATES = ("pending", "running", "stopping", "stopped", "shutting-down", "terminated")
+ID_BATCH = 1000
+FILTER_VALUES = 200  # values per describe_instances filter
+
+EVENT_FIELDS = ("time", "id", "name", "event", "old", "new", "public_ip")  # public_ip: the address now
+
+
+def _describe(ec2, found, cutoff, **kwargs):
+    for page in ec2.get_paginator("describe_instances").paginate(**kwargs):
+        for r in page.get("Reservations", []):
+            for inst in r.get("Instances", []):
+                if cutoff and inst["LaunchTime"].timestamp() >= cutoff:
+                    continue
+                tags = {t["Key"]: t["Value"] for t in inst.get("Tags", [])}
+                found[inst["InstanceId"]] = {"name": tags.get("Name"), "state": inst["State"]["Name"],
+                                             "public_ip": inst.get("PublicIpAddress")}
+
+
+def _snapshot(ec2, ids=None, filters=None, cutoff=None):
+    """
+    id -> {"name", "state", "public_ip"}, by instance IDs (in chunks) or by filters.
+    IDs that are not visible yet (just launched) are simply missing from the result.
+    """
+    found = {}
+    if ids is None:
+        _describe(ec2, found, cutoff, Filters=filters)
+        return found
+    for i in range(0, len(ids), ID_BATCH):
+        chunk = ids[i:i + ID_BATCH]
+        try:
+            _describe(ec2, found, cutoff, InstanceIds=chunk)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "InvalidInstanceID.NotFound":
+                raise
+            # one unknown ID fails the whole call; an instance-id filter skips it instead
+            for j in range(0, len(chunk), FILTER_VALUES):
+                _describe(ec2, found, cutoff, Filters=[{"Name": "instance-id", "Values": chunk[j:j + FILTER_VALUES]}])
+    return found
+
+
+def _diff(known, current, complete):
+    """Events turning known into current; `complete` means missing IDs are really gone."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for iid, inst in current.items():
+        old = known.get(iid)
+        base = {"time": now, "id": iid, "name": inst["name"], "public_ip": inst["public_ip"]}
+        if old is None:
+            yield dict(base, event="new", old=None, new=inst["state"])
+            continue
+        if old["state"] != inst["state"]:
+            yield dict(base, event="state", old=old["state"], new=inst["state"])
+        if old["public_ip"] != inst["public_ip"]:
+            yield dict(base, event="public_ip", old=old["public_ip"], new=inst["public_ip"])
+    if complete:
+        for iid in known.keys() - current.keys():
+            yield {"time": now, "id": iid, "name": known[iid]["name"], "event": "gone",
+                   "old": known[iid]["state"], "new": None, "public_ip": None}
+
+
+class Watcher:
+    """
+    Iterate events() for changes. With until, it stops once every instance
+    reached that state; `outcome` is then "reached", "failed" (an instance
+    terminated first), "none" (nothing to wait for) or "timeout". Explicit
+    IDs that describe_instances does not know (yet) are polled again until
+    they show up or the timeout; `missing` lists the ones never seen.
+    """
+
+    def __init__(self, ec2, ids=None, filters=None, until=None, interval=DEFAULT_INTERVAL,
+                 max_interval=MAX_INTERVAL, timeout=None, cutoff=None, sleep=time.sleep):
+        self.ec2, self.filters, self.until, self.cutoff = ec2, filters, until, cutoff
+        self.ids = list(dict.fromkeys(ids)) if ids else None  # None: poll by filters
+        self.interval, self.max_interval, self.timeout = interval, max(interval, max_interval), timeout
+        self.sleep = sleep
+        self.outcome = None
+        self.failed = []
+        self.missing = []
+        self.polls = 0
+
+    def _settled(self, inst):
+        if inst["state"] == self.until:
+            return True
+        return inst["state"] == "terminated"  # can never get there any more
+
+    def events(self):
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        known = {}
+        delay = self.interval
+        while True:
+            polled = self.ids
+            current = _snapshot(self.ec2, polled, self.filters, self.cutoff)
+            self.polls += 1
+            changed = False
+            # polling by IDs only returns what we still ask about; don't call the rest gone
+            for event in _diff({i: known[i] for i in polled if i in known} if polled is not None else known,
+                               current, complete=polled is None):
+                changed = True
+                if event["event"] == "gone":
+                    known.pop(event["id"], None)
+                yield event
+            known.update(current)
+            if polled is not None:
+                self.missing = [i for i in polled if i not in known]
+
+            if self.until:
+                waiting = []
+                for iid in (polled if polled is not None else current):
+                    inst = known.get(iid)
+                    if inst is None or not self._settled(inst):
+                        waiting.append(iid)
+                    elif inst["state"] != self.until and (polled is not None or self.polls > 1):
+                        # (instances found already terminated by the filters are leftovers, not failures)
+                        self.failed.append(iid)
+                self.ids = waiting  # from now on only ask about the unsettled ones
+                if not waiting:
+                    reached = any(i["state"] == self.until for i in known.values())
+                    self.outcome = "failed" if self.failed else ("reached" if reached else "none")
+                    return
+
+            if changed:
+                delay = self.interval
+            else:
+                busy = any(i["state"] in TRANSITIONAL_STATES for i in known.values())
+                delay = min(delay * 2, TRANSITIONAL_MAX_INTERVAL if busy else self.max_interval)
+                delay = max(delay, self.interval)
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    self.outcome = "timeout"
+                    return
+                delay = min(delay, left)
+            self.sleep(delay)
+
+
+def event_text(e):
+    when = e["time"].astimezone().strftime("%H:%M:%S")
+    if e["event"] == "new":
+        what = e["new"] + (f"\t{e['public_ip']}" if e.get("public_ip") else "")
+    elif e["event"] == "state":
+        what = f"{e['old']} -> {e['new']}"
+    elif e["event"] == "public_ip":
+        what = f"public IP {e['new']}" if e["new"] else f"public IP {e['old']} released"
+    else:
+        what = "no longer listed"
+    return f"{when}\t{e['name'] or '-'}\t{e['id']}\t{what}"
@@ -0,0 +1,414 @@
+# inventory.py
+"""
+Local SQLite inventory of platform-cli resources (instances, buckets, hosted zones).
+
+`inventory refresh` fills it in parallel and incrementally: rows are only
+rewritten when something changed, bucket tags are only fetched for buckets
+not seen before (or whose lookup failed, or read more than a day ago), and
+zone tags likewise, plus for zones whose record count changed. List
+commands answer `--cached` queries from it.
+
+It also holds the record index behind `route53 find`: every record of every
+hosted zone, with the record count and scan time of each zone as its change
+marker. A zone is rescanned only when its count moved, when this CLI wrote
+to it (route53_records.submit_changes marks it), or when it is older than
+the max age (catching value edits made elsewhere).
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from botocore.exceptions import BotoCoreError, ClientError
+
+import aws_clients
+from cache import cache_dir
+from regions import fan_out, region_options, resolve_regions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    id TEXT PRIMARY KEY, region TEXT, name TEXT, owner TEXT, state TEXT,
+    instance_type TEXT, public_ip TEXT, launched_at REAL, tags TEXT, refreshed_at REAL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY, region TEXT, created_by TEXT, owner TEXT,
+    created_at REAL, tags TEXT, refreshed_at REAL
+);
+CREATE TABLE IF NOT EXISTS zones (
+    id TEXT PRIMARY KEY, name TEXT, private INTEGER, created_by TEXT, owner TEXT,
+    record_count INTEGER, tags TEXT, refreshed_at REAL
+);
+CREATE TABLE IF NOT EXISTS record_zones (
+    zone_id TEXT PRIMARY KEY, zone_name TEXT, record_count INTEGER, indexed_at REAL, dirty_at REAL
+);
+CREATE TABLE IF NOT EXISTS records (
+    zone_id TEXT, name TEXT, type TEXT, set_identifier TEXT, ttl INTEGER,
+    value TEXT COLLATE NOCASE, target TEXT COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS instances_owner ON instances(owner);
+CREATE INDEX IF NOT EXISTS records_zone ON records(zone_id);
+CREATE INDEX IF NOT EXISTS records_value ON records(value);
+CREATE INDEX IF NOT EXISTS records_target ON records(target);
+CREATE INDEX IF NOT EXISTS buckets_owner ON buckets(owner);
+CREATE INDEX IF NOT EXISTS zones_owner ON zones(owner);
+"""
+TAGS_MAX_AGE = int(os.getenv("PLATFORM_CLI_INVENTORY_TAG_MAX_AGE", str(24 * 3600)))  # seconds
+RECORD_INDEX_MAX_AGE = int(os.getenv("PLATFORM_CLI_RECORD_INDEX_MAX_AGE", "3600"))  # seconds
+RECORD_INDEX_WORKERS = 8
+# rdata field a record points at, for reverse lookups (A/AAAA: the address itself)
+_TARGET_FIELD = {"A": 0, "AAAA": 0, "CNAME": 0, "NS": 0, "PTR": 0, "MX": 1, "SRV": 3}
+
+
+def db_path():
+    return os.getenv("PLATFORM_CLI_INVENTORY_DB") or os.path.join(cache_dir(), "inventory.sqlite3")
+
+
+@contextlib.contextmanager
+def _db():
+    """Connection that commits on success and is always closed."""
+    conn = sqlite3.connect(db_path(), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _tags(tag_list):
+    return {t["Key"]: t["Value"] for t in tag_list or []}
+
+
+def _apply(conn, table, key, rows, known, force=False):
+    """Upsert rows that are new or changed and drop rows that disappeared; returns counts."""
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    seen = set()
+    for row in rows:
+        seen.add(row[key])
+        old = known.get(row[key])
+        if not force and old is not None and all(old.get(c) == row[c] for c in row if c != "refreshed_at"):
+            stats["unchanged"] += 1
+            continue
+        stats["updated" if old is not None else "added"] += 1
+        cols = ", ".join(row)
+        conn.execute(f"INSERT OR REPLACE INTO {table} ({cols}) VALUES ({', '.join('?' * len(row))})",
+                     list(row.values()))
+    gone = [k for k in known if k not in seen]
+    conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(k,) for k in gone])
+    stats["removed"] = len(gone)
+    return stats
+
+
+# ---------- refresh ----------
+def refresh_instances(full=False, regions=None):
+    regions = regions or [aws_clients.default_region()]
+    now = time.time()
+
+    def _scan(region):
+        rows = []
+        paginator = aws_clients.client("ec2", region).get_paginator("describe_instances")
+        for page in paginator.paginate(Filters=[{"Name": "tag:CreatedBy", "Values": ["platform-cli"]}]):
+            for r in page.get("Reservations", []):
+                for i in r.get("Instances", []):
+                    tags = _tags(i.get("Tags"))
+                    rows.append({
+                        "id": i["InstanceId"], "region": region, "name": tags.get("Name"),
+                        "owner": tags.get("Owner"), "state": i["State"]["Name"],
+                        "instance_type": i["InstanceType"], "public_ip": i.get("PublicIpAddress"),
+                        "launched_at": i["LaunchTime"].timestamp() if i.get("LaunchTime") else None,
+                        "tags": json.dumps(tags, sort_keys=True), "refreshed_at": now,
+                    })
+        return rows
+
+    rows, scanned, last_error = [], [], None
+    for region, region_rows, error in fan_out(regions, _scan):
+        if error:
+            # keep the old rows of a region we could not reach
+            last_error = error
+            continue
+        scanned.append(region)
+        rows.extend(region_rows)
+    if not scanned:
+        raise last_error
+    with _db() as conn:
+        known = {r["id"]: dict(r) for r in conn.execute(
+            f"SELECT * FROM instances WHERE region IN ({', '.join('?' * len(scanned))})", scanned)}
+        return _apply(conn, "instances", "id", rows, known, force=full)
+
+
+def refresh_buckets(full=False):
+    from s3_manager import iter_bucket_tags
+
+    now = time.time()
+    buckets = aws_clients.client("s3").list_buckets().get("Buckets", [])
+    with _db() as conn:
+        known = {r["name"]: dict(r) for r in conn.execute("SELECT * FROM buckets")}
+    # tag lookups only for new buckets, failed lookups (tags NULL) and rows past the max age
+    def _stale(name):
+        row = known.get(name)
+        return full or row is None or row["tags"] is None or now - (row["refreshed_at"] or 0) > TAGS_MAX_AGE
+
+    fresh = [b for b in buckets if _stale(b["Name"])]
+    failed = set()
+    tags_by_bucket = dict(iter_bucket_tags(fresh, fresh=True, failed=failed))
+    rows = []
+    for b in buckets:
+        name = b["Name"]
+        if name in known and (name in failed or name not in tags_by_bucket):
+            rows.append(known[name])  # keep what we had; a failed lookup is retried next time
+        else:
+            tags = tags_by_bucket[name]
+            ok = name not in failed
+            rows.append({
+                "name": name, "region": b.get("BucketRegion"), "created_by": tags.get("CreatedBy"),
+                "owner": tags.get("Owner"), "created_at": b["CreationDate"].timestamp(),
+                "tags": json.dumps(tags, sort_keys=True) if ok else None, "refreshed_at": now,
+            })
+    with _db() as conn:
+        stats = _apply(conn, "buckets", "name", rows, known)
+        # re-read but unchanged rows are not rewritten; still restart their max-age clock
+        conn.executemany("UPDATE buckets SET refreshed_at = ? WHERE name = ?",
+                         [(now, name) for name in tags_by_bucket if name not in failed and name in known])
+        return stats
+
+
+def refresh_zones(full=False):
+    from route53_records import zone_tags
+
+    r53 = aws_clients.client("route53")
+    now = time.time()
+    zones = [z for page in r53.get_paginator("list_hosted_zones").paginate() for z in page["HostedZones"]]
+    with _db() as conn:
+        known = {r["id"]: dict(r) for r in conn.execute("SELECT * FROM zones")}
+
+    def _zone_id(z):
+        return z["Id"].split("/")[-1]
+
+    # tag lookups only for new zones, failed lookups (tags NULL), zones whose record count moved
+    # and rows past the max age
+    def _stale(z):
+        row = known.get(_zone_id(z))
+        return (full or row is None or row["tags"] is None
+                or row["record_count"] != z.get("ResourceRecordSetCount")
+                or now - (row["refreshed_at"] or 0) > TAGS_MAX_AGE)
+
+    stale = {_zone_id(z) for z in zones if _stale(z)}
+    failed = set()
+    tags_by_zone = zone_tags(stale, failed=failed)
+
+    rows = []
+    for z in zones:
+        zid = _zone_id(z)
+        if zid in known and (zid in failed or zid not in stale):
+            rows.append(known[zid])  # keep what we had; a failed lookup is retried next time
+        else:
+            tags = tags_by_zone.get(zid, {})
+            ok = zid not in failed
+            rows.append({
+                "id": zid, "name": z["Name"].rstrip("."), "private": int(bool(z.get("Config", {}).get("PrivateZone"))),
+                "created_by": tags.get("CreatedBy"), "owner": tags.get("Owner"),
+                "record_count": z.get("ResourceRecordSetCount"),
+                "tags": json.dumps(tags, sort_keys=True) if ok else None, "refreshed_at": now,
+            })
+    with _db() as conn:
+        stats = _apply(conn, "zones", "id", rows, known)
+        # re-read but unchanged rows are not rewritten; still restart their max-age clock
+        conn.executemany("UPDATE zones SET refreshed_at = ? WHERE id = ?",
+                         [(now, zid) for zid in tags_by_zone if zid not in failed and zid in known])
+        return stats
+
+
+# ---------- record index (route53 find) ----------
+def _record_rows(zone_id, rr):
+    from route53_records import canonical_name
+
+    name, rtype = canonical_name(rr["Name"]), rr["Type"]
+    base = (zone_id, name, rtype, rr.get("SetIdentifier"), rr.get("TTL"))
+    alias = rr.get("AliasTarget")
+    if alias:
+        target = canonical_name(alias["DNSName"])
+        return [base + (f"ALIAS {target}", target)]
+    rows = []
+    for v in rr.get("ResourceRecords", []):
+        fields = v["Value"].split()
+        pos = _TARGET_FIELD.get(rtype)
+        target = fields[pos] if pos is not None and pos < len(fields) else None
+        if target and rtype not in ("A", "AAAA"):
+            target = canonical_name(target)
+        rows.append(base + (v["Value"], target))
+    return rows
+
+
+def _scan_zone(zone_id):
+    from route53_records import iter_record_sets
+
+    started = time.time()
+    rows = [row for rr in iter_record_sets(zone_id) for row in _record_rows(zone_id, rr)]
+    return started, rows
+
+
+def index_records(full=False, max_age=None):
+    """
+    Bring the record index up to date: list the hosted zones and rescan, in
+    parallel, only those that are new or changed. Returns counts.
+    """
+    r53 = aws_clients.client("route53")
+    max_age = RECORD_INDEX_MAX_AGE if max_age is None else max_age
+    zones = {z["Id"].split("/")[-1]: z for page in r53.get_paginator("list_hosted_zones").paginate()
+             for z in page["HostedZones"]}
+    now = time.time()
+    with _db() as conn:
+        known = {r["zone_id"]: dict(r) for r in conn.execute("SELECT * FROM record_zones")}
+        gone = [zid for zid in known if zid not in zones]
+        conn.executemany("DELETE FROM records WHERE zone_id = ?", [(z,) for z in gone])
+        conn.executemany("DELETE FROM record_zones WHERE zone_id = ?", [(z,) for z in gone])
+
+    def _stale(zid):
+        k = known.get(zid)
+        return (full or k is None or k["record_count"] != zones[zid].get("ResourceRecordSetCount")
+                or (k["dirty_at"] or 0) >= k["indexed_at"] or now - k["indexed_at"] > max_age)
+
+    stale = [zid for zid in zones if _stale(zid)]
+    stats = {"zones": len(zones), "rescanned": 0, "removed": len(gone), "failed": 0}
+    with ThreadPoolExecutor(max_workers=RECORD_INDEX_WORKERS) as pool, _db() as conn:
+        for zid, fut in [(zid, pool.submit(_scan_zone, zid)) for zid in stale]:
+            try:
+                started, rows = fut.result()
+            except (ClientError, BotoCoreError) as e:
+                click.echo(f"route53: {zid}: cannot index zone: {e}", err=True)
+                stats["failed"] += 1
+                continue
+            conn.execute("DELETE FROM records WHERE zone_id = ?", (zid,))
+            conn.executemany("INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            # a write that raced the scan keeps dirty_at >= indexed_at, so the zone is rescanned next time
+            conn.execute("INSERT INTO record_zones (zone_id, zone_name, record_count, indexed_at, dirty_at) "
+                         "VALUES (?, ?, ?, ?, (SELECT dirty_at FROM record_zones WHERE zone_id = ?)) "
+                         "ON CONFLICT(zone_id) DO UPDATE SET zone_name = excluded.zone_name, "
+                         "record_count = excluded.record_count, indexed_at = excluded.indexed_at",
+                         (zid, zones[zid]["Name"], zones[zid].get("ResourceRecordSetCount"), started, zid))
+            conn.commit()
+            stats["rescanned"] += 1
+    return stats
+
+
+def invalidate_zone(zone_id):
+    """Mark a zone's indexed records stale (called after every change batch this CLI submits)."""
+    if not os.path.exists(db_path()):
+        return
+    try:
+        with _db() as conn:
+            conn.execute("UPDATE record_zones SET dirty_at = ? WHERE zone_id = ?", (time.time(), zone_id))
+    except sqlite3.Error:
+        pass  # the index just gets refreshed by its max age instead
+
+
+def query_records(name_glob=None, value=None, rtype=None):
+    """Records matching all given criteria: name glob (case-insensitive), value or target, type."""
+    clauses, params = [], []
+    if name_glob:
+        clauses.append("rtrim(r.name, '.') GLOB ?")
+        params.append(name_glob.lower().rstrip("."))
+    if value:
+        candidates = [value] + ([value.rstrip(".") + "."] if not value.replace(".", "").isdigit() else [])
+        marks = ", ".join("?" * len(candidates))
+        clauses.append(f"(r.value IN ({marks}) OR r.target IN ({marks}))")
+        params.extend(candidates * 2)
+    if rtype:
+        clauses.append("r.type = ?")
+        params.append(rtype.upper())
+    sql = ("SELECT r.*, z.zone_name FROM records r JOIN record_zones z ON z.zone_id = r.zone_id"
+           + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY r.name, r.type, z.zone_name")
+    with _db() as conn:
+        return [dict(r) for r in conn.execute(sql, params)]
+
+
+REFRESHERS = {"ec2": refresh_instances, "s3": refresh_buckets, "route53": refresh_zones}
+
+
+def refresh(only=None, full=False, regions=None):
+    """Refresh the selected services in parallel; returns {service: counts or error string}."""
+    only = [s for s in REFRESHERS if not only or s in only]
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(only) or 1) as pool:
+        futures = {svc: pool.submit(REFRESHERS[svc], full, regions) if svc == "ec2"
+                   else pool.submit(REFRESHERS[svc], full) for svc in only}
+        for svc, fut in futures.items():
+            try:
+                results[svc] = fut.result()
+            except (ClientError, BotoCoreError) as e:
+                results[svc] = str(e)
+    return results
+
+
+# ---------- queries ----------
+def _where(clauses, params, owner=None, name_col="name", name_prefix=None):
+    if owner:
+        clauses.append("owner = ?")
+        params.append(owner)
+    if name_prefix:
+        clauses.append(f"{name_col} LIKE ? ESCAPE '\\'")
+        params.append(name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+
+def _select(table, clauses, params, order):
+    sql = f"SELECT * FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    with _db() as conn:
+        return [dict(r) for r in conn.execute(f"{sql} ORDER BY {order}", params)]
+
+
+def query_instances(owner=None, name_prefix=None, state=None, older_than=None, regions=None):
+    clauses, params = [], []
+    _where(clauses, params, owner, "name", name_prefix)
+    if regions:
+        clauses.append(f"region IN ({', '.join('?' * len(regions))})")
+        params.extend(regions)
+    if state:
+        clauses.append("state = ?")
+        params.append(state)
+    if older_than:
+        clauses.append("launched_at < ?")
+        params.append(time.time() - older_than)
+    return _select("instances", clauses, params, "name, id")
+
+
+def query_buckets(owner=None, name_prefix=None, older_than=None):
+    clauses, params = ["created_by = 'platform-cli'"], []
+    _where(clauses, params, owner, "name", name_prefix)
+    if older_than:
+        clauses.append("created_at < ?")
+        params.append(time.time() - older_than)
+    return _select("buckets", clauses, params, "name")
+
+
+def query_zones(owner=None, name_prefix=None):
+    clauses, params = [], []
+    _where(clauses, params, owner, "name", name_prefix)
+    return _select("zones", clauses, params, "name")
+
+
+# ---------- CLI ----------
+@click.group(name="inventory")
+def inventory_group():
+    """Local inventory of platform-cli resources (for --cached listings)"""
+
+
+@inventory_group.command("refresh")
+@click.option("--only", multiple=True, type=click.Choice(sorted(REFRESHERS)), help="Service to refresh — can repeat")
+@click.option("--full", is_flag=True, help="Re-fetch everything instead of only what changed")
+@region_options
+def refresh_cmd(only, full, all_regions, regions):
+    """Refresh the inventory from AWS (parallel, incremental)"""
+    started = time.monotonic()
+    for svc, res in refresh(only, full, resolve_regions(all_regions, regions)).items():
+        if isinstance(res, str):
+            click.echo(f"{svc}: error: {res}", err=True)
+        else:
+            click.echo(f"{svc}: {res['added']} added, {res['updated']} updated, "
+                       f"{res['removed']} removed, {res['unchanged']} unchanged")
+    click.echo(f"inventory refreshed in {time.monotonic() - started:.1f}s ({db_path()})")
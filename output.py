@@ -0,0 +1,107 @@
+# output.py
+"""
+Row output for list commands: human text (the default), JSON Lines or CSV,
+with optional --fields projection.
+
+Rows are written and flushed one at a time as the caller produces them, so
+`... --output jsonl | jq` sees the first page while later pages are still
+being fetched, and nothing is accumulated in memory.
+"""
+import csv
+import datetime
+import json
+import sys
+
+import click
+
+FORMATS = ("text", "jsonl", "csv")
+
+
+def _parse_fields(value):
+    if not value:
+        return None
+    return [f.strip() for f in value.split(",") if f.strip()]
+
+
+def output_options(f):
+    """Add per-command --output / --fields (falling back to the global cli options)."""
+    f = click.option("--fields", default=None,
+                     help="Comma-separated fields to print (default: the command's usual columns)")(f)
+    f = click.option("--output", "output_format", type=click.Choice(FORMATS), default=None,
+                     help="Output format: text (default), jsonl or csv")(f)
+    return f
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+class Emitter:
+    """
+    Write rows (dicts) in the selected format, keeping only `fields`.
+
+    `text` is an optional row -> str formatter used for text output when no
+    --fields were asked for, so the familiar human format stays unchanged.
+    """
+
+    def __init__(self, output_format=None, fields=None, default_fields=(), available=None, text=None):
+        ctx = click.get_current_context(silent=True)
+        root = (ctx.find_root().obj or {}) if ctx else {}
+        self.format = output_format or root.get("output") or "text"
+        requested = _parse_fields(fields) or _parse_fields(root.get("fields"))
+        if requested and available:
+            unknown = [f for f in requested if f not in available]
+            if unknown:
+                raise click.BadParameter(f"unknown field(s) {', '.join(unknown)}; "
+                                         f"choose from {', '.join(available)}", param_hint="--fields")
+        self.explicit = bool(requested)
+        self.fields = requested or list(default_fields)
+        self.text = None if self.explicit else text
+        self.count = 0
+        self._stream = sys.stdout
+        self._csv = None
+
+    def wants(self, *fields):
+        """True if any of these fields will be printed (to skip work that only feeds them)."""
+        return any(f in self.fields for f in fields)
+
+    def _csv_writer(self):
+        if self._csv is None:
+            self._csv = csv.writer(self._stream, lineterminator="\n")
+            self._csv.writerow(self.fields)
+        return self._csv
+
+    def emit(self, row):
+        self.count += 1
+        if self.format == "jsonl":
+            line = json.dumps({f: _jsonable(row.get(f)) for f in self.fields}, default=str)
+        elif self.format == "csv":
+            self._csv_writer().writerow([_csv_value(row.get(f)) for f in self.fields])
+            self._stream.flush()
+            return
+        elif self.text is not None:
+            line = self.text(row)
+        else:
+            line = "\t".join("-" if row.get(f) in (None, "") else str(_jsonable(row.get(f))) for f in self.fields)
+        self._stream.write(line + "\n")
+        self._stream.flush()
+
+    def finish(self, empty_message=None):
+        """
+        End of rows: CSV always gets its header; the human 'nothing found' note
+        is shown for text output only, so jsonl/csv stay parseable.
+        """
+        if self.format == "csv":
+            self._csv_writer()
+            self._stream.flush()
+        elif self.count == 0 and empty_message and self.format == "text":
+            click.echo(empty_message)
+
+
+def _csv_value(value):
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    value = _jsonable(value)
+    return "" if value is None else value
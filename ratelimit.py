@@ -0,0 +1,167 @@
+# ratelimit.py
+"""
+Client-side rate limiting and throttle accounting for every registry client.
+
+Each (service, region) gets one token bucket shared by all threads, so bulk
+work (cleanup, tag lookups, inventory refresh) stays under the API's
+sustained rate instead of bursting into Throttling / SlowDown errors.
+Retries on top of that use botocore's adaptive mode (see aws_clients).
+
+Throttle responses and the time spent backing off are counted per
+(service, region) and summarized on stderr at exit, to help tune
+--concurrency and the limits below.
+"""
+import atexit
+import os
+import sys
+import threading
+import time
+
+import config
+
+# sustained requests/second per (service, region); 0 = unlimited
+DEFAULT_RATES = {
+    "ec2": 20,
+    "route53": 5,        # account-wide Route53 API limit
+    "s3": 50,            # bucket-level calls (tagging, location, ...); see UNLIMITED_OPERATIONS
+    "ssm": 10,
+    "sts": 10,
+}
+# object (data-plane) operations bypass the limiter: S3 scales them per prefix,
+# far beyond the bucket-level rate, and SlowDown is still retried adaptively
+UNLIMITED_OPERATIONS = {
+    "s3": {
+        "GetObject", "HeadObject", "PutObject", "CopyObject", "DeleteObject", "DeleteObjects",
+        "CreateMultipartUpload", "UploadPart", "UploadPartCopy", "CompleteMultipartUpload",
+        "AbortMultipartUpload", "ListParts", "ListMultipartUploads",
+        "ListObjects", "ListObjectsV2", "ListObjectVersions",
+    },
+}
+# services whose API is global: one bucket regardless of client region
+GLOBAL_SERVICES = {"route53", "iam"}
+
+THROTTLE_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottled",
+    "RequestThrottledException", "TooManyRequestsException", "RequestLimitExceeded",
+    "SlowDown", "PriorRequestNotComplete", "BandwidthLimitExceeded",
+    "ProvisionedThroughputExceededException", "EC2ThrottledException",
+}
+
+_lock = threading.Lock()
+_buckets = {}
+_stats = {}  # (service, region) -> {"calls", "throttles", "errors", "backoff", "waited"}
+_summary_registered = False
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, up to `burst` saved up."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def _key(service, region):
+    return service, "global" if service in GLOBAL_SERVICES else region
+
+
+def rate_for(service, region):
+    """Configured rate: PLATFORM_CLI_RATE_<SERVICE> > [rate_limits] service.region > service > default."""
+    env = os.getenv(f"PLATFORM_CLI_RATE_{service.upper().replace('-', '_')}")
+    if env:
+        return float(env)
+    regional = config.get_number("rate_limits", f"{service}.{region}", default=None)
+    if regional is not None:
+        return regional
+    return config.get_number("rate_limits", service, default=DEFAULT_RATES.get(service, 0))
+
+
+def _bucket(key):
+    if key not in _buckets:
+        with _lock:
+            if key not in _buckets:
+                rate = rate_for(*key)
+                burst = config.get_number("rate_limits", f"{key[0]}.burst", default=None)
+                _buckets[key] = TokenBucket(rate, burst) if rate > 0 else None
+    return _buckets[key]
+
+
+def _record(key, field, amount=1):
+    global _summary_registered
+    with _lock:
+        s = _stats.setdefault(key, {"calls": 0, "throttles": 0, "errors": 0, "backoff": 0.0, "waited": 0.0})
+        s[field] += amount
+        if not _summary_registered:
+            atexit.register(print_summary)
+            _summary_registered = True
+
+
+def instrument(client, service, region):
+    """Attach the shared limiter and throttle counters to a botocore client."""
+    key = _key(service, region)
+    events = client.meta.events
+    unlimited = UNLIMITED_OPERATIONS.get(service, set())
+
+    def _before_send(request=None, event_name="", **kwargs):
+        context = getattr(request, "context", None) or {}
+        throttled_at = context.pop("platform_cli_throttled_at", None)
+        if throttled_at is not None:
+            _record(key, "backoff", time.monotonic() - throttled_at)
+        bucket = _bucket(key)
+        # event_name is "before-send.<service>.<Operation>"
+        if bucket is not None and event_name.rsplit(".", 1)[-1] not in unlimited:
+            waited = bucket.acquire()
+            if waited:
+                _record(key, "waited", waited)
+        _record(key, "calls")
+
+    def _needs_retry(response=None, request_dict=None, caught_exception=None, **kwargs):
+        if response is None and caught_exception is None:
+            return None
+        code = (response[1].get("Error", {}).get("Code") if response else None)
+        if code in THROTTLE_CODES:
+            _record(key, "throttles")
+            if request_dict is not None:
+                request_dict["context"]["platform_cli_throttled_at"] = time.monotonic()
+        elif code or caught_exception is not None or (response and response[0].status_code >= 500):
+            _record(key, "errors")
+        return None  # never decide the retry ourselves; botocore's handler does
+
+    events.register("before-send", _before_send)
+    events.register_first("needs-retry", _needs_retry)
+    return client
+
+
+def stats():
+    with _lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+
+def print_summary(stream=None, always=False):
+    """Per (service, region) throttle/backoff summary on stderr (only if something was throttled)."""
+    rows = sorted(stats().items())
+    if not always and not any(s["throttles"] or s["waited"] >= 1 for _, s in rows):
+        return
+    stream = stream or sys.stderr
+    print("rate limiting summary:", file=stream)
+    for (service, region), s in rows:
+        print(f"  {service}/{region}: {s['calls']} calls, {s['throttles']} throttled, {s['errors']} errors, "
+              f"{s['backoff']:.1f}s backoff, {s['waited']:.1f}s waiting for the limiter", file=stream)
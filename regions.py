@@ -0,0 +1,59 @@
+# regions.py
+"""
+Multi-region helpers: enabled-region discovery (cached) and concurrent
+per-region fan-out using the shared client registry.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import click
+
+import aws_clients
+from cache import TTLCache
+
+REGIONS_CACHE_TTL = int(os.getenv("PLATFORM_CLI_REGIONS_CACHE_TTL", str(24 * 3600)))  # seconds
+_regions_cache = TTLCache("regions", REGIONS_CACHE_TTL)
+
+
+def enabled_regions(refresh=False):
+    """Regions enabled for this account (describe_regions), cached on disk."""
+    regions = None if refresh else _regions_cache.get("ec2")
+    if not regions:
+        resp = aws_clients.client("ec2").describe_regions(AllRegions=False)
+        regions = sorted(r["RegionName"] for r in resp.get("Regions", []))
+        _regions_cache.put("ec2", regions)
+        _regions_cache.flush()
+    return regions
+
+
+def resolve_regions(all_regions=False, regions=None):
+    """Turn --all-regions / --regions a,b into a region list ([default region] if neither)."""
+    if all_regions:
+        return enabled_regions()
+    if regions:
+        if isinstance(regions, str):
+            regions = regions.split(",")
+        return [r.strip() for r in regions if r.strip()]
+    return [aws_clients.default_region()]
+
+
+def fan_out(regions, fn, max_workers=None):
+    """
+    Run fn(region) for every region concurrently and yield (region, result, error)
+    as each region completes, so callers can stream output.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(regions), 32) or 1) as pool:
+        futures = {pool.submit(fn, region): region for region in regions}
+        for fut in as_completed(futures):
+            try:
+                yield futures[fut], fut.result(), None
+            except Exception as e:
+                yield futures[fut], None, e
+
+
+def region_options(f):
+    """Add --all-regions / --regions (resolve them with resolve_regions)."""
+    f = click.option("--regions", default=None,
+                     help="Comma-separated regions to query (e.g. us-east-1,eu-west-1)")(f)
+    f = click.option("--all-regions", is_flag=True, help="Query every enabled region concurrently")(f)
+    return f
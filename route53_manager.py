@@ -1,12 +1,20 @@
 # route53_manager.py
-import os, time, uuid, click, boto3
+import asyncio, itertools, json, os, shutil, sys, tempfile, time, uuid, click
 from botocore.exceptions import ClientError
 
+import aws_clients
+import route53_records
+from output import Emitter, output_options
+from utils import duration_option
+
 # Route53 הוא שירות גלובלי (בלי region); ל-VPC נשתמש ב-region הדיפולטי שלך
-_session = boto3.session.Session()
-_DEFAULT_REGION = _session.region_name or os.getenv("AWS_REGION") or "us-east-1"
-r53 = boto3.client("route53")
-ec2 = boto3.client("ec2", region_name=_DEFAULT_REGION)
+def _r53():
+    return aws_clients.client("route53")
+
+def _ec2():
+    return aws_clients.client("ec2")
+
+_LEFTOVER_SHOWN = 20
 
 def _username():
     return os.getenv("USER") or os.getenv("USERNAME") or "unknown"
@@ -16,7 +24,7 @@ def _strip_zone_id(zid: str) -> str:
 
 def _tag_zone(zone_id: str):
     try:
-        r53.change_tags_for_resource(
+        _r53().change_tags_for_resource(
             ResourceType="hostedzone",
             ResourceId=zone_id,
             AddTags=[
@@ -27,30 +35,110 @@ def _tag_zone(zone_id: str):
     except ClientError:
         pass
 
+_wait_option = click.option("--wait", is_flag=True, help="Block until Route53 reports the change(s) INSYNC")
+
+def _wait(change_infos):
+    if not change_infos:
+        return
+    try:
+        elapsed = route53_records.wait_for_changes(change_infos)
+    except TimeoutError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"propagated: {len(change_infos)} change(s) INSYNC after {elapsed:.1f}s")
+
 @click.group(name="route53")
 def route53_group():
     """Manage Route53 records & zones"""
 
+ZONE_FIELDS = ("name", "id", "visibility", "record_count", "owner", "tags", "comment")
+
+def _zone_text(row):
+    return f"{row['name']}\t{row['id']}\t{row['visibility']}"
+
 @route53_group.command("list-zones")
-def list_zones():
+@click.option("--cached", is_flag=True, help="Answer from the local inventory (see 'inventory refresh')")
+@click.option("--owner", default=None, help="Only zones with this Owner tag")
+@click.option("--name-prefix", default=None, help="Only zones whose name starts with this")
+@output_options
+def list_zones(cached, owner, name_prefix, output_format, fields):
     """List hosted zones"""
+    out = Emitter(output_format, fields, ("name", "id", "visibility"), ZONE_FIELDS, text=_zone_text)
+    if cached:
+        import inventory
+        for row in inventory.query_zones(owner, name_prefix):
+            out.emit({"name": row["name"] + ".", "id": row["id"],
+                      "visibility": "private" if row["private"] else "public",
+                      "record_count": row["record_count"], "owner": row["owner"],
+                      "tags": json.loads(row["tags"] or "{}")})
+        out.finish()
+        return
+    # tags cost an extra call per 10 zones, so they are only fetched when needed
+    with_tags = bool(owner) or out.wants("owner", "tags")
     try:
-        paginator = r53.get_paginator("list_hosted_zones")
+        paginator = _r53().get_paginator("list_hosted_zones")
         for page in paginator.paginate():
-            for z in page.get("HostedZones", []):
-                name = z["Name"]
+            zones = [z for z in page.get("HostedZones", [])
+                     if not name_prefix or z["Name"].startswith(name_prefix)]
+            tags, failed = {}, set()
+            if with_tags:
+                tags = route53_records.zone_tags([_strip_zone_id(z["Id"]) for z in zones], failed=failed)
+            for zone_id in sorted(failed):
+                click.echo(f"warning: cannot read the tags of zone {zone_id}", err=True)
+            for z in zones:
                 zone_id = _strip_zone_id(z["Id"])
-                private = z.get("Config", {}).get("PrivateZone")
-                click.echo(f"{name}\t{zone_id}\t{'private' if private else 'public'}")
+                if owner and tags.get(zone_id, {}).get("Owner") != owner:
+                    continue
+                out.emit({"name": z["Name"], "id": zone_id,
+                          "visibility": "private" if z.get("Config", {}).get("PrivateZone") else "public",
+                          "record_count": z.get("ResourceRecordSetCount"),
+                          "owner": tags.get(zone_id, {}).get("Owner"), "tags": tags.get(zone_id),
+                          "comment": z.get("Config", {}).get("Comment")})
+        out.finish()
     except ClientError as e:
         click.echo(f"error listing zones: {e}", err=True)
 
+FIND_FIELDS = ("name", "type", "value", "ttl", "set_identifier", "zone", "zone_id")
+
+def _find_text(row):
+    ident = f" [{row['set_identifier']}]" if row["set_identifier"] else ""
+    return f"{row['name']}\t{row['type']}{ident}\t{row['value']}\t{row['zone']} ({row['zone_id']})"
+
+@route53_group.command("find")
+@click.option("--name-glob", default=None, help="Record name pattern, e.g. '*.api.*' (case-insensitive)")
+@click.option("--value", default=None, help="Records with this value or pointing at it (IP, CNAME/MX/SRV/alias target)")
+@click.option("--type", "rtype", default=None, help="Only this record type (A, CNAME, ...)")
+@click.option("--cached", is_flag=True, help="Search the local index as it is, without asking Route53")
+@click.option("--refresh", is_flag=True, help="Rescan every zone instead of only changed ones")
+@click.option("--max-age", default=None, callback=duration_option,
+              help="Rescan zones indexed longer ago than this, e.g. 10m (default 1h)")
+@output_options
+def find_records(name_glob, value, rtype, cached, refresh, max_age, output_format, fields):
+    """Search records across all hosted zones (local index, rescans only changed zones)"""
+    import inventory
+    if not (name_glob or value or rtype):
+        raise click.UsageError("pass --name-glob, --value and/or --type")
+    out = Emitter(output_format, fields, FIND_FIELDS[:3] + ("zone",), FIND_FIELDS, text=_find_text)
+    if not cached:
+        started = time.monotonic()
+        try:
+            stats = inventory.index_records(full=refresh, max_age=max_age)
+        except ClientError as e:
+            raise click.ClickException(f"error indexing zones: {e}")
+        if stats["rescanned"] or stats["removed"]:
+            click.echo(f"index: {stats['rescanned']} of {stats['zones']} zone(s) rescanned, "
+                       f"{stats['removed']} removed in {time.monotonic() - started:.1f}s", err=True)
+    for row in inventory.query_records(name_glob, value, rtype):
+        out.emit({"name": row["name"], "type": row["type"], "value": row["value"], "ttl": row["ttl"],
+                  "set_identifier": row["set_identifier"], "zone": row["zone_name"], "zone_id": row["zone_id"]})
+    out.finish("no matching records.")
+
 @route53_group.command("create-zone")
 @click.option("--name", required=True, help="Domain name (e.g. example.com)")
 @click.option("--private", is_flag=True, help="Create a private hosted zone")
 @click.option("--vpc-id", default=None, help="VPC ID for private zone (if omitted, uses default VPC)")
-@click.option("--vpc-region", default=_DEFAULT_REGION, show_default=True, help="VPC region for private zone")
-def create_zone(name, private, vpc_id, vpc_region):
+@click.option("--vpc-region", default=None, help="VPC region for private zone (default: your default region)")
+@_wait_option
+def create_zone(name, private, vpc_id, vpc_region, wait):
     """
     Create a hosted zone (public by default).
     For private zones, requires a VPC (auto-picks default VPC if not provided).
@@ -58,7 +146,7 @@ def create_zone(name, private, vpc_id, vpc_region):
     if private:
         if not vpc_id:
             # נסה לאתר VPC דיפולטי
-            vpcs = ec2.describe_vpcs(Filters=[{"Name": "isDefault", "Values": ["true"]}]).get("Vpcs", [])
+            vpcs = _ec2().describe_vpcs(Filters=[{"Name": "isDefault", "Values": ["true"]}]).get("Vpcs", [])
             if not vpcs:
                 raise click.ClickException("no default VPC found; pass --vpc-id")
             vpc_id = vpcs[0]["VpcId"]
@@ -70,9 +158,9 @@ def create_zone(name, private, vpc_id, vpc_region):
             "HostedZoneConfig": {"Comment": "platform-cli", "PrivateZone": bool(private)},
         }
         if private:
-            kwargs["VPC"] = {"VPCRegion": vpc_region, "VPCId": vpc_id}
+            kwargs["VPC"] = {"VPCRegion": vpc_region or aws_clients.default_region(), "VPCId": vpc_id}
 
-        resp = r53.create_hosted_zone(**kwargs)
+        resp = _r53().create_hosted_zone(**kwargs)
         zone_id = _strip_zone_id(resp["HostedZone"]["Id"])
         _tag_zone(zone_id)
 
@@ -80,12 +168,13 @@ def create_zone(name, private, vpc_id, vpc_region):
 
         if not private:
             # הצג NS לרישום ב-Registrar
-            rrs = r53.list_resource_record_sets(HostedZoneId=zone_id)["ResourceRecordSets"]
-            ns = next((rr for rr in rrs if rr["Type"] == "NS" and rr["Name"].rstrip(".") == name.rstrip(".")), None)
+            ns = route53_records.find_record_set(zone_id, name, "NS")
             if ns:
                 ns_vals = ", ".join(sorted(v["Value"] for v in ns.get("ResourceRecords", [])))
                 click.echo(f"nameservers: {ns_vals}")
             click.echo("Remember: update your domain's registrar to use these Route53 nameservers.")
+        if wait:
+            _wait([resp["ChangeInfo"]])
     except ClientError as e:
         click.echo(f"error creating hosted zone: {e}", err=True)
 
@@ -95,66 +184,167 @@ def create_zone(name, private, vpc_id, vpc_region):
 @click.option("--type", "rtype", required=True, help="A|AAAA|CNAME|TXT|MX|...")
 @click.option("--value", required=True, help="Value (e.g. 1.2.3.4 or target.domain)")
 @click.option("--ttl", default=60, show_default=True, type=int)
-def upsert_record(zone_id, record, rtype, value, ttl):
+@_wait_option
+def upsert_record(zone_id, record, rtype, value, ttl, wait):
     """Create/Update (UPSERT) a DNS record"""
+    import api
     try:
-        r53.change_resource_record_sets(
-            HostedZoneId=zone_id,
-            ChangeBatch={
-                "Comment": "platform-cli",
-                "Changes": [{
-                    "Action": "UPSERT",
-                    "ResourceRecordSet": {
-                        "Name": record.rstrip("."),
-                        "Type": rtype,
-                        "TTL": ttl,
-                        "ResourceRecords": [{"Value": value}],
-                    }
-                }]
-            }
-        )
+        result = asyncio.run(api.upsert_records(zone_id, [{
+            "Name": record.rstrip("."),
+            "Type": rtype,
+            "TTL": ttl,
+            "ResourceRecords": [{"Value": value}],
+        }], wait=wait))
         click.echo("record upserted")
+        if wait:
+            click.echo(f"propagated: change INSYNC after {result['waited']:.1f}s")
+    except TimeoutError as e:
+        raise click.ClickException(str(e))
     except ClientError as e:
         click.echo(f"error upserting record: {e}", err=True)
 
+@route53_group.command("sync")
+@click.option("--zone-id", required=True, help="HostedZoneId (Z...)")
+@click.option("--file", "spec_file", required=True, type=click.Path(exists=True, dir_okay=False),
+              help="Desired record sets (YAML or JSON)")
+@click.option("--dry-run", is_flag=True, help="Show the diff without changing anything")
+@click.option("--no-delete", is_flag=True, help="Keep records that exist in the zone but not in the file")
+@_wait_option
+def sync_records(zone_id, spec_file, dry_run, no_delete, wait):
+    """Make the zone match a records file, sending only the diff"""
+    zone_id = _strip_zone_id(zone_id)
+    try:
+        zone_name = _r53().get_hosted_zone(Id=zone_id)["HostedZone"]["Name"]
+        counts = {}
+        try:
+            desired = route53_records.load_record_spec(spec_file, zone_name, counts)
+        except (ValueError, KeyError, TypeError) as e:
+            raise click.ClickException(f"invalid records file: {e}")
+        if counts["skipped"]:
+            click.echo(f"{counts['skipped']} apex SOA/NS record set(s) in the file skipped (managed by Route53)")
+        changes = route53_records.diff_record_sets(
+            desired, route53_records.iter_non_default_records(zone_id), delete=not no_delete)
+        if not changes:
+            click.echo("zone is in sync; nothing to change")
+            return
+        for change in changes:
+            click.echo(route53_records.describe_change(change))
+        counts = {a: sum(1 for c in changes if c["Action"] == a) for a in ("CREATE", "UPSERT", "DELETE")}
+        summary = f"{counts['CREATE']} to create, {counts['UPSERT']} to update, {counts['DELETE']} to delete"
+        if dry_run:
+            click.echo(f"dry run: {summary}")
+            return
+        infos = route53_records.submit_changes(zone_id, changes)
+        click.echo(f"synced: {summary} in {len(infos)} change batch(es)")
+        if wait:
+            _wait(infos)
+    except ClientError as e:
+        click.echo(f"error syncing records: {e}", err=True)
+
+@route53_group.command("export")
+@click.option("--zone-id", required=True, help="HostedZoneId (Z...)")
+def export_zone(zone_id):
+    """Write the zone as a BIND zone file to stdout"""
+    import route53_zonefile
+    zone_id = _strip_zone_id(zone_id)
+    counts = {}
+    out = sys.stdout
+    try:
+        zone_name = _r53().get_hosted_zone(Id=zone_id)["HostedZone"]["Name"]
+        for line in route53_zonefile.iter_export(zone_id, zone_name, counts):
+            out.write(line + "\n")
+    except ClientError as e:
+        raise click.ClickException(f"error exporting zone: {e}")
+    out.flush()
+    note = f", {counts['skipped']} alias/routing-policy record set(s) written as comments" if counts["skipped"] else ""
+    click.echo(f"exported {counts['record_sets']} record set(s) ({counts['records']} records){note}", err=True)
+
+@route53_group.command("import")
+@click.option("--zone-id", required=True, help="HostedZoneId (Z...)")
+@click.argument("zone_file", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option("--dry-run", is_flag=True, help="Parse and count only; change nothing")
+@click.option("--create-only", is_flag=True,
+              help="Use CREATE instead of UPSERT (fails on existing records; twice as many per batch)")
+@_wait_option
+def import_zone(zone_id, zone_file, dry_run, create_only, wait):
+    """Load records from a BIND zone file (streamed, in packed change batches)"""
+    import route53_zonefile
+    zone_id = _strip_zone_id(zone_id)
+    action = "CREATE" if create_only else "UPSERT"
+
+    spooled = None
+    if zone_file == "-":
+        # stdin can be read only once: spool it to disk so it gets the validation pass too
+        spooled = tempfile.TemporaryFile("w+", encoding="utf-8")
+        with click.open_file("-", encoding="utf-8") as stdin:
+            shutil.copyfileobj(stdin, spooled)
+
+    def _record_sets(counts):
+        if spooled is not None:
+            spooled.seek(0)
+            yield from route53_zonefile.iter_import_record_sets(spooled, zone_name, counts)
+            return
+        with click.open_file(zone_file, encoding="utf-8") as f:
+            yield from route53_zonefile.iter_import_record_sets(f, zone_name, counts)
+
+    try:
+        zone_name = _r53().get_hosted_zone(Id=zone_id)["HostedZone"]["Name"]
+        counts = {}
+        try:
+            # validate the whole file first so a syntax error can't leave a half-imported zone
+            batches = sum(1 for _ in route53_records.pack_change_batches(
+                {"Action": action, "ResourceRecordSet": rr} for rr in _record_sets(counts)))
+            summary = (f"{counts['record_sets']} record set(s), {counts['records']} records, "
+                       f"{batches} change batch(es); {counts['skipped']} apex SOA/NS skipped")
+            if dry_run:
+                click.echo(f"dry run: {summary}")
+                return
+            started = time.monotonic()
+            infos = route53_records.submit_changes(
+                zone_id, ({"Action": action, "ResourceRecordSet": rr} for rr in _record_sets(counts)))
+        except ValueError as e:
+            raise click.ClickException(f"invalid zone file: {e}")
+        click.echo(f"imported {counts['record_sets']} record set(s) ({counts['records']} records) "
+                   f"in {len(infos)} change batch(es), {time.monotonic() - started:.1f}s")
+        if wait:
+            # batches in one zone apply in order: the last one covers the others
+            _wait(infos[-1:])
+    except ClientError as e:
+        raise click.ClickException(f"error importing zone: {e}")
+    finally:
+        if spooled is not None:
+            spooled.close()
+
 @route53_group.command("delete-zone")
 @click.option("--zone-id", required=True, help="HostedZoneId (Z...)")
 @click.option("--force", is_flag=True, help="Delete all non NS/SOA records first")
-def delete_zone(zone_id, force):
+@_wait_option
+def delete_zone(zone_id, force, wait):
     """Delete a hosted zone (optionally purge records first)"""
     zone_id = _strip_zone_id(zone_id)
     try:
-        if force:
-            _purge_non_default_records(zone_id)
+        purged = _purge_non_default_records(zone_id) if force else []
         # וודא שלא נשארו רשומות שאינן NS/SOA
-        leftover = _list_non_default_records(zone_id)
+        leftover = _list_non_default_records(zone_id, limit=_LEFTOVER_SHOWN + 1)
         if leftover:
             click.echo("zone still has non-default records; use --force or delete them first:", err=True)
-            for rr in leftover:
+            for rr in leftover[:_LEFTOVER_SHOWN]:
                 click.echo(f" - {rr['Name']} {rr['Type']}")
+            if len(leftover) > _LEFTOVER_SHOWN:
+                click.echo(" - ...")
             raise SystemExit(2)
-        r53.delete_hosted_zone(Id=zone_id)
+        resp = _r53().delete_hosted_zone(Id=zone_id)
         click.echo("hosted zone deleted")
+        if wait:
+            # change batches in one zone apply in order - the last purge batch covers the others
+            _wait(purged[-1:] + [resp["ChangeInfo"]])
     except ClientError as e:
         click.echo(f"error deleting hosted zone: {e}", err=True)
 
-def _list_non_default_records(zone_id):
-    rrs = r53.list_resource_record_sets(HostedZoneId=zone_id)["ResourceRecordSets"]
-    return [rr for rr in rrs if rr["Type"] not in ("NS", "SOA")]
+def _list_non_default_records(zone_id, limit=None):
+    return list(itertools.islice(route53_records.iter_non_default_records(zone_id), limit))
 
 def _purge_non_default_records(zone_id):
-    # מחיקה בקבוצות של עד 100 שינויים
-    batch = []
-    for rr in _list_non_default_records(zone_id):
-        change = {"Action": "DELETE", "ResourceRecordSet": {"Name": rr["Name"], "Type": rr["Type"]}}
-        if "AliasTarget" in rr:
-            change["ResourceRecordSet"]["AliasTarget"] = rr["AliasTarget"]
-        else:
-            change["ResourceRecordSet"]["TTL"] = rr["TTL"]
-            change["ResourceRecordSet"]["ResourceRecords"] = rr["ResourceRecords"]
-        batch.append(change)
-        if len(batch) == 90:  # שוליים לבטיחות
-            r53.change_resource_record_sets(HostedZoneId=zone_id, ChangeBatch={"Changes": batch})
-            batch = []
-    if batch:
-        r53.change_resource_record_sets(HostedZoneId=zone_id, ChangeBatch={"Changes": batch})
+    # זרם רשומות -> מנות מלאות עד מגבלות Route53 (1,000 רשומות / 32,000 תווים)
+    changes = (route53_records.delete_change(rr) for rr in route53_records.iter_non_default_records(zone_id))
+    return route53_records.submit_changes(zone_id, changes)
@@ -0,0 +1,318 @@
+# route53_records.py
+"""
+Route53 record-set helpers shared by route53_manager and cleanup.
+
+Record sets are always read through the paginator as a stream, and writes
+are packed into as few change batches as Route53's limits allow.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+
+# Route53 per-request limits (UPSERT counts twice towards both)
+MAX_BATCH_RECORDS = 1000        # ResourceRecord elements
+MAX_BATCH_VALUE_CHARS = 32000   # characters across all Value elements
+
+MAX_TAG_RESOURCES = 10          # zone IDs per list_tags_for_resources call
+ZONE_TAG_WORKERS = 8
+
+# get_change polling: start fast, back off while changes are still PENDING
+WAIT_INITIAL_DELAY = 1.0
+WAIT_MAX_DELAY = 15.0
+WAIT_BACKOFF = 1.6
+
+
+def _r53():
+    return aws_clients.client("route53")
+
+
+def iter_record_sets(zone_id, start_name=None, start_type=None):
+    """Yield every record set in the zone, one paginated page at a time."""
+    kwargs = {"HostedZoneId": zone_id}
+    if start_name:
+        kwargs["StartRecordName"] = start_name
+        if start_type:
+            kwargs["StartRecordType"] = start_type
+    for page in _r53().get_paginator("list_resource_record_sets").paginate(**kwargs):
+        yield from page.get("ResourceRecordSets", [])
+
+
+def iter_non_default_records(zone_id):
+    """Yield record sets except the zone apex SOA/NS that Route53 manages itself."""
+    apex = None
+    for rr in iter_record_sets(zone_id):
+        if rr["Type"] == "SOA":
+            apex = rr["Name"]
+            continue
+        # the apex name sorts first, but its types are listed alphabetically, so the apex NS comes
+        # before its SOA: an NS seen before the SOA can only be the apex's. Keep `apex is None` or
+        # the apex NS would be yielded (and deleted by purge/sync).
+        if rr["Type"] == "NS" and (apex is None or rr["Name"] == apex):
+            continue
+        yield rr
+
+
+def find_record_set(zone_id, name, rtype):
+    name = name.rstrip(".") + "."
+    for rr in iter_record_sets(zone_id, start_name=name, start_type=rtype):
+        if rr["Name"] == name and rr["Type"] == rtype:
+            return rr
+        if rr["Name"] != name:
+            return None
+    return None
+
+
+def _tag_chunk(ids, failed):
+    try:
+        res = _r53().list_tags_for_resources(ResourceType="hostedzone", ResourceIds=ids)
+    except ClientError:
+        # one deleted (or forbidden) zone fails the whole call, so retry zone by zone
+        if len(ids) > 1:
+            return {zid: tags for one in ids for zid, tags in _tag_chunk([one], failed).items()}
+        failed.add(ids[0])
+        return {}
+    return {ts["ResourceId"]: {t["Key"]: t["Value"] for t in ts.get("Tags", [])}
+            for ts in res.get("ResourceTagSets", [])}
+
+
+def zone_tags(zone_ids, failed=None):
+    """
+    {zone_id: tags} for the hosted zones, 10 IDs per call, in parallel.
+    Zones whose tags could not be read are left out and added to `failed`.
+    """
+    failed = set() if failed is None else failed
+    ids = list(zone_ids)
+    chunks = [ids[i:i + MAX_TAG_RESOURCES] for i in range(0, len(ids), MAX_TAG_RESOURCES)]
+    tags = {}
+    with ThreadPoolExecutor(max_workers=ZONE_TAG_WORKERS) as pool:
+        for part in pool.map(lambda chunk: _tag_chunk(chunk, failed), chunks):
+            tags.update(part)
+    return tags
+
+
+def delete_change(rr):
+    # DELETE must match the existing record set exactly (incl. routing policy fields)
+    return {"Action": "DELETE", "ResourceRecordSet": rr}
+
+
+def _change_cost(change):
+    rrset = change["ResourceRecordSet"]
+    values = rrset.get("ResourceRecords") or []
+    mult = 2 if change["Action"] == "UPSERT" else 1
+    return (len(values) or 1) * mult, sum(len(v["Value"]) for v in values) * mult
+
+
+def pack_change_batches(changes):
+    """Group a stream of changes into the fewest batches within Route53's request limits."""
+    batch, records, chars = [], 0, 0
+    for change in changes:
+        c_records, c_chars = _change_cost(change)
+        if batch and (records + c_records > MAX_BATCH_RECORDS or chars + c_chars > MAX_BATCH_VALUE_CHARS):
+            yield batch
+            batch, records, chars = [], 0, 0
+        batch.append(change)
+        records += c_records
+        chars += c_chars
+    if batch:
+        yield batch
+
+
+def submit_changes(zone_id, changes, comment="platform-cli"):
+    """
+    Submit changes (any iterable, consumed lazily) in packed batches, one after
+    another since Route53 serializes changes per zone. Returns the ChangeInfo dicts.
+    """
+    import inventory
+
+    infos = []
+    try:
+        for batch in pack_change_batches(changes):
+            resp = _r53().change_resource_record_sets(
+                HostedZoneId=zone_id, ChangeBatch={"Comment": comment, "Changes": batch})
+            infos.append(resp["ChangeInfo"])
+    finally:
+        if infos:
+            inventory.invalidate_zone(zone_id)  # `route53 find` rescans this zone next time
+    return infos
+
+
+def pending_change_ids(change_infos):
+    """Bare IDs of the changes not yet INSYNC (ChangeInfo dicts or change IDs)."""
+    pending = set()
+    for info in change_infos:
+        if isinstance(info, dict):
+            if info.get("Status") == "INSYNC":
+                continue
+            info = info["Id"]
+        pending.add(info.split("/")[-1])
+    return pending
+
+
+def change_status(cid):
+    return cid, _r53().get_change(Id=cid)["ChangeInfo"]["Status"]
+
+
+def wait_for_changes(change_infos, timeout=900):
+    """
+    Block until every change is INSYNC, polling get_change with adaptive
+    backoff (all pending IDs are polled together each round). Accepts
+    ChangeInfo dicts or change IDs; returns the seconds spent waiting.
+    """
+    pending = pending_change_ids(change_infos)
+    started = time.monotonic()
+    delay = WAIT_INITIAL_DELAY
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        while pending:
+            for cid, status in pool.map(change_status, list(pending)):
+                if status == "INSYNC":
+                    pending.discard(cid)
+            if not pending:
+                break
+            if time.monotonic() - started + delay > timeout:
+                raise TimeoutError(f"{len(pending)} Route53 change(s) still PENDING after {timeout}s")
+            time.sleep(delay)
+            delay = min(delay * WAIT_BACKOFF, WAIT_MAX_DELAY)
+    return time.monotonic() - started
+
+
+# ---------- declarative sync ----------
+_SPEC_FIELDS = {
+    "set_identifier": "SetIdentifier",
+    "weight": "Weight",
+    "region": "Region",
+    "failover": "Failover",
+    "geo_location": "GeoLocation",
+    "multi_value_answer": "MultiValueAnswer",
+    "health_check_id": "HealthCheckId",
+}
+# fields that take part in the CREATE/UPSERT comparison besides TTL/values/alias
+_COMPARED_FIELDS = ("SetIdentifier", "Weight", "Region", "Failover", "GeoLocation",
+                    "MultiValueAnswer", "HealthCheckId")
+
+
+def canonical_name(name):
+    # Route53 returns '*' (and other specials) as octal escapes, e.g. \052
+    return name.replace("\\052", "*").lower().rstrip(".") + "."
+
+
+def record_key(rr):
+    return canonical_name(rr["Name"]), rr["Type"].upper(), rr.get("SetIdentifier")
+
+
+def _comparable(rr):
+    alias = rr.get("AliasTarget")
+    if alias:
+        alias = (alias["HostedZoneId"], canonical_name(alias["DNSName"]), bool(alias.get("EvaluateTargetHealth")))
+    values = tuple(sorted(v["Value"] for v in rr.get("ResourceRecords") or []))
+    extra = tuple(repr(rr.get(f)) for f in _COMPARED_FIELDS)
+    return rr.get("TTL"), values, alias, extra
+
+
+def _absolute(name, zone_name):
+    name = str(name)
+    if name in ("@", ""):
+        return zone_name
+    if name.endswith("."):
+        return name
+    zone = zone_name.rstrip(".")
+    if name == zone or name.endswith("." + zone):
+        return name + "."
+    return f"{name}.{zone}."
+
+
+def spec_to_record_set(item, zone_name):
+    """Convert one spec entry (snake_case or native Route53 keys) to a ResourceRecordSet."""
+    if "Name" in item:
+        rr = dict(item)
+        rr["Name"] = _absolute(rr["Name"], zone_name)
+        if not rr.get("ResourceRecords") and not rr.get("AliasTarget"):
+            raise ValueError(f"{rr['Name']} {rr.get('Type')}: needs ResourceRecords or AliasTarget")
+        return rr
+    rr = {"Name": _absolute(item["name"], zone_name), "Type": str(item["type"]).upper()}
+    for key, field in _SPEC_FIELDS.items():
+        if key in item:
+            rr[field] = item[key]
+    alias = item.get("alias")
+    if alias:
+        rr["AliasTarget"] = {
+            "HostedZoneId": alias["hosted_zone_id"],
+            "DNSName": alias["dns_name"],
+            "EvaluateTargetHealth": bool(alias.get("evaluate_target_health", False)),
+        }
+    else:
+        values = item.get("values", item.get("value"))
+        if not isinstance(values, list):
+            values = [values]
+        if not values or any(v is None for v in values):
+            raise ValueError(f"{rr['Name']} {rr['Type']}: needs value/values or alias")
+        rr["TTL"] = int(item.get("ttl", 300))
+        rr["ResourceRecords"] = [{"Value": str(v)} for v in values]
+    return rr
+
+
+def load_record_spec(path, zone_name, counts=None):
+    """
+    Read desired record sets from a YAML or JSON file ({records: [...]} or a bare list).
+    The apex SOA/NS belong to Route53 and are left out (counted in counts["skipped"]).
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            import json
+            data = json.load(f)
+        else:
+            import yaml  # optional dependency, only needed for YAML specs
+            data = yaml.safe_load(f)
+    items = data.get("records", []) if isinstance(data, dict) else (data or [])
+    apex = canonical_name(zone_name)
+    counts = {} if counts is None else counts
+    counts["skipped"] = 0
+    desired = {}
+    for item in items:
+        rr = spec_to_record_set(item, zone_name)
+        key = record_key(rr)
+        # never in `current` (iter_non_default_records), so they would turn into a CREATE Route53 rejects
+        if key[1] == "SOA" or (key[1] == "NS" and key[0] == apex):
+            counts["skipped"] += 1
+            continue
+        if key in desired:
+            raise ValueError(f"duplicate record in {path}: {key[0]} {key[1]}")
+        desired[key] = rr
+    return desired
+
+
+def diff_record_sets(desired, current, delete=True):
+    """
+    Return the minimal change list turning `current` (an iterable of listed
+    record sets, apex NS/SOA excluded) into `desired` (dict key -> record set).
+    DELETEs come first so a name can switch type (e.g. A -> CNAME).
+    """
+    deletes, creates, upserts = [], [], []
+    seen = set()
+    for rr in current:
+        key = record_key(rr)
+        want = desired.get(key)
+        if want is None:
+            if delete:
+                deletes.append(delete_change(rr))
+            continue
+        seen.add(key)
+        if _comparable(want) != _comparable(rr):
+            upserts.append({"Action": "UPSERT", "ResourceRecordSet": want})
+    for key, rr in desired.items():
+        if key not in seen:
+            creates.append({"Action": "CREATE", "ResourceRecordSet": rr})
+    return deletes + creates + upserts
+
+
+def describe_change(change):
+    rr = change["ResourceRecordSet"]
+    sign = {"CREATE": "+", "UPSERT": "~", "DELETE": "-"}[change["Action"]]
+    ident = f" [{rr['SetIdentifier']}]" if rr.get("SetIdentifier") else ""
+    if rr.get("AliasTarget"):
+        target = f"ALIAS {rr['AliasTarget']['DNSName']}"
+    else:
+        target = f"{rr.get('TTL')} " + " ".join(v["Value"] for v in rr.get("ResourceRecords", []))
+    return f"{sign} {change['Action']:<6} {rr['Name']} {rr['Type']}{ident} {target}"
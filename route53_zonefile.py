@@ -0,0 +1,244 @@
+# route53_zonefile.py
+"""
+BIND (RFC 1035) zone files for `route53 export` / `route53 import`.
+
+Both directions stream: export writes each page of record sets as it is
+listed, import parses the file line by line and hands record sets to
+route53_records.submit_changes, which packs them into full change batches.
+Only the record set being assembled is held in memory (plus the set of
+names already sent, to catch a name/type split across the file).
+
+Zone files cannot express alias or routing-policy records (weighted,
+latency, failover, ...): export writes them as comments, and the apex
+SOA/NS that Route53 manages itself are not imported.
+"""
+import re
+
+from route53_records import canonical_name, iter_record_sets
+
+SUPPORTED_TYPES = {"A", "AAAA", "CAA", "CNAME", "DS", "HTTPS", "MX", "NAPTR", "NS", "PTR", "SOA", "SPF",
+                   "SRV", "SSHFP", "SVCB", "TLSA", "TXT"}
+# rdata field holding a domain name (relative names are completed with $ORIGIN)
+_NAME_FIELD = {"CNAME": 0, "NS": 0, "PTR": 0, "MX": 1, "SRV": 3}
+_CLASSES = {"IN", "CH", "HS", "CS"}
+_TTL_RE = re.compile(r"^(\d+|(\d+[wdhms])+)$", re.IGNORECASE)
+_TTL_UNITS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1}
+_SAFE_NAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_*.")
+
+
+# ---------- names: Route53 uses \ooo (octal) escapes, zone files \DDD (decimal) ----------
+def _from_r53_name(name):
+    def _char(m):
+        c = chr(int(m.group(1), 8))
+        return c if c in _SAFE_NAME_CHARS else f"\\{ord(c):03d}"
+    return re.sub(r"\\([0-7]{3})", _char, name)
+
+
+def _to_r53_name(name):
+    name = re.sub(r"\\(\d{3})", lambda m: chr(int(m.group(1))), name)
+    name = re.sub(r"\\(.)", r"\1", name)
+    return "".join(c if c in _SAFE_NAME_CHARS else f"\\{ord(c):03o}" for c in name)
+
+
+def _relative(name, origin):
+    name = _from_r53_name(name)
+    if name.lower() == origin.lower():
+        return "@"
+    if name.lower().endswith("." + origin.lower()):
+        return name[:-len(origin) - 1]
+    return name
+
+
+# ---------- export ----------
+def _comment(rr, origin, why):
+    if rr.get("AliasTarget"):
+        target = f"ALIAS {rr['AliasTarget']['DNSName']} (zone {rr['AliasTarget']['HostedZoneId']})"
+    else:
+        target = " ".join(v["Value"] for v in rr.get("ResourceRecords", []))
+    return f"; {why}: {_relative(rr['Name'], origin)} {rr['Type']} {target}"
+
+
+def _zone_file_value(rtype, value):
+    """Route53 keeps targets as stored (`upsert --value host.example.net`): make them absolute."""
+    pos = _NAME_FIELD.get(rtype)
+    if pos is None:
+        return value
+    fields = value.split()
+    if pos < len(fields) and not (fields[pos].endswith(".") and not fields[pos].endswith("\\.")):
+        fields[pos] += "."
+    return " ".join(fields)
+
+
+def zone_file_lines(rr, origin):
+    """Zone file lines for one record set (a comment if it has no zone file form)."""
+    if rr.get("AliasTarget"):
+        return [_comment(rr, origin, "alias record, not representable")], False
+    if rr.get("SetIdentifier"):
+        return [_comment(rr, origin, f"routing policy record [{rr['SetIdentifier']}], not representable")], False
+    owner = _relative(rr["Name"], origin)
+    return [f"{owner}\t{rr['TTL']}\tIN\t{rr['Type']}\t{_zone_file_value(rr['Type'], v['Value'])}"
+            for v in rr.get("ResourceRecords", [])], True
+
+
+def iter_export(zone_id, zone_name, counts=None):
+    """Yield the zone file for zone_id line by line; counts gets record_sets/records/skipped."""
+    counts = counts if counts is not None else {}
+    counts.update(record_sets=0, records=0, skipped=0)
+    yield f"; zone {zone_name} ({zone_id}) exported from Route53 by platform-cli"
+    yield f"$ORIGIN {zone_name}"
+    for rr in iter_record_sets(zone_id):
+        lines, ok = zone_file_lines(rr, zone_name)
+        if ok:
+            counts["record_sets"] += 1
+            counts["records"] += len(lines)
+        else:
+            counts["skipped"] += 1
+        yield from lines
+
+
+# ---------- import ----------
+def _lex(line, lineno):
+    """Split one physical line into tokens (quoted strings kept whole); returns (tokens, paren depth delta)."""
+    tokens, depth, i, n = [], 0, 0, len(line)
+    while i < n:
+        c = line[i]
+        if c in " \t\r\n":
+            i += 1
+        elif c == ";":
+            break
+        elif c in "()":
+            depth += 1 if c == "(" else -1
+            i += 1
+        elif c == '"':
+            j = i + 1
+            while j < n and line[j] != '"':
+                j += 2 if line[j] == "\\" else 1
+            if j >= n:
+                raise ValueError(f"line {lineno}: unterminated quoted string")
+            tokens.append(line[i:j + 1])
+            i = j + 1
+        else:
+            j = i
+            while j < n and line[j] not in ' \t\r\n;()"':
+                j += 2 if line[j] == "\\" else 1
+            tokens.append(line[i:j])
+            i = j
+    return tokens, depth
+
+
+def _logical_lines(lines):
+    """Yield (lineno, tokens, starts_blank), joining parenthesized multi-line records."""
+    pending = None
+    for lineno, raw in enumerate(lines, 1):
+        tokens, delta = _lex(raw, lineno)
+        if pending is not None:
+            pending[1].extend(tokens)
+            pending[3] += delta
+            if pending[3] <= 0:
+                yield pending[0], pending[1], pending[2]
+                pending = None
+        elif delta > 0:
+            pending = [lineno, tokens, raw[:1] in " \t", delta]
+        elif tokens:
+            yield lineno, tokens, raw[:1] in " \t"
+    if pending is not None:
+        raise ValueError(f"line {pending[0]}: unbalanced parentheses")
+
+
+def _ttl(token):
+    if token.isdigit():
+        return int(token)
+    return sum(int(n) * _TTL_UNITS[u.lower()] for n, u in re.findall(r"(\d+)([wdhmsWDHMS])", token))
+
+
+def _absolute(name, origin):
+    if name == "@":
+        return origin
+    return name if name.endswith(".") and not name.endswith("\\.") else f"{name}.{origin}"
+
+
+def _rdata(rtype, fields, origin):
+    fields = list(fields)
+    if rtype in ("TXT", "SPF"):
+        return " ".join(f if f.startswith('"') else f'"{f}"' for f in fields)
+    pos = _NAME_FIELD.get(rtype)
+    if pos is not None and pos < len(fields):
+        fields[pos] = _absolute(fields[pos], origin)
+    return " ".join(fields)
+
+
+def iter_zone_records(lines, origin):
+    """Yield (lineno, name, ttl, type, value) for every record of a zone file."""
+    default_ttl = last_ttl = last_name = None
+    for lineno, tokens, blank in _logical_lines(lines):
+        if tokens[0].startswith("$"):
+            directive = tokens[0].upper()
+            if directive == "$ORIGIN" and len(tokens) > 1:
+                origin = _absolute(tokens[1], origin)
+            elif directive == "$TTL" and len(tokens) > 1 and _TTL_RE.match(tokens[1]):
+                default_ttl = _ttl(tokens[1])
+            else:
+                raise ValueError(f"line {lineno}: unsupported directive {tokens[0]}")
+            continue
+        if blank:
+            if last_name is None:
+                raise ValueError(f"line {lineno}: record without an owner name")
+            name = last_name
+        else:
+            name = _absolute(tokens.pop(0), origin)
+        ttl = None
+        while tokens and (_TTL_RE.match(tokens[0]) or tokens[0].upper() in _CLASSES):
+            token = tokens.pop(0)
+            if token.upper() in _CLASSES:
+                if token.upper() != "IN":
+                    raise ValueError(f"line {lineno}: only class IN is supported, not {token}")
+            else:
+                ttl = _ttl(token)
+        if not tokens:
+            raise ValueError(f"line {lineno}: missing record type")
+        rtype = tokens.pop(0).upper()
+        if rtype not in SUPPORTED_TYPES:
+            raise ValueError(f"line {lineno}: record type {rtype} is not supported by Route53")
+        if not tokens:
+            raise ValueError(f"line {lineno}: {rtype} record without data")
+        ttl = ttl if ttl is not None else default_ttl if default_ttl is not None else last_ttl
+        if ttl is None:
+            raise ValueError(f"line {lineno}: no TTL (add one or a $TTL directive)")
+        last_name, last_ttl = name, ttl
+        yield lineno, name, ttl, rtype, _rdata(rtype, tokens, origin)
+
+
+def iter_import_record_sets(lines, zone_name, counts=None):
+    """
+    Group a zone file's records into Route53 record sets (consecutive lines
+    with the same name and type). Apex SOA/NS are skipped; counts gets
+    records/record_sets/skipped.
+    """
+    counts = counts if counts is not None else {}
+    counts.update(records=0, record_sets=0, skipped=0)
+    apex = canonical_name(zone_name)
+    sent = set()
+    current, current_key = None, None
+    for lineno, name, ttl, rtype, value in iter_zone_records(lines, zone_name):
+        key = (canonical_name(name), rtype)
+        if key[0] != apex and not key[0].endswith("." + apex):
+            raise ValueError(f"line {lineno}: {name} is outside the zone {zone_name}")
+        if rtype == "SOA" or (rtype == "NS" and key[0] == apex):
+            counts["skipped"] += 1  # managed by Route53
+            continue
+        counts["records"] += 1
+        if key == current_key:
+            current["TTL"] = min(current["TTL"], ttl)
+            current["ResourceRecords"].append({"Value": value})
+            continue
+        if key in sent:
+            raise ValueError(f"line {lineno}: more {rtype} records for {name} after other records; "
+                             f"keep each name/type together (e.g. sort the file)")
+        if current is not None:
+            yield current
+        sent.add(key)
+        counts["record_sets"] += 1
+        current, current_key = {"Name": _to_r53_name(name), "Type": rtype, "TTL": ttl,
+                                "ResourceRecords": [{"Value": value}]}, key
+    if current is not None:
+        yield current
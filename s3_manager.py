@@ -1,15 +1,27 @@
 # s3_manager.py
-import os, json
-import boto3
-from botocore.exceptions import ClientError
+import asyncio, datetime, os, json, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.exceptions import BotoCoreError, ClientError
 import click
 
-# ---- session/region ----
-_session = boto3.session.Session()
-_region = _session.region_name or os.getenv("AWS_REGION") or "us-east-1"
+import aws_clients
+import s3_multipart
+import s3_stats
+import s3_sync
+from cache import TTLCache
+from output import Emitter, output_options
+from utils import duration_option
 
-s3 = boto3.client("s3", region_name=_region)
-s3_resource = boto3.resource("s3", region_name=_region)
+# ---- clients (created lazily from the shared registry) ----
+def _s3():
+    return aws_clients.client("s3")
+
+# ---- bucket tag cache ----
+TAG_CACHE_TTL = int(os.getenv("PLATFORM_CLI_TAG_CACHE_TTL", "300"))  # seconds
+TAG_WORKERS = int(os.getenv("PLATFORM_CLI_TAG_WORKERS", "16"))
+# errors that mean "this bucket has no usable tags" - cached as a negative entry
+_NEGATIVE_TAG_ERRORS = {"NoSuchTagSet", "AccessDenied", "NoSuchBucket", "AllAccessDisabled"}
+_tag_cache = TTLCache("bucket-tags", TAG_CACHE_TTL)
 
 # ========== Core Logic (כפי שהיה, עם תיקונים קטנים) ==========
 def handle_s3(action, params):
@@ -42,39 +54,47 @@ def create_bucket(params):
             return
 
     try:
-        # region handling: ל-us-east-1 אין CreateBucketConfiguration
-        kwargs = dict(Bucket=bucket_name)
-        if _region != "us-east-1":
-            kwargs["CreateBucketConfiguration"] = {"LocationConstraint": _region}
-
-        s3.create_bucket(**kwargs)
-
-        # tags
-        tagging = s3_resource.BucketTagging(bucket_name)
-        tagging.put(Tagging={"TagSet": [
-            {"Key": "CreatedBy", "Value": "platform-cli"},
-            {"Key": "Owner", "Value": username}
-        ]})
-
-        # public policy (optional)
-        if visibility == "public":
-            policy = {
-                "Version": "2012-10-17",
-                "Statement": [{
-                    "Sid": "PublicReadGetObject",
-                    "Effect": "Allow",
-                    "Principal": "*",
-                    "Action": ["s3:GetObject"],
-                    "Resource": [f"arn:aws:s3:::{bucket_name}/*"]
-                }]
-            }
-            s3.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy))
-
+        import api
+        asyncio.run(api.create_bucket(bucket_name, visibility, username))
         print(f"bucket created: {bucket_name}")
-
     except ClientError as e:
         print(f"error creating bucket: {e}")
 
+def make_bucket(bucket_name, visibility="private", owner=None, region=None):
+    """Create + tag a bucket (and attach the public-read policy if asked). No prompts/printing."""
+    owner = owner or os.getenv("USER") or os.getenv("USERNAME") or "unknown"
+    # region handling: ל-us-east-1 אין CreateBucketConfiguration
+    region = region or aws_clients.default_region()
+    s3 = aws_clients.client("s3", region)
+    kwargs = dict(Bucket=bucket_name)
+    if region != "us-east-1":
+        kwargs["CreateBucketConfiguration"] = {"LocationConstraint": region}
+
+    s3.create_bucket(**kwargs)
+
+    # tags
+    s3.put_bucket_tagging(Bucket=bucket_name, Tagging={"TagSet": [
+        {"Key": "CreatedBy", "Value": "platform-cli"},
+        {"Key": "Owner", "Value": owner}
+    ]})
+
+    # public policy (optional)
+    if visibility == "public":
+        policy = {
+            "Version": "2012-10-17",
+            "Statement": [{
+                "Sid": "PublicReadGetObject",
+                "Effect": "Allow",
+                "Principal": "*",
+                "Action": ["s3:GetObject"],
+                "Resource": [f"arn:aws:s3:::{bucket_name}/*"]
+            }]
+        }
+        s3.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy))
+
+    _tag_cache.put(bucket_name, {"tags": {"CreatedBy": "platform-cli", "Owner": owner}, "region": region})
+    return {"name": bucket_name, "region": region, "visibility": visibility}
+
 def upload_file(params):
     bucket = params.get("bucket")
     file_path = params.get("file")
@@ -87,30 +107,125 @@ def upload_file(params):
         print("error: can only upload to buckets created by platform-cli.")
         return
 
-    file_name = os.path.basename(file_path)
+    file_name = params.get("key") or os.path.basename(file_path)
+    part_size = int(params.get("part_size") or s3_multipart.DEFAULT_PART_SIZE)
+    region = get_bucket_region(bucket)
     try:
-        s3.upload_file(file_path, bucket, file_name)
-        print(f"file uploaded: {file_name} → {bucket}")
+        if os.path.getsize(file_path) > part_size:
+            stats = s3_multipart.multipart_upload(
+                file_path, bucket, file_name,
+                part_size=part_size,
+                workers=int(params.get("workers") or s3_multipart.DEFAULT_WORKERS),
+                max_bandwidth=params.get("max_bandwidth"),
+                region=region,
+            )
+            resumed = f", {stats['resumed_parts']} resumed" if stats["resumed_parts"] else ""
+            print(f"file uploaded: {file_name} → {bucket} "
+                  f"({stats['bytes'] / s3_multipart.MB:.1f} MB in {stats['seconds']:.1f}s, "
+                  f"{stats['mb_per_sec']:.1f} MB/s, {stats['parts']} parts{resumed})")
+        else:
+            aws_clients.client("s3", region).upload_file(file_path, bucket, file_name)
+            print(f"file uploaded: {file_name} → {bucket}")
     except ClientError as e:
         print(f"error uploading file: {e}")
 
-def list_buckets():
+BUCKET_FIELDS = ("name", "owner", "region", "created", "tags")
+
+def _bucket_row(name, tags, created=None, region=None):
+    return {"name": name, "owner": tags.get("Owner"), "region": region, "created": created, "tags": tags}
+
+def list_buckets(owner=None, name_prefix=None, older_than=None, cached=False, output_format=None, fields=None):
+    out = Emitter(output_format, fields, ("name",), BUCKET_FIELDS, text=lambda r: f"🪣 {r['name']}")
+    if cached:
+        import inventory
+        for row in inventory.query_buckets(owner, name_prefix, older_than):
+            created = datetime.datetime.fromtimestamp(row["created_at"], datetime.timezone.utc)
+            out.emit(_bucket_row(row["name"], json.loads(row["tags"] or "{}"), created, row["region"]))
+        out.finish()
+        return
+    cutoff = time.time() - older_than if older_than else None
     try:
-        buckets = s3.list_buckets()
-        for b in buckets.get("Buckets", []):
-            name = b["Name"]
-            tags = get_bucket_tags(name)
-            if tags.get("CreatedBy") == "platform-cli":
-                print(f"🪣 {name}")
+        # page by page: each page's tag lookups stream out as they complete;
+        # the prefix is filtered server side
+        kwargs = {"Prefix": name_prefix} if name_prefix else {}
+        for page in _s3().get_paginator("list_buckets").paginate(**kwargs):
+            buckets = {b["Name"]: b for b in page.get("Buckets", [])
+                       if not cutoff or b["CreationDate"].timestamp() < cutoff}
+            for name, tags in iter_bucket_tags(buckets.values()):
+                if tags.get("CreatedBy") != "platform-cli" or (owner and tags.get("Owner") != owner):
+                    continue
+                b = buckets[name]
+                # the region is only looked up when it is printed (usually cached with the tags)
+                region = get_bucket_region(name, b.get("BucketRegion")) if out.wants("region") else None
+                out.emit(_bucket_row(name, tags, b["CreationDate"], region))
+        out.finish()
     except ClientError as e:
         print(f"error listing buckets: {e}")
 
-def get_bucket_tags(bucket_name):
+def _normalize_location(loc):
+    # get_bucket_location returns None for us-east-1 and "EU" for the legacy eu-west-1 constraint
+    return {None: "us-east-1", "": "us-east-1", "EU": "eu-west-1"}.get(loc, loc)
+
+def get_bucket_region(bucket_name, hint=None):
+    if hint:
+        return hint
+    entry = _tag_cache.get(bucket_name)
+    if entry and entry.get("region"):
+        return entry["region"]
+    try:
+        return _normalize_location(_s3().get_bucket_location(Bucket=bucket_name).get("LocationConstraint"))
+    except ClientError:
+        return None
+
+def _fetch_bucket_tags(bucket_name, region=None):
+    """Return (tags, region, cacheable); untagged/forbidden buckets give ({}, region, True)."""
+    region = get_bucket_region(bucket_name, region)
     try:
-        tagging = s3.get_bucket_tagging(Bucket=bucket_name)
-        return {t["Key"]: t["Value"] for t in tagging.get("TagSet", [])}
+        # a client in the bucket's own region avoids the cross-region redirect round-trip
+        tagging = aws_clients.client("s3", region).get_bucket_tagging(Bucket=bucket_name)
+        return {t["Key"]: t["Value"] for t in tagging.get("TagSet", [])}, region, True
+    except ClientError as e:
+        return {}, region, e.response.get("Error", {}).get("Code") in _NEGATIVE_TAG_ERRORS
     except Exception:
-        return {}
+        return {}, region, False
+
+def _lookup_bucket_tags(bucket_name, region=None):
+    """(tags, ok): ok is False when the lookup failed (and was not cached)."""
+    tags, region, cacheable = _fetch_bucket_tags(bucket_name, region)
+    if cacheable:
+        _tag_cache.put(bucket_name, {"tags": tags, "region": region})
+    return tags, cacheable
+
+def get_bucket_tags(bucket_name, region=None, fresh=False):
+    """Bucket tags, from the cache unless fresh (destructive callers re-read them)."""
+    entry = None if fresh else _tag_cache.get(bucket_name)
+    if entry is not None:
+        return entry["tags"]
+    return _lookup_bucket_tags(bucket_name, region)[0]
+
+def iter_bucket_tags(buckets, workers=None, fresh=False, failed=None):
+    """
+    Yield (bucket_name, tags) for list_buckets() entries as the lookups complete.
+    Cached buckets are answered immediately (unless fresh); the rest go through
+    a bounded worker pool. Names whose lookup failed are added to `failed`.
+    """
+    pending = []
+    for b in buckets:
+        entry = None if fresh else _tag_cache.get(b["Name"])
+        if entry is not None:
+            yield b["Name"], entry["tags"]
+        else:
+            pending.append(b)
+    if not pending:
+        return
+    with ThreadPoolExecutor(max_workers=workers or TAG_WORKERS) as pool:
+        futures = {pool.submit(_lookup_bucket_tags, b["Name"], b.get("BucketRegion")): b["Name"] for b in pending}
+        for fut in as_completed(futures):
+            tags, ok = fut.result()
+            if not ok and failed is not None:
+                failed.add(futures[fut])
+            yield futures[fut], tags
+    _tag_cache.flush()
 
 def is_cli_bucket(bucket_name):
     tags = get_bucket_tags(bucket_name)
@@ -131,9 +246,100 @@ def _create_bucket_cmd(name, visibility, yes):
 @s3_group.command("upload-file")
 @click.option("--bucket", required=True)
 @click.option("--file", "file_", required=True, type=click.Path(exists=True))
-def _upload_file_cmd(bucket, file_):
-    upload_file({"bucket": bucket, "file": file_})
+@click.option("--key", default=None, help="Object key (default: file basename)")
+@click.option("--part-size", default=64, show_default=True, type=click.IntRange(min=5),
+              help="Multipart part size in MiB; larger files are uploaded in parallel parts")
+@click.option("--workers", default=s3_multipart.DEFAULT_WORKERS, show_default=True, type=click.IntRange(min=1),
+              help="Parallel part uploads")
+@click.option("--max-bandwidth", default=None, type=click.FloatRange(min=0, min_open=True),
+              help="Upload bandwidth cap in MB/s (default: unlimited)")
+def _upload_file_cmd(bucket, file_, key, part_size, workers, max_bandwidth):
+    upload_file({
+        "bucket": bucket, "file": file_, "key": key,
+        "part_size": part_size * s3_multipart.MB,
+        "workers": workers,
+        "max_bandwidth": max_bandwidth * s3_multipart.MB if max_bandwidth else None,
+    })
+
+@s3_group.command("sync-dir")
+@click.option("--bucket", required=True)
+@click.option("--src", required=True, type=click.Path(exists=True, file_okay=False))
+@click.option("--prefix", default="", help="Key prefix to sync under (default: bucket root)")
+@click.option("--delete", is_flag=True, help="Delete remote keys under the prefix that no longer exist locally")
+@click.option("--dry-run", is_flag=True, help="Only show what would be uploaded/deleted")
+@click.option("--workers", default=None, type=click.IntRange(min=1),
+              help=f"Parallel uploads (default {s3_sync.DEFAULT_WORKERS})")
+def _sync_dir_cmd(bucket, src, prefix, delete, dry_run, workers):
+    """Upload new/changed files of a directory (incremental, parallel)"""
+    # ownership guard once per sync, not per file
+    if not is_cli_bucket(bucket):
+        raise click.ClickException("can only sync to buckets created by platform-cli.")
+    started = time.monotonic()
+    try:
+        stats = s3_sync.sync_dir(bucket, src, prefix, delete=delete, dry_run=dry_run, workers=workers,
+                                 region=get_bucket_region(bucket), log=click.echo)
+    except (ClientError, BotoCoreError) as e:
+        raise click.ClickException(f"error syncing {src}: {e}")
+    word = "would upload" if dry_run else "uploaded"
+    click.echo(f"{word} {stats['uploaded']} file(s) ({stats['bytes'] / s3_multipart.MB:.1f} MB), "
+               f"{stats['unchanged']} unchanged, {stats['deleted']} deleted, {stats['failed']} failed "
+               f"in {time.monotonic() - started:.1f}s")
+    if stats["failed"]:
+        raise SystemExit(1)
+
+def _stats_text(row):
+    return (f"{row['bucket']}/{'' if row['prefix'] == s3_stats.ROOT else row['prefix']}\t"
+            f"{row['objects']} objects ({s3_stats.human_bytes(row['bytes'] - row['noncurrent_bytes'])}), "
+            f"{row['versions']} noncurrent versions ({s3_stats.human_bytes(row['noncurrent_bytes'])}), "
+            f"{row['delete_markers']} delete markers, {s3_stats.human_bytes(row['bytes'])} total")
+
+def _cli_bucket_names(owner=None):
+    buckets = _s3().list_buckets().get("Buckets", [])
+    return sorted(name for name, tags in iter_bucket_tags(buckets)
+                  if tags.get("CreatedBy") == "platform-cli" and (not owner or tags.get("Owner") == owner))
+
+@s3_group.command("stats")
+@click.option("--bucket", "bucket_names", multiple=True,
+              help="Bucket to measure (repeatable; default: every platform-cli bucket)")
+@click.option("--owner", default=None, help="Without --bucket: only buckets with this Owner tag")
+@click.option("--prefix", default="", help="Only keys under this prefix")
+@click.option("--workers", default=None, type=click.IntRange(min=1),
+              help=f"Partitions listed in parallel per bucket (default {s3_stats.DEFAULT_WORKERS})")
+@output_options
+def _stats_cmd(bucket_names, owner, prefix, workers, output_format, fields):
+    """Object count, bytes, versions and a size histogram per top-level prefix"""
+    out = Emitter(output_format, fields, s3_stats.STATS_FIELDS, s3_stats.STATS_FIELDS, text=_stats_text)
+    try:
+        names = list(bucket_names) or _cli_bucket_names(owner)
+    except ClientError as e:
+        raise click.ClickException(f"error listing buckets: {e}")
+    total = s3_stats.new_stats()
+    started = time.monotonic()
+    for name in names:
+        try:
+            for group, stats in s3_stats.iter_prefix_stats(name, prefix, get_bucket_region(name), workers):
+                s3_stats.merge(total, stats)
+                if group == s3_stats.ROOT and not any(v for k, v in stats.items() if k != "histogram"):
+                    continue  # no keys directly under the prefix
+                out.emit(dict(stats, bucket=name, prefix=group))
+        except ClientError as e:
+            click.echo(f"error reading {name}: {e}", err=True)
+    out.finish("no platform-cli buckets found." if not names else "no objects found.")
+    if out.format == "text" and names:
+        click.echo(f"total: {total['objects']} objects, {s3_stats.human_bytes(total['bytes'])} "
+                   f"({s3_stats.human_bytes(total['noncurrent_bytes'])} noncurrent), "
+                   f"{total['versions']} noncurrent versions, {total['delete_markers']} delete markers "
+                   f"in {len(names)} bucket(s), {time.monotonic() - started:.1f}s")
+        width = max(total["histogram"].values()) or 1
+        for label, n in total["histogram"].items():
+            click.echo(f"  {label:>6} {n:>10} {'#' * round(40 * n / width)}")
 
 @s3_group.command("list")
-def _list_cmd():
-    list_buckets()
+@click.option("--cached", is_flag=True, help="Answer from the local inventory (see 'inventory refresh')")
+@click.option("--owner", default=None, help="Only buckets with this Owner tag")
+@click.option("--name-prefix", default=None, help="Only buckets whose name starts with this")
+@click.option("--older-than", default=None, callback=duration_option, help="Only buckets created before, e.g. 12h, 7d")
+@output_options
+def _list_cmd(cached, owner, name_prefix, older_than, output_format, fields):
+    list_buckets(owner=owner, name_prefix=name_prefix, older_than=older_than, cached=cached,
+                 output_format=output_format, fields=fields)
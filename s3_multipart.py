@@ -0,0 +1,198 @@
+# s3_multipart.py
+"""
+Parallel, resumable multipart upload for large files.
+
+Parts are read straight out of a memory-mapped file (no per-part buffer
+copies), hashed with SHA-256 per part, and uploaded by a worker pool that
+can share a bandwidth cap. The UploadId is remembered on disk so an
+interrupted upload of the same unchanged file picks up where it stopped.
+"""
+import base64
+import hashlib
+import io
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+from cache import TTLCache
+
+MB = 1024 * 1024
+MIN_PART_SIZE = 5 * MB      # S3 minimum for every part except the last
+MAX_PARTS = 10000           # S3 maximum parts per upload
+DEFAULT_PART_SIZE = 64 * MB
+DEFAULT_WORKERS = 8
+
+# (bucket, key, file identity, part size) -> UploadId of an unfinished upload
+_uploads = TTLCache("multipart-uploads", ttl=7 * 24 * 3600)
+
+
+class _Throttle:
+    """Token-bucket pacing shared by all workers; rate is bytes/second (None = unlimited)."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + n / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _PartReader(io.RawIOBase):
+    """Seekable read-only stream over a memoryview slice (botocore rewinds it on retry)."""
+
+    def __init__(self, view, throttle):
+        self._view = view
+        self._pos = 0
+        self._throttle = throttle
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, min(len(self._view), base + offset))
+        return self._pos
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        self._throttle.consume(n)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self._view) - self._pos
+        n = min(size, len(self._view) - self._pos)
+        self._throttle.consume(n)
+        chunk = self._view[self._pos:self._pos + n].tobytes()
+        self._pos += n
+        return chunk
+
+
+def _state_key(file_path, bucket, key, part_size):
+    st = os.stat(file_path)
+    return f"{bucket}/{key}|{os.path.abspath(file_path)}|{st.st_size}|{st.st_mtime_ns}|{part_size}"
+
+
+def _uploaded_parts(s3, bucket, key, upload_id):
+    parts = {}
+    for page in s3.get_paginator("list_parts").paginate(Bucket=bucket, Key=key, UploadId=upload_id):
+        for p in page.get("Parts", []):
+            parts[p["PartNumber"]] = p
+    return parts
+
+
+def _sha256_b64(view):
+    return base64.b64encode(hashlib.sha256(view).digest()).decode()
+
+
+def _already_uploaded(prev, view, checksum):
+    """True if a listed part holds exactly this data."""
+    if not prev or prev.get("Size") != len(view):
+        return False
+    if prev.get("ChecksumSHA256"):
+        return prev["ChecksumSHA256"] == checksum
+    # listings without checksums (S3-compatible stores): a plain part's ETag is its MD5
+    return prev.get("ETag", "").strip('"') == hashlib.md5(view).hexdigest()
+
+
+def multipart_upload(file_path, bucket, key, part_size=DEFAULT_PART_SIZE, workers=DEFAULT_WORKERS,
+                     max_bandwidth=None, region=None):
+    """
+    Upload file_path to s3://bucket/key in parallel parts.
+    max_bandwidth is in bytes/second. Returns a stats dict
+    (bytes, seconds, parts, resumed_parts, mb_per_sec, etag).
+    """
+    s3 = aws_clients.client("s3", region)
+    size = os.path.getsize(file_path)
+    part_size = max(part_size, MIN_PART_SIZE, -(-size // MAX_PARTS))
+    state_key = _state_key(file_path, bucket, key, part_size)
+
+    upload_id = _uploads.get(state_key)
+    done = {}
+    if upload_id:
+        try:
+            done = _uploaded_parts(s3, bucket, key, upload_id)
+        except ClientError:
+            upload_id = None  # aborted or expired - start over
+    if not upload_id:
+        upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ChecksumAlgorithm="SHA256")["UploadId"]
+        _uploads.put(state_key, upload_id)
+        _uploads.flush()
+
+    throttle = _Throttle(max_bandwidth)
+    started = time.monotonic()
+    sent = [0]
+    sent_lock = threading.Lock()
+
+    def _upload_part(view, number):
+        checksum = _sha256_b64(view)
+        prev = done.get(number)
+        if _already_uploaded(prev, view, checksum):
+            return {"PartNumber": number, "ETag": prev["ETag"], "ChecksumSHA256": checksum}, True
+        resp = s3.upload_part(
+            Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number,
+            Body=_PartReader(view, throttle), ContentLength=len(view),
+            ChecksumAlgorithm="SHA256", ChecksumSHA256=checksum,
+        )
+        with sent_lock:
+            sent[0] += len(view)
+        return {"PartNumber": number, "ETag": resp["ETag"], "ChecksumSHA256": checksum}, False
+
+    parts, resumed = [], 0
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        whole = memoryview(mm)
+        views = [whole[off:off + part_size] for off in range(0, size, part_size)]
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_upload_part, v, n) for n, v in enumerate(views, start=1)]
+                try:
+                    for fut in as_completed(futures):
+                        part, reused = fut.result()
+                        parts.append(part)
+                        resumed += reused
+                except BaseException:
+                    # keep the UploadId on disk; the next run resumes from the parts already sent
+                    for fut in futures:
+                        fut.cancel()
+                    raise
+        finally:
+            for v in views:
+                v.release()
+            whole.release()
+
+    parts.sort(key=lambda p: p["PartNumber"])
+    done = s3.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                        MultipartUpload={"Parts": parts})
+    _uploads.invalidate(state_key)
+    _uploads.flush()
+
+    seconds = max(time.monotonic() - started, 1e-6)
+    return {
+        "bytes": size,
+        "seconds": seconds,
+        "parts": len(parts),
+        "resumed_parts": resumed,
+        "mb_per_sec": sent[0] / MB / seconds,
+        "etag": done.get("ETag", "").strip('"'),
+    }
@@ -0,0 +1,121 @@
+# s3_stats.py
+"""
+Bucket statistics for `s3 stats` and cleanup plans.
+
+The keyspace is split on "/" with delimiter listings of list_object_versions:
+each level's direct keys are counted while its common prefixes become new
+partitions, which are listed concurrently (splitting further while there are
+fewer partitions than workers can use). Only counters are kept, one set per
+top-level prefix, and a prefix's row is reported as soon as all of its
+partitions are done — memory does not grow with the number of keys.
+"""
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import aws_clients
+
+DEFAULT_WORKERS = int(os.getenv("PLATFORM_CLI_STATS_WORKERS", "16"))
+MAX_SPLIT_DEPTH = 3  # levels of "/" we split on at most
+ROOT = "(root)"  # keys directly under the listed prefix
+
+KB, MB, GB = 1024, 1024 ** 2, 1024 ** 3
+# (upper bound, label); sizes are of every object version
+SIZE_BUCKETS = [(KB, "<1K"), (64 * KB, "<64K"), (MB, "<1M"), (16 * MB, "<16M"),
+                (128 * MB, "<128M"), (GB, "<1G"), (float("inf"), ">=1G")]
+STATS_FIELDS = ["bucket", "prefix", "objects", "bytes", "versions", "noncurrent_bytes",
+                "delete_markers", "histogram"]
+
+
+def new_stats():
+    return {"objects": 0, "bytes": 0, "versions": 0, "noncurrent_bytes": 0, "delete_markers": 0,
+            "histogram": {label: 0 for _, label in SIZE_BUCKETS}}
+
+
+def merge(into, other):
+    for field, value in other.items():
+        if field == "histogram":
+            for label, n in value.items():
+                into["histogram"][label] += n
+        else:
+            into[field] += value
+    return into
+
+
+def _add_version(stats, v):
+    size = v.get("Size", 0)
+    if v.get("IsLatest"):
+        stats["objects"] += 1
+    else:
+        stats["versions"] += 1
+        stats["noncurrent_bytes"] += size
+    stats["bytes"] += size
+    for bound, label in SIZE_BUCKETS:
+        if size < bound:
+            stats["histogram"][label] += 1
+            break
+
+
+def _list_partition(s3, bucket, prefix, split):
+    """Count one partition; with split, sub-prefixes are returned instead of listed."""
+    stats, children = new_stats(), []
+    params = {"Bucket": bucket, "Prefix": prefix}
+    if split:
+        params["Delimiter"] = "/"
+    for page in s3.get_paginator("list_object_versions").paginate(**params):
+        for v in page.get("Versions", []):
+            _add_version(stats, v)
+        stats["delete_markers"] += len(page.get("DeleteMarkers", []))
+        children.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+    return stats, children
+
+
+def iter_prefix_stats(bucket, prefix="", region=None, workers=None, max_depth=MAX_SPLIT_DEPTH):
+    """
+    Yield (top-level prefix, stats) for bucket as each prefix finishes;
+    direct keys under prefix are reported as ROOT.
+    """
+    s3 = aws_clients.client("s3", region)
+    workers = workers or DEFAULT_WORKERS
+    target = workers * 2  # enough partitions to keep every worker busy
+    groups = {}  # top-level prefix -> [stats, partitions not yet counted]
+    todo = deque([(prefix, 0, ROOT)])
+    groups[ROOT] = [new_stats(), 1]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while todo or running:
+            while todo and len(running) < target:
+                part, depth, group = todo.popleft()
+                split = depth == 0 or (depth < max_depth and len(todo) + len(running) < target)
+                running[pool.submit(_list_partition, s3, bucket, part, split)] = (depth, group)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                depth, group = running.pop(fut)
+                stats, children = fut.result()
+                for child in children:
+                    child_group = child if depth == 0 else group
+                    if depth == 0:
+                        groups[child_group] = [new_stats(), 0]
+                    groups[child_group][1] += 1
+                    todo.append((child, depth + 1, child_group))
+                entry = groups[group]
+                merge(entry[0], stats)
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del groups[group]
+                    yield group, entry[0]
+
+
+def bucket_stats(bucket, prefix="", region=None, workers=None):
+    """Totals for the whole bucket (or prefix)."""
+    total = new_stats()
+    for _, stats in iter_prefix_stats(bucket, prefix, region, workers):
+        merge(total, stats)
+    return total
+
+
+def human_bytes(n):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if n < 1024 or unit == "TB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
@@ -0,0 +1,213 @@
+# s3_sync.py
+"""
+Incremental directory upload for `s3 sync-dir`.
+
+The source tree is walked lazily and each file is compared with a local
+manifest (size, mtime, SHA-256 and the ETag it was uploaded as) and with
+the remote listing, so only new or changed files are read and sent. The
+manifest lives under the cache dir, one per (bucket, prefix, source dir).
+"""
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+import aws_clients
+import s3_multipart
+from cache import cache_dir
+
+DEFAULT_WORKERS = int(os.getenv("PLATFORM_CLI_SYNC_WORKERS", "16"))
+DELETE_BATCH = 1000  # delete_objects maximum
+MAX_ERROR_LINES = 20  # per delete batch; the rest are counted in one line
+_HASH_CHUNK = 1024 * 1024
+
+
+def iter_files(src):
+    """Yield (relative posix path, os.stat_result) for every regular file under src, lazily."""
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(src, rel_dir)) as it:
+            for entry in it:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(rel)
+                elif entry.is_file():
+                    yield rel, entry.stat()
+
+
+def _digests(path, want_md5=False):
+    sha, md5 = hashlib.sha256(), hashlib.md5() if want_md5 else None
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            sha.update(chunk)
+            if md5:
+                md5.update(chunk)
+    return sha.digest(), md5.hexdigest() if md5 else None
+
+
+class Manifest:
+    """What we last uploaded from this directory: relpath -> {size, mtime_ns, sha256, etag}."""
+
+    def __init__(self, bucket, prefix, src):
+        ident = f"{bucket}\n{prefix}\n{os.path.abspath(src)}"
+        name = hashlib.sha1(ident.encode()).hexdigest()[:16]
+        self.path = os.path.join(cache_dir(), "sync-manifests", f"{name}.json")
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+        except (OSError, ValueError):
+            self.entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, rel):
+        return self.entries.get(rel)
+
+    def put(self, rel, entry):
+        with self._lock:
+            self.entries[rel] = entry
+
+    def drop(self, rels):
+        with self._lock:
+            for rel in rels:
+                self.entries.pop(rel, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"files": self.entries}, f)
+        os.replace(tmp, self.path)
+
+
+def _remote_listing(s3, bucket, prefix):
+    """key -> (size, etag) for everything under prefix."""
+    remote = {}
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            remote[obj["Key"]] = (obj["Size"], obj["ETag"].strip('"'))
+    return remote
+
+
+def sync_dir(bucket, src, prefix="", delete=False, dry_run=False, workers=None, region=None, log=print):
+    """
+    Upload new/changed files under src to s3://bucket/prefix and, with delete,
+    remove remote keys under prefix that no longer exist locally.
+    Returns counts: uploaded, unchanged, deleted, failed, bytes.
+    """
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+    s3 = aws_clients.client("s3", region)
+    manifest = Manifest(bucket, prefix, src)
+    stats = {"uploaded": 0, "unchanged": 0, "deleted": 0, "failed": 0, "bytes": 0}
+    stats_lock = threading.Lock()
+    workers = workers or DEFAULT_WORKERS
+
+    def _count(field, n=1):
+        with stats_lock:
+            stats[field] += n
+
+    log_lock = threading.Lock()
+
+    def _log(msg):
+        with log_lock:
+            log(msg)
+
+    def _process(rel, st, remote_entry):
+        # the futures are never read: anything not caught here would be lost, not counted as failed
+        try:
+            _sync_one(rel, st, remote_entry)
+        except Exception as e:
+            _log(f"error uploading {prefix + rel}: {e}")
+            _count("failed")
+
+    def _sync_one(rel, st, remote_entry):
+        path = os.path.join(src, rel)
+        key = prefix + rel
+        known = manifest.get(rel)
+        same_file = known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns
+        if same_file and remote_entry and remote_entry[1] == known.get("etag"):
+            _count("unchanged")  # nothing read at all
+            return
+        # first sync against an existing object: single-part ETags are the content MD5
+        want_md5 = bool(remote_entry) and remote_entry[0] == st.st_size and "-" not in remote_entry[1]
+        if same_file and not want_md5:
+            sha, md5 = base64.b64decode(known["sha256"]), None
+        else:
+            sha, md5 = _digests(path, want_md5)
+        sha_b64 = base64.b64encode(sha).decode()
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha_b64}
+        if remote_entry and (md5 == remote_entry[1] or
+                             (known and known.get("sha256") == sha_b64 and known.get("etag") == remote_entry[1])):
+            manifest.put(rel, dict(entry, etag=remote_entry[1]))
+            _count("unchanged")
+            return
+        if dry_run:
+            _log(f"would upload: {key} ({st.st_size} bytes)")
+            _count("uploaded")
+            return
+        if st.st_size > s3_multipart.DEFAULT_PART_SIZE:
+            etag = s3_multipart.multipart_upload(path, bucket, key, region=region)["etag"]
+        else:
+            extra = {}
+            ctype = mimetypes.guess_type(rel)[0]
+            if ctype:
+                extra["ContentType"] = ctype
+            with open(path, "rb") as body:
+                etag = s3.put_object(Bucket=bucket, Key=key, Body=body, ChecksumSHA256=sha_b64, **extra)["ETag"]
+        manifest.put(rel, dict(entry, etag=etag.strip('"')))
+        _count("uploaded")
+        _count("bytes", st.st_size)
+        _log(f"upload: {key}")
+
+    seen = set()
+    slots = threading.BoundedSemaphore(workers * 4)  # keeps the lazy walk only a little ahead
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            listing = pool.submit(_remote_listing, s3, bucket, prefix)
+            remote = None
+            for rel, st in iter_files(src):
+                if remote is None:
+                    remote = listing.result()
+                seen.add(rel)
+                slots.acquire()
+                fut = pool.submit(_process, rel, st, remote.get(prefix + rel))
+                fut.add_done_callback(lambda _: slots.release())
+            if remote is None:
+                remote = listing.result()
+    finally:
+        if not dry_run:
+            manifest.save()
+
+    if delete:
+        orphans = sorted(k for k in remote if k[len(prefix):] not in seen)
+        for i in range(0, len(orphans), DELETE_BATCH):
+            batch = orphans[i:i + DELETE_BATCH]
+            if dry_run:
+                for key in batch:
+                    _log(f"would delete: {key}")
+                stats["deleted"] += len(batch)
+                continue
+            try:
+                resp = s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True})
+            except (ClientError, BotoCoreError) as e:
+                _log(f"error deleting {len(batch)} key(s) from {batch[0]} to {batch[-1]}: {e}")
+                stats["failed"] += len(batch)
+                continue
+            errors = resp.get("Errors", [])
+            for err in errors[:MAX_ERROR_LINES]:
+                _log(f"error deleting {err['Key']}: {err.get('Code')}")
+            if len(errors) > MAX_ERROR_LINES:
+                _log(f"... and {len(errors) - MAX_ERROR_LINES} more delete error(s)")
+            failed = {err["Key"] for err in errors}
+            manifest.drop(k[len(prefix):] for k in batch if k not in failed)
+            stats["deleted"] += len(batch) - len(errors)
+            stats["failed"] += len(errors)
+        if orphans and not dry_run:
+            manifest.save()
+    return stats
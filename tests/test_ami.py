@@ -0,0 +1,64 @@
+import pytest
+
+import aws_clients
+import utils
+
+AL2023, AL2 = utils.AMI_ALIASES["amazon-linux"]
+
+
+@pytest.fixture
+def ssm_calls(aws, monkeypatch):
+    """Parameter names of every get_parameters call, per call."""
+    monkeypatch.setattr(utils._ami_cache, "_data", {})
+    calls = []
+
+    def record(params, **kwargs):
+        calls.append(params["Names"])
+
+    clients = [aws_clients.client("ssm", region) for region in ("us-east-1", "eu-west-1")]
+    for c in clients:
+        c.meta.events.register("before-parameter-build.ssm.GetParameters", record)
+    yield calls
+    for c in clients:
+        c.meta.events.unregister("before-parameter-build.ssm.GetParameters", record)
+
+
+def _latest(name):
+    return aws_clients.client("ssm").get_parameter(Name=name)["Parameter"]["Value"]
+
+
+def test_literal_ami_ids_skip_ssm(ssm_calls):
+    assert utils.resolve_ami("ami-0123456789abcdef0") == "ami-0123456789abcdef0"
+    assert ssm_calls == []
+
+
+def test_all_candidates_are_fetched_in_one_call_and_cached(ssm_calls):
+    expected = _latest(AL2023)
+    assert utils.resolve_ami("amazon-linux") == expected
+    assert utils.resolve_ami("amazonlinux") == expected  # synonym, same cache entry
+    assert ssm_calls == [[AL2023, AL2]]
+
+
+def test_refresh_bypasses_the_cache(ssm_calls):
+    utils.resolve_ami("amazon-linux")
+    utils.resolve_ami("amazon-linux", refresh=True)
+    assert len(ssm_calls) == 2
+
+
+def test_cache_is_per_region(ssm_calls):
+    utils.resolve_ami("amazon-linux")
+    utils.resolve_ami("amazon-linux", region="eu-west-1")
+    assert len(ssm_calls) == 2
+    assert set(utils._ami_cache._data) == {"us-east-1:amazon-linux", "eu-west-1:amazon-linux"}
+
+
+def test_missing_parameters_resolve_to_none_and_are_not_cached(ssm_calls):
+    assert utils.resolve_ami("ubuntu") is None  # moto has no Canonical parameters
+    assert utils.resolve_ami("ubuntu") is None
+    assert len(ssm_calls) == 2
+
+
+def test_unknown_alias_is_rejected(ssm_calls):
+    with pytest.raises(ValueError, match="Unsupported AMI alias"):
+        utils.resolve_ami("windows")
+    assert ssm_calls == []
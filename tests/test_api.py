@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from conftest import OWNER, run_instances
+
+import api
+
+
+def test_semaphore_bounds_concurrency_per_service(monkeypatch):
+    monkeypatch.setenv("PLATFORM_CLI_API_LIMIT_TESTSVC", "2")
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def blocking(i):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return i
+
+    async def main():
+        return await asyncio.gather(*(api.run("testsvc", blocking, i) for i in range(8)))
+
+    assert asyncio.run(main()) == list(range(8))
+    assert peak[0] == 2
+
+
+def test_a_failing_region_raises_unless_absorbed(ec2):
+    run_instances(ec2, 2)
+
+    async def collect(on_error=None):
+        return [r async for r in api.iter_instances(regions=["us-east-1", "nowhere-1"], on_error=on_error)]
+
+    with pytest.raises(Exception):
+        asyncio.run(collect())
+    errors = []
+    records = asyncio.run(collect(lambda region, e: errors.append(region)))
+    assert len(records) == 2 and errors == ["nowhere-1"]
+
+
+def test_operations_return_data_and_print_nothing(ec2, r53, capsys):
+    ids = run_instances(ec2, 2, name="api-test")
+    zone_id = r53.create_hosted_zone(Name="api.example.com", CallerReference="api")["HostedZone"]["Id"]
+
+    async def main():
+        bucket = await api.create_bucket("api-test-bucket")
+        instances, buckets, zones, upserted = await asyncio.gather(
+            api.list_instances(owner=OWNER), api.list_buckets(owner=OWNER), api.list_zones(),
+            api.upsert_records(zone_id, [{"Name": "www.api.example.com", "Type": "A", "TTL": 60,
+                                          "ResourceRecords": [{"Value": "10.0.0.1"}]}]))
+        plan = await api.cleanup_plan(only=["ec2", "s3"])
+        summary = await api.execute_cleanup_plan(plan)
+        return bucket, instances, buckets, zones, upserted, plan, summary
+
+    bucket, instances, buckets, zones, upserted, plan, summary = asyncio.run(main())
+    assert bucket["name"] == "api-test-bucket"
+    assert sorted(i["id"] for i in instances) == sorted(ids) and {i["name"] for i in instances} == {"api-test"}
+    assert [b["name"] for b in buckets] == ["api-test-bucket"] and buckets[0]["tags"]["Owner"] == OWNER
+    assert [z["name"] for z in zones] == ["api.example.com."]
+    assert len(upserted["changes"]) == 1 and upserted["waited"] is None
+    assert sorted(e["id"] for e in plan["ec2"]) == sorted(ids) and [b["name"] for b in plan["s3"]] == [bucket["name"]]
+    assert summary["skipped"] == [] and summary["results"] and all(r["ok"] for r in summary["results"])
+    assert capsys.readouterr().out == ""
+
+
+def test_waiting_for_changes_holds_no_route53_slot(monkeypatch):
+    import route53_records
+
+    class FakeRoute53:
+        polls = 0
+
+        def get_change(self, Id):
+            FakeRoute53.polls += 1
+            return {"ChangeInfo": {"Id": Id, "Status": "INSYNC" if FakeRoute53.polls > 3 else "PENDING"}}
+
+    monkeypatch.setattr(route53_records, "_r53", FakeRoute53)
+    monkeypatch.setattr(route53_records, "WAIT_INITIAL_DELAY", 0.05)
+    monkeypatch.setenv("PLATFORM_CLI_API_LIMIT_ROUTE53", "1")
+
+    async def main():
+        waiting = asyncio.ensure_future(api.wait_for_changes(["/change/C1"]))
+        await asyncio.sleep(0.01)
+        other = await asyncio.wait_for(api.run("route53", lambda: "done"), timeout=0.04)
+        return other, waiting.done(), await waiting
+
+    other, done_before, waited = asyncio.run(main())
+    assert other == "done" and not done_before
+    assert FakeRoute53.polls == 4 and waited > 0
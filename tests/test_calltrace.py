@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from conftest import CLI_TAGS
+
+import calltrace
+import cli
+
+
+@pytest.fixture
+def tracing():
+    yield
+    calltrace.reset()
+
+
+def test_percentiles_are_nearest_rank():
+    values = list(range(1, 101))
+    assert calltrace._percentile(values, 50) == 50
+    assert calltrace._percentile(values, 95) == 95
+    assert calltrace._percentile([7.0], 95) == 7.0 and calltrace._percentile([], 50) == 0.0
+
+
+def test_nothing_is_recorded_unless_enabled(s3):
+    s3.list_buckets()
+    assert calltrace.summary() == []
+
+
+def test_trace_file_and_summary(s3, tracing, tmp_path):
+    for name in ("trace-one", "trace-two"):
+        s3.create_bucket(Bucket=name)
+    s3.put_bucket_tagging(Bucket="trace-one", Tagging={"TagSet": CLI_TAGS})
+    trace = tmp_path / "trace.jsonl"
+    result = CliRunner().invoke(cli.cli, ["--trace-file", str(trace), "s3", "list"])
+    assert result.exit_code == 0, result.output
+
+    calls = [json.loads(line) for line in trace.read_text().splitlines()]
+    ops = sorted(c["operation"] for c in calls)
+    assert ops.count("ListBuckets") == 1 and ops.count("GetBucketTagging") == 2
+    assert all(c["service"] == "s3" and c["retries"] == 0 for c in calls)
+    assert sorted(c["status"] for c in calls if c["operation"] == "GetBucketTagging") == [200, 404]
+    assert all(c["received"] > 0 for c in calls if c["operation"] == "ListBuckets")
+    assert all(c["sent"] == 0 for c in calls)  # GETs carry no body
+
+    rows = {r["operation"]: r for r in calltrace.summary()}
+    assert rows["GetBucketTagging"]["calls"] == 2 and rows["GetBucketTagging"]["errors"] == 1  # NoSuchTagSet
+    assert "GetBucketTagging" in result.stderr and f"{len(calls)} AWS calls in" in result.stderr
+
+
+def test_request_bodies_are_counted_as_sent(s3, tracing, tmp_path):
+    import aws_clients
+
+    s3.create_bucket(Bucket="trace-sent")
+    trace = tmp_path / "trace.jsonl"
+    calltrace.enable(str(trace))
+    aws_clients.client("s3").put_object(Bucket="trace-sent", Key="k", Body=b"x" * 5000)
+    [row] = calltrace.summary()
+    assert row["operation"] == "PutObject" and row["sent"] == 5000
+    calltrace.reset()  # closes the trace file
+    [call] = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert (call["operation"], call["sent"]) == ("PutObject", 5000)
+
+
+def test_connection_errors_are_traced(s3, tracing, tmp_path):
+    import aws_clients
+    from botocore.exceptions import EndpointConnectionError
+
+    def unreachable(request, **kwargs):
+        raise EndpointConnectionError(endpoint_url=request.url)
+
+    calltrace.enable(str(tmp_path / "trace.jsonl"))
+    client = aws_clients.client("s3")
+    client.meta.events.register("before-send.s3.ListBuckets", unreachable)
+    try:
+        with pytest.raises(EndpointConnectionError):
+            client.list_buckets()
+    finally:
+        client.meta.events.unregister("before-send.s3.ListBuckets", unreachable)
+    [row] = calltrace.summary()
+    assert (row["operation"], row["calls"], row["errors"]) == ("ListBuckets", 1, 1)
@@ -0,0 +1,233 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from click.testing import CliRunner
+from conftest import CLI_TAGS, OWNER, run_instances
+
+import cleanup
+import cli
+import route53_records
+
+FOREIGN_TAGS = [{"Key": "CreatedBy", "Value": "platform-cli"}, {"Key": "Owner", "Value": "someone-else"}]
+EMPTY_ME = "cleanup-empty-me"
+
+
+def _bucket(s3, name, tags=CLI_TAGS):
+    s3.create_bucket(Bucket=name)
+    if tags:
+        s3.put_bucket_tagging(Bucket=name, Tagging={"TagSet": tags})
+    s3.put_object(Bucket=name, Key="k", Body=b"x")
+
+
+def _zone(r53, name, tags=CLI_TAGS):
+    zid = r53.create_hosted_zone(Name=name, CallerReference=name)["HostedZone"]["Id"].split("/")[-1]
+    r53.change_tags_for_resource(ResourceType="hostedzone", ResourceId=zid, AddTags=tags)
+    return zid
+
+
+def _states(ec2, ids):
+    resp = ec2.describe_instances(InstanceIds=ids)
+    return {i["InstanceId"]: i["State"]["Name"] for r in resp["Reservations"] for i in r["Instances"]}
+
+
+@pytest.fixture
+def resources(ec2, s3, r53):
+    _bucket(s3, "cleanup-mine")
+    _bucket(s3, "cleanup-theirs", FOREIGN_TAGS)
+    _bucket(s3, "cleanup-untagged", None)
+    return {
+        "mine": run_instances(ec2, 2), "theirs": run_instances(ec2, tags=FOREIGN_TAGS),
+        "untagged": run_instances(ec2, tags=[{"Key": "Owner", "Value": OWNER}]),
+        "zone": _zone(r53, "mine.example.com"), "foreign_zone": _zone(r53, "theirs.example.com", FOREIGN_TAGS),
+    }
+
+
+@pytest.fixture
+def versioned(s3, monkeypatch):
+    """A versioned bucket holding 30 keys x 2 versions plus 5 delete markers, deleted 10 keys per batch."""
+    monkeypatch.setattr(cleanup, "S3_DELETE_BATCH", 10)
+    s3.create_bucket(Bucket=EMPTY_ME)
+    s3.put_bucket_versioning(Bucket=EMPTY_ME, VersioningConfiguration={"Status": "Enabled"})
+    for i in range(30):
+        for body in (b"v1", b"v2"):
+            s3.put_object(Bucket=EMPTY_ME, Key=f"k{i:02}", Body=body)
+    for i in range(5):
+        s3.delete_object(Bucket=EMPTY_ME, Key=f"k{i:02}")
+    s3.create_multipart_upload(Bucket=EMPTY_ME, Key="unfinished")
+    return EMPTY_ME
+
+
+@pytest.fixture
+def delete_calls(s3):
+    """Batches sent to delete_objects; put a batch index in `fail` to make that call raise."""
+    calls = {"sizes": [], "fail": set()}
+
+    def record(params, **kwargs):
+        calls["sizes"].append(len(params["Delete"]["Objects"]))
+        if len(calls["sizes"]) - 1 in calls["fail"]:
+            raise EndpointConnectionError(endpoint_url="https://s3.amazonaws.com")
+
+    s3.meta.events.register("before-parameter-build.s3.DeleteObjects", record)
+    yield calls
+    s3.meta.events.unregister("before-parameter-build.s3.DeleteObjects", record)
+
+
+def test_empty_bucket_streams_full_batches_of_versions_and_markers(s3, versioned, delete_calls):
+    assert cleanup.empty_bucket(versioned, workers=3, log=None) == (65, 0)
+    assert sorted(delete_calls["sizes"]) == [5] + [10] * 6
+    listing = s3.list_object_versions(Bucket=versioned)
+    assert not listing.get("Versions") and not listing.get("DeleteMarkers")
+    assert not s3.list_multipart_uploads(Bucket=versioned).get("Uploads")
+
+
+def test_empty_bucket_counts_and_reports_failed_keys(s3, versioned, delete_calls, monkeypatch):
+    monkeypatch.setattr(cleanup, "S3_MAX_KEY_ERRORS_SHOWN", 4)
+    delete_calls["fail"].update({0, 1})
+    lines = []
+    assert cleanup.empty_bucket(versioned, workers=1, log=lines.append) == (45, 20)
+    assert sum(1 for line in lines if "cannot delete" in line and "EndpointConnectionError" in line) == 4
+    assert any("16 more key errors not shown" in line for line in lines)
+
+
+def test_bucket_with_undeletable_keys_is_left_in_place(s3, versioned, delete_calls):
+    delete_calls["fail"].add(0)
+    result = cleanup._delete_bucket(versioned, None, log=lambda msg: None)
+    assert not result["ok"] and result["errors"] == 10 and "could not be deleted" in result["error"]
+    assert versioned in [b["Name"] for b in s3.list_buckets()["Buckets"]]
+
+    delete_calls["fail"].clear()
+    assert cleanup._delete_bucket(versioned, None, log=lambda msg: None)["ok"]
+    assert versioned not in [b["Name"] for b in s3.list_buckets()["Buckets"]]
+
+
+def test_plan_only_contains_the_owners_tagged_resources(resources):
+    plan = cleanup.build_plan(log=None)
+    assert plan["owner"] == OWNER
+    assert sorted(i["id"] for i in plan["ec2"]) == sorted(resources["mine"])
+    assert [b["name"] for b in plan["s3"]] == ["cleanup-mine"]
+    assert [z["id"] for z in plan["route53"]] == [resources["zone"]]
+
+
+def test_execute_plan_drops_entries_that_fail_verification(resources, ec2, s3, r53):
+    plan = cleanup.build_plan(log=None)
+    # a stale or hand-edited plan: other people's resources, untagged ones and ones that are gone
+    plan["ec2"] += [{"id": resources["theirs"][0], "region": "us-east-1"},
+                    {"id": resources["untagged"][0], "region": "us-east-1"},
+                    {"id": "i-0123456789abcdef0", "region": "us-east-1"}]
+    plan["s3"] += [{"name": "cleanup-theirs", "region": "us-east-1"}, {"name": "cleanup-untagged"}]
+    plan["route53"] += [{"id": resources["foreign_zone"], "name": "theirs.example.com"},
+                        {"id": "Z0000000000000000000", "name": "gone.example.com"}]
+    lines = []
+    summary = cleanup.execute_plan(plan, log=lines.append)
+
+    assert len(summary["skipped"]) == 7
+    assert all(r["ok"] for r in summary["results"])
+    assert sum(1 for line in lines if "skipping" in line) == 7
+    states = _states(ec2, resources["mine"] + resources["theirs"] + resources["untagged"])
+    assert {states[i] for i in resources["mine"]} == {"terminated"}
+    assert states[resources["theirs"][0]] == states[resources["untagged"][0]] == "running"
+    assert sorted(b["Name"] for b in s3.list_buckets()["Buckets"]) == ["cleanup-theirs", "cleanup-untagged"]
+    assert [z["Name"] for z in r53.list_hosted_zones()["HostedZones"]] == ["theirs.example.com."]
+
+
+def test_execute_plan_rechecks_tags_changed_since_the_plan(resources, s3):
+    plan = cleanup.build_plan(log=None)
+    s3.put_bucket_tagging(Bucket="cleanup-mine", Tagging={"TagSet": FOREIGN_TAGS})
+    summary = cleanup.execute_plan(plan, dry_run=True, log=None)
+    assert {"service": "s3", "entry": plan["s3"][0]} in summary["skipped"]
+    assert summary["results"] == []
+
+
+def test_dry_run_deletes_nothing(resources, ec2):
+    cleanup.cleanup_resources(dry_run=True, log=None)
+    assert set(_states(ec2, resources["mine"]).values()) == {"running"}
+
+
+@pytest.fixture
+def forbidden_tags(r53):
+    """Zone IDs whose list_tags_for_resources calls are refused."""
+    ids = set()
+
+    def refuse(params, **kwargs):
+        if ids & set(params["ResourceIds"]):
+            raise ClientError({"Error": {"Code": "AccessDenied", "Message": "denied"}}, "ListTagsForResources")
+
+    r53.meta.events.register("before-parameter-build.route53.ListTagsForResources", refuse)
+    yield ids
+    r53.meta.events.unregister("before-parameter-build.route53.ListTagsForResources", refuse)
+
+
+def test_zone_tags_are_read_in_chunks_and_failures_isolated(r53, forbidden_tags):
+    zones = [_zone(r53, f"z{i:02}.example.com") for i in range(12)]
+    forbidden_tags.add(zones[3])
+    failed = set()
+    tags = route53_records.zone_tags(zones, failed=failed)
+    assert failed == {zones[3]}
+    assert set(tags) == set(zones) - failed and all(t["Owner"] == OWNER for t in tags.values())
+
+
+def test_zones_with_unreadable_tags_are_reported_not_dropped_silently(r53, forbidden_tags):
+    zones = [_zone(r53, f"z{i:02}.example.com") for i in range(12)]
+    forbidden_tags.add(zones[0])
+    lines = []
+    plan = cleanup.build_plan(only=["route53"], log=lines.append)
+    assert sorted(z["id"] for z in plan["route53"]) == sorted(zones[1:])
+    assert any(zones[0] in line and "cannot read the tags" in line for line in lines)
+
+
+def test_selectors_default_to_the_current_user(resources, ec2):
+    result = CliRunner().invoke(cli.cli, ["ec2", "stop", "--state", "running", "--yes"])
+    assert result.exit_code == 0, result.output
+    states = _states(ec2, resources["mine"] + resources["theirs"])
+    assert {states[i] for i in resources["mine"]} == {"stopped"}
+    assert states[resources["theirs"][0]] == "running"
+
+
+def test_selectors_ask_before_terminating(resources, ec2):
+    result = CliRunner().invoke(cli.cli, ["ec2", "terminate", "--state", "running"], input="n\n")
+    assert result.exit_code == 1 and "Aborted" in result.output
+    assert set(_states(ec2, resources["mine"]).values()) == {"running"}
+
+
+def test_explicit_ids_of_other_owners_are_refused(resources, ec2):
+    result = CliRunner().invoke(cli.cli, ["ec2", "terminate", "--id", resources["untagged"][0]])
+    assert result.exit_code != 0
+    assert _states(ec2, resources["untagged"])[resources["untagged"][0]] == "running"
+
+
+def test_repeated_ids_are_checked_and_stopped_in_one_call_each(resources, ec2):
+    calls = []
+
+    def record(**kwargs):
+        calls.append(kwargs["event_name"].rsplit(".", 1)[-1])
+
+    ec2.meta.events.register("before-call.ec2", record)
+    try:
+        args = [arg for iid in resources["mine"] for arg in ("--id", iid)]
+        result = CliRunner().invoke(cli.cli, ["ec2", "stop", *args])
+    finally:
+        ec2.meta.events.unregister("before-call.ec2", record)
+    assert result.exit_code == 0, result.output
+    assert calls == ["DescribeInstances", "StopInstances"]
+    assert all(f"{iid}\trunning -> stopping" in result.output for iid in resources["mine"])
+
+
+def test_all_owners_widens_selectors(resources, ec2):
+    run_instances(ec2, name="web-theirs", tags=FOREIGN_TAGS)
+    run_instances(ec2, name="web-mine")
+    result = CliRunner().invoke(cli.cli, ["ec2", "stop", "--name-prefix", "web-", "--all-owners", "--yes"])
+    assert result.exit_code == 0 and "stopping 2 instance(s)" in result.output, result.output
+
+
+
+def test_plan_with_s3_stats_measures_every_bucket(s3):
+    for i in range(6):
+        _bucket(s3, f"cleanup-stats-{i}")
+    plan = cleanup.build_plan(only=["s3"], s3_stats=True, log=None)
+    assert [b["stats"]["objects"] for b in plan["s3"]] == [1] * 6
+
+
+def test_s3_stats_does_not_apply_to_a_saved_plan(tmp_path):
+    plan = tmp_path / "plan.json"
+    plan.write_text("{}")
+    result = CliRunner().invoke(cli.cli, ["cleanup", "--plan-in", str(plan), "--s3-stats", "--dry-run"])
+    assert result.exit_code == 2 and "--s3-stats" in result.output
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import aws_clients
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _imported_after(argv):
+    """Modules loaded by running the CLI with argv in a fresh interpreter."""
+    code = ("import sys, cli\n"
+            "from click.testing import CliRunner\n"
+            f"{argv!r} and CliRunner().invoke(cli.cli, {argv!r})\n"
+            "print(' '.join(sorted(sys.modules)))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, stdout=subprocess.PIPE, text=True, check=True)
+    return set(out.stdout.split())
+
+
+def test_importing_the_cli_does_not_import_boto3_or_the_managers():
+    modules = _imported_after([])
+    assert "boto3" not in modules and "botocore" not in modules
+    assert not modules & {"ec2_manager", "s3_manager", "route53_manager", "inventory"}
+
+
+def test_a_subcommand_imports_only_its_own_module():
+    modules = _imported_after(["route53", "--help"])
+    assert "route53_manager" in modules
+    assert not modules & {"ec2_manager", "s3_manager"}
+
+
+def test_help_lists_every_lazy_subcommand():
+    out = subprocess.run([sys.executable, "cli.py", "--help"], cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                         stdin=subprocess.DEVNULL, env=dict(os.environ, PLATFORM_CLI_DAEMON="0"), check=True)
+    for name in ("ec2", "s3", "route53", "inventory", "daemon", "shell"):
+        assert f"  {name} " in out.stdout
+
+
+def test_clients_are_shared_per_service_and_region(aws):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = set(map(id, pool.map(lambda _: aws_clients.client("s3"), range(32))))
+    assert len(clients) == 1
+    assert aws_clients.client("s3") is aws_clients.client("s3", "us-east-1")
+    assert aws_clients.client("s3", "eu-west-1") is not aws_clients.client("s3")
+    assert aws_clients.resource("s3").meta.client is aws_clients.client("s3")
@@ -0,0 +1,109 @@
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+from conftest import run_instances
+
+import daemon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("argv, local", [
+    (["shell"], True),
+    (["--output", "jsonl", "daemon", "status"], True),
+    (["ec2", "list"], False),
+    (["ec2", "list", "--watch"], True),
+    (["--fields", "id,state", "ec2", "list", "--until=running"], True),
+    (["--output=csv", "ec2", "list", "--until", "stopped"], True),
+    (["ec2", "create", "--name", "--watch"], False),
+    (["ec2", "create", "--wait-running"], True),
+    (["s3", "upload-file", "--bucket", "b", "--file", "f"], True),
+    (["s3", "sync-dir", "--bucket", "b", "--src", "."], True),
+    (["s3", "list"], False),
+    (["cleanup", "--yes"], True),
+    (["cleanup"], False),
+    (["route53", "import", "--zone-id", "Z", "zone.txt", "--wait"], True),
+    (["route53", "upsert", "--zone-id", "Z"], False),
+    ([], False),
+])
+def test_watches_and_local_only_commands_are_not_forwarded(argv, local):
+    assert daemon._runs_locally(argv) is local
+
+
+@pytest.mark.parametrize("stdin, has_data", [(subprocess.DEVNULL, False), (subprocess.PIPE, True), ("file", True)])
+def test_only_piped_or_file_stdin_keeps_a_command_local(stdin, has_data, tmp_path):
+    if stdin == "file":
+        (tmp_path / "input").write_text("data\n")
+        stdin = open(tmp_path / "input")
+    out = subprocess.run([sys.executable, "-c", "import daemon; print(daemon._stdin_has_data())"],
+                         stdin=stdin, stdout=subprocess.PIPE, text=True, cwd=ROOT)
+    assert out.stdout.strip() == str(has_data)
+
+
+def test_fingerprint_covers_the_user_and_config_files(tmp_path):
+    ini = tmp_path / "config.ini"
+    env = {"USER": "alice", "AWS_REGION": "us-east-1", "PLATFORM_CLI_CONFIG": str(ini)}
+    base = daemon.env_fingerprint(env)
+    assert daemon.env_fingerprint(dict(env, USER="bob")) != base
+    assert daemon.env_fingerprint(dict(env, USERNAME="alice")) != base
+    assert daemon.env_fingerprint(dict(env, PLATFORM_CLI_DAEMON="1", HOSTNAME="x")) == base
+    ini.write_text("[ec2]\n")
+    assert daemon.env_fingerprint(env) != base
+
+
+def test_daemon_caches_keep_entries_written_by_local_runs(tmp_path, monkeypatch):
+    from cache import TTLCache, reload_all
+    monkeypatch.setenv("PLATFORM_CLI_CACHE_DIR", str(tmp_path))
+    warm = TTLCache("uploads", ttl=3600)  # the daemon's copy
+    warm.put("daemon-key", "d")
+    warm.flush()
+    local = TTLCache("uploads", ttl=3600)  # a local run in another process
+    local.put("local-key", "l")
+    local.flush()
+
+    warm.put("another-daemon-key", "d2")
+    warm.invalidate("daemon-key")
+    warm.flush()
+    assert TTLCache("uploads", ttl=3600).get("local-key") == "l"  # merged, not overwritten
+    local.put("late-key", "x")
+    local.flush()
+    assert warm.get("late-key") is None
+    reload_all()
+    assert (warm.get("late-key"), warm.get("daemon-key"), warm.get("another-daemon-key")) == ("x", None, "d2")
+
+
+def _forwarded(argv):
+    """Run argv the way the daemon does; returns (exit code, everything sent to the client)."""
+    server, client = socket.socketpair()
+    with server, client:
+        code = daemon._run(argv, os.getcwd(), server)
+        server.shutdown(socket.SHUT_WR)
+        data = b"".join(iter(lambda: client.recv(65536), b""))
+    return code, data.decode()
+
+
+def test_a_forwarded_prompt_fails_and_asks_for_yes(ec2):
+    ids = run_instances(ec2, 1)
+    code, sent = _forwarded(["ec2", "terminate", "--state", "running"])
+    assert code == 1 and "use --yes" in sent
+    assert ec2.describe_instances(InstanceIds=ids)["Reservations"][0]["Instances"][0]["State"]["Name"] == "running"
+    code, sent = _forwarded(["ec2", "terminate", "--state", "running", "--yes"])
+    assert code == 0 and "use --yes" not in sent
+
+
+def test_dash_arguments_run_locally(monkeypatch, tmp_path):
+    def _request(*args, **kwargs):
+        raise AssertionError("forwarded to the daemon")
+
+    sock = tmp_path / "daemon.sock"
+    sock.touch()
+    monkeypatch.setenv("PLATFORM_CLI_SOCKET", str(sock))
+    monkeypatch.delenv("PLATFORM_CLI_DAEMON")
+    monkeypatch.setattr(daemon, "_stdin_has_data", lambda: False)
+    monkeypatch.setattr(daemon, "_request", _request)
+    assert daemon.maybe_forward(["route53", "import", "--zone-id", "Z1", "-"]) is None
+    with pytest.raises(AssertionError):
+        daemon.maybe_forward(["route53", "import", "--zone-id", "Z1", "zone.txt"])
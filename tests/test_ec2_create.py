@@ -0,0 +1,82 @@
+import botocore.waiter
+import pytest
+from botocore.exceptions import ClientError, WaiterError
+from click.testing import CliRunner
+from conftest import IMAGE_ID
+
+import cli
+import ec2_manager
+
+
+@pytest.fixture
+def create(ec2, monkeypatch):
+    monkeypatch.setattr(ec2_manager, "MAX_RUNNING", 10)
+
+    def _run(*args):
+        return CliRunner().invoke(cli.cli, ["ec2", "create", "--ami", IMAGE_ID, *args])
+    return _run
+
+
+@pytest.fixture
+def create_tags_not_found(ec2, monkeypatch):
+    """create_tags answers InvalidInstanceID.NotFound this many times (per call) before working."""
+    state = {"left": 0, "sleeps": []}
+    monkeypatch.setattr(ec2_manager.time, "sleep", state["sleeps"].append)
+
+    def not_yet(params, **kwargs):
+        if state["left"]:
+            state["left"] -= 1
+            raise ClientError({"Error": {"Code": "InvalidInstanceID.NotFound", "Message": "not found"}}, "CreateTags")
+
+    ec2.meta.events.register("before-parameter-build.ec2.CreateTags", not_yet)
+    yield state
+    ec2.meta.events.unregister("before-parameter-build.ec2.CreateTags", not_yet)
+
+
+def _names(ec2):
+    return sorted(t["Value"] for r in ec2.describe_instances()["Reservations"] for i in r["Instances"]
+                  for t in i.get("Tags", []) if t["Key"] == "Name")
+
+
+def test_fleet_launches_in_one_call_with_templated_names(ec2, create):
+    result = create("--name", "web-{i}", "--count", "3", "--wait-running")
+    assert result.exit_code == 0, result.output
+    assert result.output.count("instance created: i-") == 3 and "running: 3 instance(s)" in result.output
+    assert len(ec2.describe_instances()["Reservations"]) == 1
+    assert _names(ec2) == ["web-1", "web-2", "web-3"]
+
+
+def test_the_guardrail_counts_the_whole_fleet(ec2, create, monkeypatch):
+    monkeypatch.setattr(ec2_manager, "MAX_RUNNING", 2)
+    result = create("--name", "web-{i}", "--count", "3")
+    assert result.exit_code == 1 and "+3 would exceed max=2" in result.output
+    assert not ec2.describe_instances()["Reservations"]
+
+
+def test_name_tags_are_retried_until_the_instances_are_visible(ec2, create, create_tags_not_found):
+    create_tags_not_found["left"] = 2
+    result = create("--name", "web-{i}", "--count", "2", "--wait-running")
+    assert result.exit_code == 0, result.output
+    assert _names(ec2) == ["web-1", "web-2"]
+    # the two NotFound answers may hit one instance twice or each once
+    assert sorted(create_tags_not_found["sleeps"]) in ([0.5, 0.5], [0.5, 1])
+
+
+def test_a_tagging_failure_still_reports_the_launched_ids(ec2, create, create_tags_not_found):
+    create_tags_not_found["left"] = 10 ** 6
+    result = create("--name", "web-{i}", "--count", "2", "--wait-running")
+    assert result.exit_code == 1
+    assert result.output.count("instance created: i-") == 2
+    assert "launched 2 instance(s), Name tagging failed for 2" in result.output
+    assert "error creating instance" not in result.output
+    assert len(create_tags_not_found["sleeps"]) == 2 * len(ec2_manager.TAG_RETRY_DELAYS)
+
+
+def test_wait_running_failure_is_reported(ec2, create, monkeypatch):
+    def gave_up(self, **kwargs):
+        raise WaiterError(name="InstanceRunning", reason="Max attempts exceeded", last_response={})
+
+    monkeypatch.setattr(botocore.waiter.Waiter, "wait", gave_up)
+    result = create("--name", "solo", "--wait-running")
+    assert result.exit_code == 1 and "instance created: i-" in result.output
+    assert "did not reach running" in result.output and "Traceback" not in result.output
@@ -0,0 +1,37 @@
+from click.testing import CliRunner
+from conftest import IMAGE_ID, run_instances
+
+import cli
+import ec2_manager
+
+
+def _create(*args):
+    return CliRunner().invoke(cli.cli, ["ec2", "create", "--name", "pf", *args])
+
+
+def test_guardrail_counts_running_platform_cli_instances(ec2):
+    mine = run_instances(ec2, 3)
+    run_instances(ec2, 2, tags=[{"Key": "CreatedBy", "Value": "terraform"}])
+    ec2.stop_instances(InstanceIds=mine[:1])
+    assert ec2_manager._count_running_cli_instances(regions=["us-east-1"]) == 2
+
+
+def test_every_problem_is_reported_before_anything_is_launched(ec2):
+    run_instances(ec2, 2)
+    result = _create("--ami", "ami-00000000000000000", "--key-name", "nope", "--subnet-id", "subnet-00000000")
+    assert result.exit_code == 1
+    lines = result.output.splitlines()
+    assert lines[1].strip().startswith("guardrail: you already have 2 running/pending")
+    assert {line.strip().split(":")[0] for line in lines[2:]} == {"ami", "network", "key pair"}
+    assert sum(len(r["Instances"]) for r in ec2.describe_instances()["Reservations"]) == 2
+
+
+def test_security_groups_must_be_in_the_subnets_vpc(ec2, monkeypatch):
+    monkeypatch.setattr(ec2_manager, "MAX_RUNNING", 10)
+    vpc = ec2.create_vpc(CidrBlock="10.1.0.0/16")["Vpc"]["VpcId"]
+    subnet = ec2.create_subnet(VpcId=vpc, CidrBlock="10.1.0.0/24")["Subnet"]["SubnetId"]
+    other = ec2.create_vpc(CidrBlock="10.2.0.0/16")["Vpc"]["VpcId"]
+    sg = ec2.create_security_group(GroupName="pf", Description="pf", VpcId=other)["GroupId"]
+    result = _create("--ami", IMAGE_ID, "--subnet-id", subnet, "--sg-id", sg)
+    assert result.exit_code == 1 and f"{sg} are not in {subnet}'s VPC {vpc}" in result.output
+    assert not ec2.describe_instances()["Reservations"]
@@ -0,0 +1,108 @@
+import json
+
+from click.testing import CliRunner
+from conftest import CLI_TAGS, run_instances
+
+import cli
+from ec2_watch import Watcher
+
+
+class Steps:
+    """Injected sleep: runs one scripted change per poll instead of waiting."""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.delays = []
+
+    def __call__(self, delay):
+        self.delays.append(delay)
+        if self.steps:
+            self.steps.pop(0)()
+
+
+def test_until_reached(ec2):
+    ids = run_instances(ec2, 2)
+    sleep = Steps(lambda: ec2.stop_instances(InstanceIds=ids[:1]), lambda: ec2.stop_instances(InstanceIds=ids[1:]))
+    w = Watcher(ec2, ids=ids, until="stopped", sleep=sleep)
+    events = list(w.events())
+    assert w.outcome == "reached" and w.failed == []
+    assert [e["event"] for e in events if e["event"] != "public_ip"] == ["new", "new", "state", "state"]
+    assert [(e["id"], e["old"], e["new"]) for e in events if e["event"] == "state"] == [
+        (ids[0], "running", "stopped"), (ids[1], "running", "stopped")]
+    assert w.polls == 3
+
+
+def test_until_failed_when_an_instance_terminates(ec2):
+    ids = run_instances(ec2, 2)
+    w = Watcher(ec2, ids=ids, until="stopped",
+                sleep=Steps(lambda: (ec2.stop_instances(InstanceIds=ids[:1]),
+                                     ec2.terminate_instances(InstanceIds=ids[1:]))))
+    list(w.events())
+    assert w.outcome == "failed" and w.failed == ids[1:]
+
+
+def test_polls_back_off_while_nothing_changes(ec2):
+    ids = run_instances(ec2)
+    sleep = Steps(*[lambda: None] * 5, lambda: ec2.stop_instances(InstanceIds=ids))
+    w = Watcher(ec2, ids=ids, until="stopped", interval=1, max_interval=8, sleep=sleep)
+    list(w.events())
+    assert sleep.delays == [1, 2, 4, 8, 8, 8]  # the first poll's "new" events count as a change
+
+
+def test_timeout(ec2):
+    ids = run_instances(ec2)
+    w = Watcher(ec2, ids=ids, until="stopped", interval=0.01, timeout=0.05)
+    list(w.events())
+    assert w.outcome == "timeout"
+
+
+def test_filters_watch_reports_new_and_gone(ec2):
+    filters = [{"Name": "tag:CreatedBy", "Values": ["platform-cli"]},
+               {"Name": "instance-state-name", "Values": ["pending", "running"]}]
+    first = run_instances(ec2)
+    later = []
+
+    def _launch():
+        later.extend(run_instances(ec2))
+
+    w = Watcher(ec2, filters=filters, sleep=Steps(_launch, lambda: ec2.stop_instances(InstanceIds=first)))
+    events = w.events()
+    seen = [next(events), next(events), next(events)]
+    assert [(e["event"], e["id"]) for e in seen] == [("new", first[0]), ("new", later[0]), ("gone", first[0])]
+
+
+def test_nothing_to_wait_for(ec2):
+    run_instances(ec2, tags=[{"Key": "CreatedBy", "Value": "someone-else"}] + CLI_TAGS[1:])
+    w = Watcher(ec2, filters=[{"Name": "tag:CreatedBy", "Values": ["platform-cli"]}], until="running",
+                sleep=Steps())
+    assert list(w.events()) == []
+    assert w.outcome == "none"
+
+
+def test_unknown_ids_are_retried_until_the_timeout(ec2):
+    ids = run_instances(ec2)
+    ghost = "i-0123456789abcdef0"  # e.g. just launched, not visible to describe_instances yet
+    w = Watcher(ec2, ids=ids + [ghost], until="stopped", interval=0.01, timeout=0.2,
+                sleep=Steps(lambda: ec2.stop_instances(InstanceIds=ids)))
+    events = list(w.events())
+    assert w.outcome == "timeout" and w.missing == [ghost]
+    seen = [(e["event"], e["id"]) for e in events if e["event"] in ("new", "state")]
+    assert seen == [("new", ids[0]), ("state", ids[0])]
+    assert w.polls > 2
+
+
+def test_watch_jsonl_events_carry_the_public_ip(ec2):
+    ids = run_instances(ec2)
+    result = CliRunner().invoke(cli.cli, ["--output", "jsonl", "ec2", "list", "--id", ids[0], "--until", "running"])
+    assert result.exit_code == 0, result.output
+    event = json.loads(result.stdout.splitlines()[0])
+    assert event["event"] == "new" and event["new"] == "running" and event["public_ip"]
+
+
+def test_timeout_reports_instances_that_terminated(ec2):
+    ids = run_instances(ec2, 2)
+    ec2.terminate_instances(InstanceIds=ids[:1])
+    result = CliRunner().invoke(cli.cli, ["ec2", "list", "--id", ids[0], "--id", ids[1], "--until", "stopped",
+                                          "--interval", "0.5", "--timeout", "1s"])
+    assert result.exit_code == 1
+    assert f"timed out waiting for stopped (terminated: {ids[0]})" in result.output
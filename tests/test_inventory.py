@@ -0,0 +1,216 @@
+import json
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from click.testing import CliRunner
+from conftest import CLI_TAGS, OWNER, run_instances
+
+import cli
+import inventory
+import route53_records
+import s3_manager
+
+
+@pytest.fixture
+def bucket_lookups(aws, monkeypatch):
+    calls, fetch = [], s3_manager._fetch_bucket_tags
+
+    def counting(name, region=None):
+        calls.append(name)
+        return fetch(name, region)
+
+    monkeypatch.setattr(s3_manager, "_fetch_bucket_tags", counting)
+    return calls
+
+
+@pytest.fixture
+def zone_lookups(r53):
+    """Zone IDs passed to list_tags_for_resources; IDs in `refuse` make the call fail."""
+    calls = {"ids": [], "refuse": set()}
+
+    def record(params, **kwargs):
+        calls["ids"].extend(params["ResourceIds"])
+        if calls["refuse"] & set(params["ResourceIds"]):
+            raise ClientError({"Error": {"Code": "Throttling", "Message": "slow down"}}, "ListTagsForResources")
+
+    r53.meta.events.register("before-parameter-build.route53.ListTagsForResources", record)
+    yield calls
+    r53.meta.events.unregister("before-parameter-build.route53.ListTagsForResources", record)
+
+
+def _zone(r53, name):
+    zid = r53.create_hosted_zone(Name=name, CallerReference=name)["HostedZone"]["Id"].split("/")[-1]
+    r53.change_tags_for_resource(ResourceType="hostedzone", ResourceId=zid, AddTags=CLI_TAGS)
+    return zid
+
+
+def _zone_row(zid):
+    [row] = [r for r in inventory.query_zones() if r["id"] == zid]
+    return row
+
+
+def test_instances_are_only_rewritten_when_they_change(ec2):
+    ids = run_instances(ec2, 3)
+    assert inventory.refresh_instances() == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+    assert inventory.refresh_instances()["unchanged"] == 3
+    ec2.stop_instances(InstanceIds=ids[:1])
+    assert inventory.refresh_instances() == {"added": 0, "updated": 1, "removed": 0, "unchanged": 2}
+    assert [r["id"] for r in inventory.query_instances(owner=OWNER, state="stopped")] == ids[:1]
+
+
+def test_an_unreachable_service_is_reported_and_the_others_refresh(s3, monkeypatch):
+    def unreachable(full=False, regions=None):
+        raise EndpointConnectionError(endpoint_url="https://ec2.nowhere-1.amazonaws.com")
+
+    monkeypatch.setitem(inventory.REFRESHERS, "ec2", unreachable)
+    s3.create_bucket(Bucket="inventory-bucket")
+    results = inventory.refresh()
+    assert "Could not connect" in results["ec2"]
+    assert results["s3"]["added"] == 1 and isinstance(results["route53"], dict)
+
+
+def test_bucket_tags_are_read_once_until_they_age(s3, bucket_lookups, monkeypatch):
+    for name in ("inv-one", "inv-two"):
+        s3.create_bucket(Bucket=name)
+        s3.put_bucket_tagging(Bucket=name, Tagging={"TagSet": CLI_TAGS})
+    assert inventory.refresh_buckets()["added"] == 2
+    assert inventory.refresh_buckets()["unchanged"] == 2
+    assert len(bucket_lookups) == 2
+
+    monkeypatch.setattr(inventory, "TAGS_MAX_AGE", -1)
+    assert inventory.refresh_buckets()["unchanged"] == 2
+    assert len(bucket_lookups) == 4
+
+    s3.delete_bucket(Bucket="inv-two")
+    assert inventory.refresh_buckets()["removed"] == 1
+    assert [b["name"] for b in inventory.query_buckets(owner=OWNER)] == ["inv-one"]
+
+
+def test_zone_tags_are_only_read_for_new_or_changed_zones(r53, zone_lookups):
+    first, second = _zone(r53, "one.example.com"), _zone(r53, "two.example.com")
+    assert inventory.refresh_zones()["added"] == 2
+    assert inventory.refresh_zones()["unchanged"] == 2
+    assert sorted(zone_lookups["ids"]) == sorted([first, second])
+
+    www = {"Name": "www.two.example.com.", "Type": "A", "TTL": 60, "ResourceRecords": [{"Value": "10.0.0.1"}]}
+    r53.change_resource_record_sets(HostedZoneId=second,
+                                    ChangeBatch={"Changes": [{"Action": "CREATE", "ResourceRecordSet": www}]})
+    assert inventory.refresh_zones() == {"added": 0, "updated": 1, "removed": 0, "unchanged": 1}
+    assert zone_lookups["ids"][2:] == [second]
+    assert [z["owner"] for z in inventory.query_zones(owner=OWNER)] == [OWNER, OWNER]
+
+
+def test_zone_tags_past_the_max_age_are_read_again(r53, zone_lookups, monkeypatch):
+    zid = _zone(r53, "aged.example.com")
+    inventory.refresh_zones()
+    monkeypatch.setattr(inventory, "TAGS_MAX_AGE", -1)
+    r53.change_tags_for_resource(ResourceType="hostedzone", ResourceId=zid,
+                                 AddTags=[{"Key": "Owner", "Value": "someone-else"}])
+    assert inventory.refresh_zones()["updated"] == 1
+    assert _zone_row(zid)["owner"] == "someone-else"
+
+
+def test_a_failed_zone_tag_lookup_is_retried_not_stored_as_untagged(r53, zone_lookups):
+    zid = _zone(r53, "flaky.example.com")
+    zone_lookups["refuse"].add(zid)
+    assert inventory.refresh_zones()["added"] == 1
+    row = _zone_row(zid)
+    assert row["tags"] is None and row["owner"] is None
+
+    zone_lookups["refuse"].clear()
+    assert inventory.refresh_zones()["updated"] == 1
+    row = _zone_row(zid)
+    assert row["owner"] == OWNER and json.loads(row["tags"])["CreatedBy"] == "platform-cli"
+
+
+def test_a_failed_lookup_keeps_the_tags_already_known(r53, zone_lookups, monkeypatch):
+    zid = _zone(r53, "known.example.com")
+    inventory.refresh_zones()
+    monkeypatch.setattr(inventory, "TAGS_MAX_AGE", -1)
+    zone_lookups["refuse"].add(zid)
+    assert inventory.refresh_zones()["unchanged"] == 1
+    assert _zone_row(zid)["owner"] == OWNER
+
+
+def test_cached_zone_listing_survives_unread_tags(r53, zone_lookups):
+    zone_lookups["refuse"].add(_zone(r53, "cached.example.com"))
+    inventory.refresh_zones()
+    result = CliRunner().invoke(cli.cli, ["route53", "list-zones", "--cached", "--output", "jsonl",
+                                          "--fields", "name,owner,tags"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {"name": "cached.example.com.", "owner": None, "tags": {}}
+
+
+def _upsert(zid, name, rtype, *values, ttl=300):
+    rr = {"Name": name, "Type": rtype, "TTL": ttl, "ResourceRecords": [{"Value": v} for v in values]}
+    route53_records.submit_changes(zid, [{"Action": "UPSERT", "ResourceRecordSet": rr}])
+
+
+@pytest.fixture
+def indexed(r53, monkeypatch):
+    """Two zones with records; `scans` lists the zone IDs each index_records call rescanned."""
+    scans, scan = [], inventory._scan_zone
+
+    def counting(zone_id):
+        scans.append(zone_id)
+        return scan(zone_id)
+
+    monkeypatch.setattr(inventory, "_scan_zone", counting)
+    api, web = _zone(r53, "api.example.com"), _zone(r53, "web.example.org")
+    _upsert(api, "v1.api.example.com", "A", "10.0.3.4")
+    _upsert(api, "v2.api.example.com", "CNAME", "lb.web.example.org")
+    _upsert(web, "lb.web.example.org", "A", "10.0.3.4", "10.0.3.5")
+    _upsert(web, "web.example.org", "MX", "10 mail.web.example.org")
+    inventory.index_records()
+    scans.clear()
+    return {"api": api, "web": web, "scans": scans}
+
+
+def _find(*args):
+    result = CliRunner().invoke(cli.cli, ["--output", "jsonl", "route53", "find", *args])
+    assert result.exit_code == 0, result.output
+    return [json.loads(line) for line in result.stdout.splitlines()]
+
+
+def test_find_by_name_value_and_type_across_zones(indexed):
+    assert [(r["name"], r["zone"]) for r in _find("--name-glob", "*.API.*")] == [
+        ("v1.api.example.com.", "api.example.com."), ("v2.api.example.com.", "api.example.com.")]
+    assert [(r["name"], r["type"]) for r in _find("--value", "10.0.3.4")] == [
+        ("lb.web.example.org.", "A"), ("v1.api.example.com.", "A")]
+    assert [r["name"] for r in _find("--value", "lb.web.example.org")] == ["v2.api.example.com."]
+    assert [r["name"] for r in _find("--value", "mail.web.example.org.", "--type", "mx")] == ["web.example.org."]
+    assert indexed["scans"] == []  # nothing changed since the fixture indexed both zones
+
+
+def test_changes_submitted_by_the_cli_rescan_only_that_zone(indexed):
+    _upsert(indexed["api"], "v1.api.example.com", "A", "10.0.9.9")  # same record count, new value
+    assert [r["name"] for r in _find("--value", "10.0.9.9")] == ["v1.api.example.com."]
+    assert indexed["scans"] == [indexed["api"]]
+    assert inventory.index_records()["rescanned"] == 0
+
+
+def test_outside_changes_are_picked_up_by_count_or_max_age(r53, indexed):
+    r53.change_resource_record_sets(HostedZoneId=indexed["web"], ChangeBatch={"Changes": [{
+        "Action": "CREATE", "ResourceRecordSet": {"Name": "new.web.example.org", "Type": "A", "TTL": 60,
+                                                  "ResourceRecords": [{"Value": "10.1.1.1"}]}}]})
+    assert inventory.index_records()["rescanned"] == 1 and indexed["scans"] == [indexed["web"]]
+    assert inventory.index_records(max_age=0)["rescanned"] == 2
+
+
+def test_a_zone_that_cannot_be_scanned_is_counted_as_failed(indexed, monkeypatch):
+    def unreachable(zone_id):
+        raise EndpointConnectionError(endpoint_url="https://route53.amazonaws.com")
+
+    monkeypatch.setattr(inventory, "_scan_zone", unreachable)
+    assert inventory.index_records(max_age=0) == {"zones": 2, "rescanned": 0, "removed": 0, "failed": 2}
+
+
+def test_deleted_zones_leave_the_index_and_cached_search_skips_route53(r53, indexed):
+    for rr in r53.list_resource_record_sets(HostedZoneId=indexed["web"])["ResourceRecordSets"]:
+        if rr["Type"] not in ("SOA", "NS"):
+            r53.change_resource_record_sets(HostedZoneId=indexed["web"],
+                                            ChangeBatch={"Changes": [{"Action": "DELETE", "ResourceRecordSet": rr}]})
+    r53.delete_hosted_zone(Id=indexed["web"])
+    assert len(_find("--cached", "--value", "10.0.3.4")) == 2  # the index as it was
+    assert [r["name"] for r in _find("--value", "10.0.3.4")] == ["v1.api.example.com."]
+    assert indexed["scans"] == []
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+import warnings
+
+import pytest
+from click.testing import CliRunner
+from conftest import run_instances
+
+import cli
+from output import Emitter
+
+ROWS = [{"id": "a", "n": 1, "tags": {"k": "v"}, "when": None}, {"id": "b", "n": 2, "tags": {}, "when": "x"}]
+FIELDS = ("id", "n", "tags", "when")
+
+
+def _emit(capsys, *args, **kwargs):
+    out = Emitter(*args, **kwargs)
+    for row in ROWS:
+        out.emit(row)
+    out.finish(empty_message="nothing")
+    return capsys.readouterr().out
+
+
+def test_jsonl_keeps_only_the_requested_fields(capsys):
+    lines = _emit(capsys, "jsonl", "id,tags", ("id",), FIELDS).splitlines()
+    assert [json.loads(line) for line in lines] == [{"id": "a", "tags": {"k": "v"}}, {"id": "b", "tags": {}}]
+
+
+def test_csv_has_a_header_even_without_rows(capsys):
+    text = _emit(capsys, "csv", None, ("id", "tags", "when"), FIELDS)
+    assert list(csv.reader(io.StringIO(text))) == [["id", "tags", "when"], ["a", '{"k": "v"}', ""], ["b", "{}", "x"]]
+    Emitter("csv", None, ("id",), FIELDS).finish(empty_message="nothing")
+    assert capsys.readouterr().out == "id\n"
+
+
+def test_text_uses_the_command_format_unless_fields_are_given(capsys):
+    assert _emit(capsys, "text", None, ("id",), FIELDS, text=lambda r: f"<{r['id']}>") == "<a>\n<b>\n"
+    assert _emit(capsys, "text", "id,when", ("id",), FIELDS, text=lambda r: "unused") == "a\t-\nb\tx\n"
+
+
+def test_empty_message_is_for_text_only(capsys):
+    Emitter("text", None, ("id",), FIELDS).finish(empty_message="nothing")
+    Emitter("jsonl", None, ("id",), FIELDS).finish(empty_message="nothing")
+    assert capsys.readouterr().out == "nothing\n"
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(Exception, match="unknown field"):
+        Emitter("jsonl", "id,nope", ("id",), FIELDS)
+
+
+def test_global_options_apply_to_list_commands(ec2):
+    ids = run_instances(ec2, 2, name="out")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = CliRunner().invoke(cli.cli, ["--output", "csv", "--fields", "id,name", "ec2", "list"])
+    assert result.exit_code == 0, result.output
+    rows = list(csv.reader(io.StringIO(result.stdout)))
+    assert rows[0] == ["id", "name"] and sorted(rows[1:]) == sorted([i, "out"] for i in ids)
@@ -0,0 +1,113 @@
+import boto3
+import pytest
+from botocore.awsrequest import AWSResponse
+
+import config
+import ratelimit
+
+SLOW_DOWN = (b'<?xml version="1.0" encoding="UTF-8"?><Error><Code>SlowDown</Code>'
+             b'<Message>Please reduce your request rate.</Message></Error>')
+
+
+class _Raw:
+    """Raw HTTP body for a canned botocore response."""
+
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **kwargs):
+        yield self._body
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class CountingBucket:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        return 0.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def limited_s3(aws, monkeypatch):
+    """A fresh instrumented S3 client whose token bucket counts acquisitions."""
+    bucket = CountingBucket()
+    monkeypatch.setattr(ratelimit, "_buckets", {("s3", "us-east-1"): bucket})
+    monkeypatch.setattr(ratelimit, "_stats", {})
+    client = boto3.client("s3", region_name="us-east-1")
+    ratelimit.instrument(client, "s3", "us-east-1")
+    client.create_bucket(Bucket="limited-bucket")
+    bucket.acquired = 0
+    ratelimit._stats.clear()
+    return client, bucket
+
+
+def test_token_bucket_allows_a_burst_then_paces(clock):
+    bucket = ratelimit.TokenBucket(rate=10, burst=2)
+    assert [bucket.acquire() for _ in range(2)] == [0, 0]
+    assert bucket.acquire() == pytest.approx(0.1)
+    clock.now += 1  # idle time refills up to the burst, not beyond
+    assert [bucket.acquire() for _ in range(3)] == pytest.approx([0, 0, 0.1])
+
+
+def test_rate_lookup_order(tmp_path, monkeypatch):
+    ini = tmp_path / "config.ini"
+    ini.write_text("[rate_limits]\nec2 = 7\nec2.eu-west-1 = 3\n")
+    monkeypatch.setenv("PLATFORM_CLI_CONFIG", str(ini))
+    monkeypatch.setattr(config, "_parser", None)
+    monkeypatch.delenv("PLATFORM_CLI_RATE_EC2", raising=False)
+    assert ratelimit.rate_for("ec2", "us-east-1") == 7
+    assert ratelimit.rate_for("ec2", "eu-west-1") == 3
+    assert ratelimit.rate_for("sts", "us-east-1") == ratelimit.DEFAULT_RATES["sts"]
+    monkeypatch.setenv("PLATFORM_CLI_RATE_EC2", "11")
+    assert ratelimit.rate_for("ec2", "eu-west-1") == 11
+
+
+def test_route53_shares_one_bucket_across_regions():
+    assert ratelimit._key("route53", "us-east-1") == ratelimit._key("route53", "eu-west-1") == ("route53", "global")
+    assert ratelimit._key("ec2", "us-east-1") != ratelimit._key("ec2", "eu-west-1")
+
+
+def test_object_operations_bypass_the_bucket_limiter(limited_s3):
+    client, bucket = limited_s3
+    client.put_object(Bucket="limited-bucket", Key="k", Body=b"x")
+    client.get_object(Bucket="limited-bucket", Key="k")["Body"].read()
+    assert bucket.acquired == 0
+    client.get_bucket_location(Bucket="limited-bucket")
+    assert bucket.acquired == 1
+    assert ratelimit.stats()[("s3", "us-east-1")]["calls"] == 3
+
+
+def test_throttles_are_counted_and_retried(limited_s3):
+    client, _ = limited_s3
+    answers = [503, 503]
+
+    def slow_down(request, **kwargs):
+        if answers:
+            answers.pop()
+            return AWSResponse(request.url, 503, {}, _Raw(SLOW_DOWN))
+        return None
+
+    client.meta.events.register("before-send.s3.GetBucketLocation", slow_down)
+    client.get_bucket_location(Bucket="limited-bucket")
+    s = ratelimit.stats()[("s3", "us-east-1")]
+    assert (s["calls"], s["throttles"], s["errors"]) == (3, 2, 0)
+    assert s["backoff"] > 0
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+from click.testing import CliRunner
+from conftest import CLI_TAGS, IMAGE_ID, OWNER
+
+import aws_clients
+import cleanup
+import cli
+import ec2_manager
+import regions
+
+
+@pytest.fixture
+def two_regions(ec2):
+    """One platform-cli instance in us-east-1 and two in eu-west-1."""
+    def launch(region, count):
+        resp = aws_clients.client("ec2", region).run_instances(
+            ImageId=IMAGE_ID, MinCount=count, MaxCount=count, InstanceType="t3.micro",
+            TagSpecifications=[{"ResourceType": "instance", "Tags": CLI_TAGS}])
+        return [i["InstanceId"] for i in resp["Instances"]]
+    return {"us-east-1": launch("us-east-1", 1), "eu-west-1": launch("eu-west-1", 2)}
+
+
+def test_resolve_regions(aws, monkeypatch):
+    monkeypatch.setattr(regions._regions_cache, "_data", {})
+    assert regions.resolve_regions() == ["us-east-1"]
+    assert regions.resolve_regions(regions="eu-west-1, us-west-2,") == ["eu-west-1", "us-west-2"]
+    assert "eu-west-1" in regions.resolve_regions(all_regions=True)
+
+
+def test_enabled_regions_are_discovered_once(aws, monkeypatch):
+    monkeypatch.setattr(regions._regions_cache, "_data", {})
+    calls = []
+
+    def record(**kwargs):
+        calls.append(kwargs["event_name"])
+
+    events = aws_clients.client("ec2").meta.events
+    events.register("before-call.ec2.DescribeRegions", record)
+    try:
+        assert regions.enabled_regions() == regions.enabled_regions()
+        regions.enabled_regions(refresh=True)
+    finally:
+        events.unregister("before-call.ec2.DescribeRegions", record)
+    assert len(calls) == 2
+
+
+def test_fan_out_streams_results_as_regions_complete():
+    slow_may_finish = threading.Event()
+
+    def scan(region):
+        if region == "slow-1":
+            assert slow_may_finish.wait(5)
+        if region == "broken-1":
+            raise RuntimeError("unreachable")
+        return region.upper()
+
+    seen = []
+    for region, result, error in regions.fan_out(["slow-1", "fast-1", "broken-1"], scan):
+        seen.append((region, result, type(error).__name__ if error else None))
+        if len(seen) == 2:
+            slow_may_finish.set()  # the slow region only finishes after the others were yielded
+    assert seen[-1] == ("slow-1", "SLOW-1", None)
+    assert sorted(seen[:2]) == [("broken-1", None, "RuntimeError"), ("fast-1", "FAST-1", None)]
+
+
+def test_list_across_regions_adds_a_region_column(two_regions):
+    result = CliRunner().invoke(cli.cli, ["ec2", "list", "--regions", "us-east-1,eu-west-1"])
+    assert result.exit_code == 0, result.output
+    lines = [line for line in result.output.splitlines() if "\ti-" in line]
+    assert sorted(line.split("\t")[0] for line in lines) == ["eu-west-1", "eu-west-1", "us-east-1"]
+
+
+def test_guardrail_and_cleanup_see_every_region(two_regions):
+    assert ec2_manager._count_running_cli_instances(regions=["us-east-1"]) == 1
+    assert ec2_manager._count_running_cli_instances(regions=["us-east-1", "eu-west-1"]) == 3
+    found = cleanup.discover_ec2(OWNER, None, None, regions=["us-east-1", "eu-west-1"], log=None)
+    assert sorted((e["region"], e["id"]) for e in found) == sorted(
+        (region, iid) for region, ids in two_regions.items() for iid in ids)
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import cli
+import route53_records
+from route53_records import MAX_BATCH_RECORDS, MAX_BATCH_VALUE_CHARS, pack_change_batches
+
+
+def _change(action, name, values):
+    return {"Action": action, "ResourceRecordSet": {
+        "Name": name, "Type": "TXT", "TTL": 60, "ResourceRecords": [{"Value": v} for v in values]}}
+
+
+def test_pack_fills_batches_up_to_the_record_limit():
+    changes = [_change("CREATE", f"r{i}.example.com.", ["x"]) for i in range(MAX_BATCH_RECORDS * 2 + 5)]
+    batches = list(pack_change_batches(iter(changes)))
+    assert [len(b) for b in batches] == [MAX_BATCH_RECORDS, MAX_BATCH_RECORDS, 5]
+    assert [c for b in batches for c in b] == changes
+
+
+def test_pack_counts_upserts_twice():
+    changes = [_change("UPSERT", f"r{i}.example.com.", ["x"]) for i in range(MAX_BATCH_RECORDS)]
+    assert [len(b) for b in pack_change_batches(changes)] == [MAX_BATCH_RECORDS // 2] * 2
+
+
+def test_pack_respects_the_value_character_limit():
+    value = "v" * 1000
+    changes = [_change("DELETE", f"r{i}.example.com.", [value]) for i in range(40)]
+    batches = list(pack_change_batches(changes))
+    per_batch = MAX_BATCH_VALUE_CHARS // len(value)
+    assert [len(b) for b in batches] == [per_batch, 40 - per_batch]
+
+
+def test_pack_sends_an_oversized_change_on_its_own():
+    big = _change("CREATE", "big.example.com.", ["x"] * (MAX_BATCH_RECORDS + 1))
+    small = _change("CREATE", "small.example.com.", ["x"])
+    assert list(pack_change_batches([small, big, small])) == [[small], [big], [small]]
+
+
+def test_pack_of_nothing_is_no_batches():
+    assert list(pack_change_batches([])) == []
+
+
+def test_submit_changes_sends_packed_batches(r53):
+    zone_id = r53.create_hosted_zone(Name="example.com", CallerReference="t")["HostedZone"]["Id"].split("/")[-1]
+    changes = (_change("CREATE", f"r{i}.example.com.", ['"x"']) for i in range(MAX_BATCH_RECORDS + 1))
+    infos = route53_records.submit_changes(zone_id, changes)
+    assert len(infos) == 2
+    names = {rr["Name"] for rr in route53_records.iter_non_default_records(zone_id)}
+    assert len(names) == MAX_BATCH_RECORDS + 1
+
+
+def test_delete_zone_force_purges_a_zone_larger_than_one_page(r53):
+    zone_id = r53.create_hosted_zone(Name="big.example.com", CallerReference="big")["HostedZone"]["Id"]
+    zone_id = zone_id.split("/")[-1]
+    route53_records.submit_changes(zone_id, [_change("CREATE", f"r{i}.big.example.com.", ['"x"']) for i in range(650)])
+    calls = []
+
+    def record(params, **kwargs):
+        calls.append(len(params["ChangeBatch"]["Changes"]))
+
+    r53.meta.events.register("before-parameter-build.route53.ChangeResourceRecordSets", record)
+    try:
+        result = CliRunner().invoke(cli.cli, ["route53", "delete-zone", "--zone-id", zone_id, "--force"])
+    finally:
+        r53.meta.events.unregister("before-parameter-build.route53.ChangeResourceRecordSets", record)
+    assert result.exit_code == 0 and "hosted zone deleted" in result.output, result.output
+    assert calls == [650]  # every record set in one packed batch, across 3 listing pages
+    assert not r53.list_hosted_zones()["HostedZones"]
+
+
+@pytest.mark.parametrize("item", [
+    {"name": "a", "type": "A"},
+    {"name": "a", "type": "A", "values": []},
+    {"name": "a", "type": "A", "value": None},
+    {"Name": "a", "Type": "A", "TTL": 60},
+])
+def test_spec_without_values_or_alias_is_rejected(item):
+    with pytest.raises(ValueError):
+        route53_records.spec_to_record_set(item, "example.com")
+
+
+def test_spec_to_record_set():
+    rr = route53_records.spec_to_record_set({"name": "www", "type": "a", "values": ["10.0.0.1"], "ttl": 60},
+                                            "example.com")
+    assert rr == {"Name": "www.example.com.", "Type": "A", "TTL": 60, "ResourceRecords": [{"Value": "10.0.0.1"}]}
+
+
+def test_sync_leaves_the_apex_soa_and_ns_of_an_exported_spec_alone(r53, tmp_path):
+    zone_id = r53.create_hosted_zone(Name="sync.example.com", CallerReference="sync")["HostedZone"]["Id"]
+    listed = r53.list_resource_record_sets(HostedZoneId=zone_id)["ResourceRecordSets"]
+    assert {rr["Type"] for rr in listed} == {"SOA", "NS"}
+    spec = tmp_path / "records.json"
+    spec.write_text(json.dumps(listed + [{"name": "www", "type": "A", "values": ["10.0.0.1"]}]))
+
+    def sync():
+        result = CliRunner().invoke(cli.cli, ["route53", "sync", "--zone-id", zone_id, "--file", str(spec)])
+        assert result.exit_code == 0 and "error" not in result.output, result.output
+        return result.output
+
+    first = sync()
+    assert "2 apex SOA/NS record set(s) in the file skipped" in first and "1 to create, 0 to update" in first
+    assert "zone is in sync" in sync()
+
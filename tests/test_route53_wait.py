@@ -0,0 +1,65 @@
+import pytest
+from click.testing import CliRunner
+
+import cli
+import route53_records
+
+
+class FakeRoute53:
+    """get_change answers PENDING `pending[id]` times, then INSYNC."""
+
+    def __init__(self, pending):
+        self.pending = dict(pending)
+        self.polls = []
+
+    def get_change(self, Id):
+        self.polls.append(Id)
+        left = self.pending[Id]
+        self.pending[Id] = left - 1
+        return {"ChangeInfo": {"Id": f"/change/{Id}", "Status": "PENDING" if left > 0 else "INSYNC"}}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(route53_records.time, "sleep", delays.append)
+    return delays
+
+
+def _fake(monkeypatch, pending):
+    fake = FakeRoute53(pending)
+    monkeypatch.setattr(route53_records, "_r53", lambda: fake)
+    return fake
+
+
+def test_changes_already_insync_are_not_polled(monkeypatch, sleeps):
+    fake = _fake(monkeypatch, {})
+    route53_records.wait_for_changes([{"Id": "/change/C1", "Status": "INSYNC"}])
+    assert fake.polls == [] and sleeps == []
+
+
+def test_pending_changes_are_polled_together_with_backoff(monkeypatch, sleeps):
+    fake = _fake(monkeypatch, {"C1": 0, "C2": 2, "C3": 4})
+    route53_records.wait_for_changes([{"Id": "/change/C1", "Status": "PENDING"}, "/change/C2", "C3"])
+    assert sleeps == pytest.approx([1.0, 1.6, 2.56, 4.096])
+    assert sorted(fake.polls) == ["C1"] + ["C2"] * 3 + ["C3"] * 5  # one round polls every pending ID
+
+
+def test_backoff_is_capped(monkeypatch, sleeps):
+    _fake(monkeypatch, {"C1": 12})
+    route53_records.wait_for_changes(["C1"], timeout=10 ** 6)
+    assert max(sleeps) == route53_records.WAIT_MAX_DELAY and len(sleeps) == 12
+
+
+def test_wait_gives_up_after_the_timeout(monkeypatch, sleeps):
+    _fake(monkeypatch, {"C1": 10 ** 6})
+    with pytest.raises(TimeoutError, match="1 Route53 change"):
+        route53_records.wait_for_changes(["C1"], timeout=0.5)
+
+
+def test_upsert_wait_reports_propagation(r53):
+    zone_id = r53.create_hosted_zone(Name="wait.example.com", CallerReference="wait")["HostedZone"]["Id"]
+    result = CliRunner().invoke(cli.cli, ["route53", "upsert", "--zone-id", zone_id, "--record", "www.wait.example.com",
+                                          "--type", "A", "--value", "10.0.0.1", "--wait"])
+    assert result.exit_code == 0, result.output
+    assert "record upserted" in result.output and "propagated: change INSYNC after" in result.output
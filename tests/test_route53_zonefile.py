@@ -0,0 +1,134 @@
+import warnings
+
+import pytest
+from click.testing import CliRunner
+
+import cli
+import route53_records
+from route53_zonefile import iter_export, iter_import_record_sets, iter_zone_records
+
+ZONE = """\
+$ORIGIN example.com.
+$TTL 1h
+@       IN SOA ns1.example.com. hostmaster.example.com. ( 2024010101 ; serial
+                                7200 3600 1209600 300 )
+@          NS    ns1.example.net.
+www     300 IN A  10.0.0.1
+            IN A  10.0.0.2
+mail        MX 10 mx1
+txt         TXT   "v=spf1 -all; not a comment" second
+sub.example.com. 60 CNAME www
+$ORIGIN dev.example.com.
+api         AAAA  ::1
+"""
+
+
+def test_zone_records_resolve_names_ttls_and_continuations():
+    records = [r[1:] for r in iter_zone_records(ZONE.splitlines(), "example.com.")]
+    assert records == [
+        ("example.com.", 3600, "SOA", "ns1.example.com. hostmaster.example.com. 2024010101 7200 3600 1209600 300"),
+        ("example.com.", 3600, "NS", "ns1.example.net."),
+        ("www.example.com.", 300, "A", "10.0.0.1"),
+        ("www.example.com.", 3600, "A", "10.0.0.2"),
+        ("mail.example.com.", 3600, "MX", "10 mx1.example.com."),
+        ("txt.example.com.", 3600, "TXT", '"v=spf1 -all; not a comment" "second"'),
+        ("sub.example.com.", 60, "CNAME", "www.example.com."),
+        ("api.dev.example.com.", 3600, "AAAA", "::1"),
+    ]
+
+
+def test_import_groups_record_sets_and_skips_the_apex():
+    counts = {}
+    sets = list(iter_import_record_sets(ZONE.splitlines(), "example.com.", counts))
+    assert [(rr["Name"], rr["Type"]) for rr in sets] == [
+        ("www.example.com.", "A"), ("mail.example.com.", "MX"), ("txt.example.com.", "TXT"),
+        ("sub.example.com.", "CNAME"), ("api.dev.example.com.", "AAAA")]
+    www = sets[0]
+    assert www["TTL"] == 300 and www["ResourceRecords"] == [{"Value": "10.0.0.1"}, {"Value": "10.0.0.2"}]
+    assert counts == {"records": 6, "record_sets": 5, "skipped": 2}
+
+
+@pytest.mark.parametrize("text, message", [
+    ("www A 10.0.0.1\n", "no TTL"),
+    ("$TTL 60\nwww CH A 10.0.0.1\n", "class IN"),
+    ("$TTL 60\nwww LOC 1 2 3\n", "not supported"),
+    ("$TTL 60\nwww (A\n", "unbalanced"),
+    ('$TTL 60\nwww TXT "open\n', "unterminated"),
+    ("$TTL 60\n  A 10.0.0.1\n", "owner name"),
+    ("$INCLUDE other.zone\n", "unsupported directive"),
+])
+def test_zone_file_errors_name_the_line(text, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_zone_records(text.splitlines(), "example.com."))
+
+
+def test_import_rejects_names_outside_the_zone_and_split_record_sets():
+    with pytest.raises(ValueError, match="outside the zone"):
+        list(iter_import_record_sets(["other.org. 60 A 10.0.0.1"], "example.com."))
+    split = ["a 60 A 10.0.0.1", "b 60 A 10.0.0.2", "a 60 A 10.0.0.3"]
+    with pytest.raises(ValueError, match="line 3"):
+        list(iter_import_record_sets(split, "example.com."))
+
+
+def test_export_then_import_round_trips(r53):
+    zone_id = r53.create_hosted_zone(Name="example.com", CallerReference="t")["HostedZone"]["Id"].split("/")[-1]
+    sets = list(iter_import_record_sets(ZONE.splitlines(), "example.com."))
+    route53_records.submit_changes(zone_id, ({"Action": "CREATE", "ResourceRecordSet": rr} for rr in sets))
+
+    counts = {}
+    exported = list(iter_export(zone_id, "example.com.", counts))
+    assert exported[1] == "$ORIGIN example.com."
+    again = {(rr["Name"], rr["Type"]): rr for rr in iter_import_record_sets(exported, "example.com.")}
+    assert again == {(rr["Name"], rr["Type"]): rr for rr in sets}
+    assert counts["skipped"] == 0
+
+
+def test_export_qualifies_targets_stored_without_a_trailing_dot(r53, tmp_path):
+    zone_id = r53.create_hosted_zone(Name="example.com", CallerReference="t")["HostedZone"]["Id"].split("/")[-1]
+    runner = CliRunner()
+    for record, rtype, value in [("www.example.com", "CNAME", "target.example.net"),
+                                 ("example.com", "MX", "10 mail.example.net"),
+                                 ("_sip._tcp.example.com", "SRV", "10 5 5060 sip.example.net")]:
+        result = runner.invoke(cli.cli, ["route53", "upsert", "--zone-id", zone_id, "--record", record,
+                                         "--type", rtype, "--value", value])
+        assert result.exit_code == 0, result.output
+
+    def targets():
+        return {(rr["Name"], rr["Type"]): rr["ResourceRecords"][0]["Value"].rstrip(".")
+                for rr in route53_records.iter_non_default_records(zone_id)}
+
+    before = targets()
+    zone_file = tmp_path / "zone.txt"
+    zone_file.write_text("\n".join(iter_export(zone_id, "example.com.")) + "\n")
+    assert "www\t60\tIN\tCNAME\ttarget.example.net." in zone_file.read_text()
+    result = runner.invoke(cli.cli, ["route53", "import", "--zone-id", zone_id, str(zone_file)])
+    assert result.exit_code == 0, result.output
+    assert targets() == before == {
+        ("www.example.com.", "CNAME"): "target.example.net",
+        ("example.com.", "MX"): "10 mail.example.net",
+        ("_sip._tcp.example.com.", "SRV"): "10 5 5060 sip.example.net",
+    }
+
+
+def test_import_from_stdin_is_validated_before_anything_is_sent(r53):
+    zone_id = r53.create_hosted_zone(Name="example.com", CallerReference="t")["HostedZone"]["Id"].split("/")[-1]
+    bad = "$TTL 60\nok A 10.0.0.1\nbad A 10.0.0.2 (\n"
+    result = CliRunner().invoke(cli.cli, ["route53", "import", "--zone-id", zone_id, "-"], input=bad)
+    assert result.exit_code == 1 and "unbalanced" in result.output
+    assert len(r53.list_resource_record_sets(HostedZoneId=zone_id)["ResourceRecordSets"]) == 2  # SOA + NS only
+
+    result = CliRunner().invoke(cli.cli, ["route53", "import", "--zone-id", zone_id, "-"], input=ZONE)
+    assert result.exit_code == 0, result.output
+    assert "imported 5 record set(s) (6 records)" in result.output
+
+
+def test_export_command_writes_the_zone_to_stdout(r53):
+    zone_id = r53.create_hosted_zone(Name="example.com", CallerReference="t")["HostedZone"]["Id"].split("/")[-1]
+    route53_records.submit_changes(zone_id, ({"Action": "CREATE", "ResourceRecordSet": rr}
+                                             for rr in iter_import_record_sets(ZONE.splitlines(), "example.com.")))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = CliRunner().invoke(cli.cli, ["route53", "export", "--zone-id", zone_id])
+    assert result.exit_code == 0, result.output
+    assert "$ORIGIN example.com." in result.stdout and "record set(s)" not in result.stdout
+    assert "exported 7 record set(s)" in result.stderr
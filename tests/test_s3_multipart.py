@@ -0,0 +1,82 @@
+import os
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+import aws_clients
+import s3_multipart
+from s3_multipart import MB, MIN_PART_SIZE, multipart_upload
+
+BUCKET = "multipart-test-bucket"
+
+
+@pytest.fixture
+def artifact(s3, tmp_path):
+    s3.create_bucket(Bucket=BUCKET)
+    path = tmp_path / "artifact.bin"
+    path.write_bytes(os.urandom(2 * MIN_PART_SIZE + MB))  # two full parts and a short last one
+    return path
+
+
+@pytest.fixture
+def failing_part(s3):
+    """Make upload_part fail for the given part numbers until the returned set is emptied."""
+    numbers = set()
+
+    def unreachable(params, **kwargs):
+        if params["PartNumber"] in numbers:
+            raise EndpointConnectionError(endpoint_url="https://s3.amazonaws.com")
+
+    s3.meta.events.register("before-parameter-build.s3.UploadPart", unreachable)
+    yield numbers
+    s3.meta.events.unregister("before-parameter-build.s3.UploadPart", unreachable)
+
+
+def test_upload_in_parts(s3, artifact):
+    stats = multipart_upload(str(artifact), BUCKET, "a/artifact.bin", part_size=MIN_PART_SIZE, workers=3)
+    assert (stats["bytes"], stats["parts"], stats["resumed_parts"]) == (artifact.stat().st_size, 3, 0)
+    assert stats["mb_per_sec"] > 0 and stats["etag"].endswith("-3")
+    assert s3.get_object(Bucket=BUCKET, Key="a/artifact.bin")["Body"].read() == artifact.read_bytes()
+    assert not s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+
+
+def test_part_size_is_raised_to_the_s3_minimum(s3, artifact):
+    assert multipart_upload(str(artifact), BUCKET, "k", part_size=MB)["parts"] == 3
+
+
+def test_interrupted_upload_resumes(s3, artifact, failing_part):
+    failing_part.add(3)
+    with pytest.raises(EndpointConnectionError):
+        multipart_upload(str(artifact), BUCKET, "k", part_size=MIN_PART_SIZE, workers=1)
+    assert len(s3.list_multipart_uploads(Bucket=BUCKET)["Uploads"]) == 1  # left open for the next run
+
+    failing_part.clear()
+    stats = multipart_upload(str(artifact), BUCKET, "k", part_size=MIN_PART_SIZE, workers=1)
+    assert (stats["parts"], stats["resumed_parts"]) == (3, 2)
+    assert s3.get_object(Bucket=BUCKET, Key="k")["Body"].read() == artifact.read_bytes()
+    assert not s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+    assert s3_multipart._uploads.get(s3_multipart._state_key(str(artifact), BUCKET, "k", MIN_PART_SIZE)) is None
+
+
+def test_a_changed_file_starts_a_new_upload(s3, artifact, failing_part):
+    failing_part.add(3)
+    with pytest.raises(EndpointConnectionError):
+        multipart_upload(str(artifact), BUCKET, "k", part_size=MIN_PART_SIZE, workers=1)
+    failing_part.clear()
+    artifact.write_bytes(os.urandom(2 * MIN_PART_SIZE + MB))
+
+    stats = multipart_upload(str(artifact), BUCKET, "k", part_size=MIN_PART_SIZE, workers=1)
+    assert stats["resumed_parts"] == 0
+    assert s3.get_object(Bucket=BUCKET, Key="k")["Body"].read() == artifact.read_bytes()
+
+
+def test_an_aborted_upload_is_started_over(s3, artifact, failing_part):
+    failing_part.add(2)
+    with pytest.raises(EndpointConnectionError):
+        multipart_upload(str(artifact), BUCKET, "k", part_size=MIN_PART_SIZE, workers=1)
+    failing_part.clear()
+    for upload in s3.list_multipart_uploads(Bucket=BUCKET)["Uploads"]:
+        aws_clients.client("s3").abort_multipart_upload(Bucket=BUCKET, Key="k", UploadId=upload["UploadId"])
+
+    stats = multipart_upload(str(artifact), BUCKET, "k", part_size=MIN_PART_SIZE, workers=1)
+    assert (stats["parts"], stats["resumed_parts"]) == (3, 0)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from conftest import CLI_TAGS
+
+import cli
+import s3_stats
+from s3_stats import ROOT, iter_prefix_stats
+
+BUCKET = "stats-test-bucket"
+
+
+@pytest.fixture
+def bucket(s3):
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_bucket_versioning(Bucket=BUCKET, VersioningConfiguration={"Status": "Enabled"})
+    for key, size in [("top.txt", 10), ("logs/a", 100), ("logs/2024/b", 200), ("logs/2024/01/c", 300),
+                      ("logs/2024/01/02/d", 400), ("img/x.png", 2000)]:
+        s3.put_object(Bucket=BUCKET, Key=key, Body=b"x" * size)
+    s3.put_object(Bucket=BUCKET, Key="img/x.png", Body=b"y" * 5)  # x.png now has a noncurrent version
+    s3.delete_object(Bucket=BUCKET, Key="top.txt")  # delete marker over top.txt
+    return BUCKET
+
+
+@pytest.mark.parametrize("workers, max_depth", [(1, 0), (2, 1), (8, 3)])
+def test_prefix_stats_group_by_top_level_prefix(bucket, workers, max_depth):
+    groups = dict(iter_prefix_stats(bucket, workers=workers, max_depth=max_depth))
+    assert set(groups) == {ROOT, "logs/", "img/"}
+    logs, img, root = groups["logs/"], groups["img/"], groups[ROOT]
+    assert (logs["objects"], logs["bytes"], logs["versions"]) == (4, 1000, 0)
+    assert (img["objects"], img["versions"], img["bytes"], img["noncurrent_bytes"]) == (1, 1, 2005, 2000)
+    # top.txt: its only version is noncurrent now, behind a delete marker
+    assert (root["objects"], root["versions"], root["delete_markers"]) == (0, 1, 1)
+    assert logs["histogram"]["<1K"] == 4 and img["histogram"]["<64K"] == 1
+
+
+def test_prefix_stats_under_a_prefix(bucket):
+    groups = dict(iter_prefix_stats(bucket, prefix="logs/", workers=2))
+    assert set(groups) == {ROOT, "logs/2024/"}
+    assert groups[ROOT]["objects"] == 1 and groups["logs/2024/"]["objects"] == 3
+
+
+def test_bucket_stats_totals(bucket):
+    total = s3_stats.bucket_stats(bucket, workers=4)
+    assert (total["objects"], total["versions"], total["delete_markers"]) == (5, 2, 1)
+    assert total["bytes"] == 10 + 100 + 200 + 300 + 400 + 2000 + 5
+    assert sum(total["histogram"].values()) == total["objects"] + total["versions"]
+
+
+def test_empty_bucket_reports_an_empty_root(s3):
+    s3.create_bucket(Bucket="stats-empty-bucket")
+    assert list(iter_prefix_stats("stats-empty-bucket")) == [(ROOT, s3_stats.new_stats())]
+
+
+def test_human_bytes():
+    assert [s3_stats.human_bytes(n) for n in (0, 1023, 1024, 5 * 1024 ** 3)] == ["0 B", "1023 B", "1.0 KB", "5.0 GB"]
+
+
+def test_stats_command_defaults_to_platform_cli_buckets(s3, bucket):
+    s3.create_bucket(Bucket="stats-cli-bucket")
+    s3.put_bucket_tagging(Bucket="stats-cli-bucket", Tagging={"TagSet": CLI_TAGS})
+    s3.put_object(Bucket="stats-cli-bucket", Key="a/b", Body=b"z" * 3)
+    result = CliRunner().invoke(cli.cli, ["--output", "jsonl", "--fields", "bucket,prefix,objects", "s3", "stats"])
+    assert result.exit_code == 0, result.output
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        {"bucket": "stats-cli-bucket", "prefix": "a/", "objects": 1}]
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from click.testing import CliRunner
+from conftest import CLI_TAGS
+
+import cli
+import s3_sync
+
+BUCKET = "sync-test-bucket"
+
+
+@pytest.fixture
+def tree(s3, tmp_path):
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_bucket_tagging(Bucket=BUCKET, Tagging={"TagSet": CLI_TAGS})
+    src = tmp_path / "site"
+    (src / "css").mkdir(parents=True)
+    (src / "index.html").write_text("<html></html>")
+    (src / "css" / "main.css").write_text("body {}")
+    (src / "robots.txt").write_text("User-agent: *")
+    return src
+
+
+@pytest.fixture
+def fail_op(s3):
+    """fail_op(op, error) makes every call to that S3 operation raise error."""
+    hooks = []
+
+    def _fail(op, error):
+        def handler(params, **kwargs):
+            raise error
+        s3.meta.events.register(f"before-parameter-build.s3.{op}", handler)
+        hooks.append((op, handler))
+    yield _fail
+    for op, handler in hooks:
+        s3.meta.events.unregister(f"before-parameter-build.s3.{op}", handler)
+
+
+def _keys(s3):
+    return sorted(o["Key"] for o in s3.list_objects_v2(Bucket=BUCKET, Prefix="www/").get("Contents", []))
+
+
+def test_only_new_or_changed_files_are_uploaded(s3, tree):
+    first = s3_sync.sync_dir(BUCKET, str(tree), "www", log=lambda msg: None)
+    assert (first["uploaded"], first["unchanged"], first["failed"]) == (3, 0, 0)
+    assert _keys(s3) == ["www/css/main.css", "www/index.html", "www/robots.txt"]
+    assert s3.head_object(Bucket=BUCKET, Key="www/index.html")["ContentType"] == "text/html"
+
+    (tree / "index.html").write_text("<html>v2</html>")
+    (tree / "robots.txt").unlink()
+    second = s3_sync.sync_dir(BUCKET, str(tree), "www", delete=True, log=lambda msg: None)
+    assert (second["uploaded"], second["unchanged"], second["deleted"]) == (1, 1, 1)
+    assert _keys(s3) == ["www/css/main.css", "www/index.html"]
+    assert s3.get_object(Bucket=BUCKET, Key="www/index.html")["Body"].read() == b"<html>v2</html>"
+
+
+def test_existing_objects_are_matched_by_content_without_a_manifest(s3, tree, tmp_path, monkeypatch):
+    s3_sync.sync_dir(BUCKET, str(tree), "www", log=lambda msg: None)
+    monkeypatch.setenv("PLATFORM_CLI_CACHE_DIR", str(tmp_path / "fresh-cache"))
+    os.utime(tree / "index.html", ns=(0, 0))
+    stats = s3_sync.sync_dir(BUCKET, str(tree), "www", log=lambda msg: None)
+    assert (stats["uploaded"], stats["unchanged"]) == (0, 3)
+
+
+def test_an_unreachable_endpoint_counts_as_failed(s3, tree, fail_op):
+    fail_op("PutObject", EndpointConnectionError(endpoint_url="https://s3.amazonaws.com"))
+    logged = []
+    stats = s3_sync.sync_dir(BUCKET, str(tree), "www", workers=2, log=logged.append)
+    assert (stats["uploaded"], stats["failed"]) == (0, 3)
+    assert sum("Could not connect" in line for line in logged) == 3
+
+    result = CliRunner().invoke(cli.cli, ["s3", "sync-dir", "--bucket", BUCKET, "--src", str(tree)])
+    assert result.exit_code == 1 and "3 failed" in result.output
+
+
+def test_a_failed_delete_batch_is_counted(s3, tree, fail_op):
+    s3_sync.sync_dir(BUCKET, str(tree), "www", log=lambda msg: None)
+    (tree / "robots.txt").unlink()
+    fail_op("DeleteObjects", ClientError({"Error": {"Code": "AccessDenied", "Message": "denied"}}, "DeleteObjects"))
+    logged = []
+    stats = s3_sync.sync_dir(BUCKET, str(tree), "www", delete=True, log=logged.append)
+    assert (stats["deleted"], stats["failed"]) == (0, 1)
+    assert any("AccessDenied" in line for line in logged) and "www/robots.txt" in _keys(s3)
@@ -0,0 +1,73 @@
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+import aws_clients
+import s3_manager
+from cache import TTLCache
+from conftest import CLI_TAGS
+
+
+@pytest.fixture
+def buckets(s3):
+    s3.create_bucket(Bucket="tagged-bucket")
+    s3.put_bucket_tagging(Bucket="tagged-bucket", Tagging={"TagSet": CLI_TAGS})
+    s3.create_bucket(Bucket="untagged-bucket")
+    s3.create_bucket(Bucket="remote-bucket", CreateBucketConfiguration={"LocationConstraint": "eu-west-1"})
+    return s3.list_buckets()["Buckets"]
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Names passed to the real tag lookup, in call order."""
+    calls, fetch = [], s3_manager._fetch_bucket_tags
+
+    def counting(name, region=None):
+        calls.append(name)
+        return fetch(name, region)
+
+    monkeypatch.setattr(s3_manager, "_fetch_bucket_tags", counting)
+    return calls
+
+
+def test_tags_are_fetched_once_then_cached(buckets, lookups):
+    tags = dict(s3_manager.iter_bucket_tags(buckets, workers=4))
+    assert tags["tagged-bucket"] == {"CreatedBy": "platform-cli", "Owner": "tester"}
+    assert tags["untagged-bucket"] == {} and tags["remote-bucket"] == {}
+    assert sorted(lookups) == ["remote-bucket", "tagged-bucket", "untagged-bucket"]
+
+    # untagged buckets are cached too (negative entries), so nothing is looked up again
+    assert dict(s3_manager.iter_bucket_tags(buckets)) == tags
+    assert s3_manager.is_cli_bucket("tagged-bucket") and not s3_manager.is_cli_bucket("untagged-bucket")
+    assert len(lookups) == 3
+
+
+def test_cached_tags_survive_the_process(buckets, lookups):
+    dict(s3_manager.iter_bucket_tags(buckets))
+    reread = TTLCache("bucket-tags", s3_manager.TAG_CACHE_TTL)  # a later invocation reading the file
+    assert reread.get("tagged-bucket")["tags"]["CreatedBy"] == "platform-cli"
+    assert reread.get("remote-bucket")["region"] == "eu-west-1"
+
+
+def test_fresh_bypasses_the_cache(buckets, lookups):
+    dict(s3_manager.iter_bucket_tags(buckets))
+    assert s3_manager.get_bucket_tags("tagged-bucket", fresh=True)["Owner"] == "tester"
+    assert len(lookups) == 4
+
+
+def test_failed_lookups_are_reported_and_not_cached(buckets, lookups):
+    def unreachable(params, **kwargs):
+        if params["Bucket"] == "tagged-bucket":
+            raise EndpointConnectionError(endpoint_url="https://s3.amazonaws.com")
+
+    events = aws_clients.client("s3", "us-east-1").meta.events
+    events.register("before-parameter-build.s3.GetBucketTagging", unreachable)
+    try:
+        failed = set()
+        tags = dict(s3_manager.iter_bucket_tags(buckets, failed=failed))
+    finally:
+        events.unregister("before-parameter-build.s3.GetBucketTagging", unreachable)
+    assert failed == {"tagged-bucket"} and tags["tagged-bucket"] == {}
+
+    # the next lookup goes back to S3 instead of trusting the empty answer
+    assert s3_manager.get_bucket_tags("tagged-bucket")["CreatedBy"] == "platform-cli"
+    assert lookups.count("tagged-bucket") == 2
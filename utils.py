@@ -1,5 +1,8 @@
-import boto3
 import getpass
+import os
+
+import aws_clients
+from cache import TTLCache
 
 
 def get_cli_instances(state=None):
@@ -7,35 +10,102 @@ def get_cli_instances(state=None):
     Returns EC2 instances that were created by platform-cli.
     Optionally filter by instance state (e.g., 'running', 'stopped').
     """
-    ec2 = boto3.resource('ec2')
+    ec2 = aws_clients.resource('ec2')
     filters = [{'Name': 'tag:CreatedBy', 'Values': ['platform-cli']}]
     if state:
         filters.append({'Name': 'instance-state-name', 'Values': [state]})
     return ec2.instances.filter(Filters=filters)
 
 
+# AMI aliases -> SSM public parameters, in order of preference
+AMI_ALIASES = {
+    'amazon-linux': [
+        '/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-6.1-x86_64',
+        '/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2',
+    ],
+    'ubuntu': [
+        '/aws/service/canonical/ubuntu/server/24.04/stable/current/amd64/hvm/ebs-gp3/ami-id',
+        '/aws/service/canonical/ubuntu/server/22.04/stable/current/amd64/hvm/ebs-gp2/ami-id',
+    ],
+}
+_AMI_ALIAS_SYNONYMS = {'amazonlinux': 'amazon-linux'}
+AMI_CACHE_TTL = int(os.getenv('PLATFORM_CLI_AMI_CACHE_TTL', str(24 * 3600)))  # seconds
+_ami_cache = TTLCache('ami', AMI_CACHE_TTL)
+
+
+def resolve_ami(ami, region=None, refresh=False):
+    """
+    Returns an AMI ID for a literal (ami-...) or an alias ('amazon-linux', 'ubuntu').
+    All candidate SSM parameters are fetched with one get_parameters call and the
+    answer is cached on disk per (region, alias); refresh=True bypasses the cache.
+    Returns None if no candidate parameter exists; raises ValueError for unknown aliases.
+    """
+    if ami.startswith('ami-'):
+        return ami
+    alias = _AMI_ALIAS_SYNONYMS.get(ami, ami)
+    if alias not in AMI_ALIASES:
+        raise ValueError(f"Unsupported AMI alias: {ami}")
+
+    region = region or aws_clients.default_region()
+    key = f"{region}:{alias}"
+    if not refresh:
+        cached = _ami_cache.get(key)
+        if cached:
+            return cached
+
+    names = AMI_ALIASES[alias]
+    response = aws_clients.client('ssm', region).get_parameters(Names=names)
+    values = {p['Name']: p['Value'] for p in response.get('Parameters', [])}
+    ami_id = next((values[n] for n in names if n in values), None)
+    if ami_id:
+        _ami_cache.put(key, ami_id)
+        _ami_cache.flush()
+    return ami_id
+
+
 def get_latest_ami(os_name='ubuntu'):
     """
     Retrieves the latest official AMI ID from AWS SSM Parameter Store,
     based on the specified OS type (ubuntu or amazonlinux).
     """
-    ssm = boto3.client('ssm')
-
-    if os_name == 'ubuntu':
-        param_name = '/aws/service/canonical/ubuntu/server/latest/stable/amd64/hvm/ebs-gp2/ami-id'
-    elif os_name == 'amazonlinux':
-        param_name = '/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2'
-    else:
+    if os_name not in ('ubuntu', 'amazonlinux'):
         raise ValueError("Unsupported OS name")
 
     try:
-        response = ssm.get_parameter(Name=param_name)
-        return response['Parameter']['Value']
+        return resolve_ami(os_name)
     except Exception as e:
         print(f"Error retrieving AMI: {e}")
         return None
 
 
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_duration(text):
+    """
+    Parses durations such as '90s', '30m', '12h', '7d' or '2w' into seconds.
+    A bare number is taken as seconds.
+    """
+    text = str(text).strip().lower()
+    unit = text[-1:] if text[-1:] in _DURATION_UNITS else 's'
+    number = text[:-1] if text[-1:] in _DURATION_UNITS else text
+    try:
+        return float(number) * _DURATION_UNITS[unit]
+    except ValueError:
+        raise ValueError(f"invalid duration: {text!r} (use e.g. 30m, 12h, 7d)")
+
+
+def duration_option(ctx, param, value):
+    """click callback converting a duration option to seconds."""
+    if value is None:
+        return None
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        import click
+        raise click.BadParameter(str(e))
+
+
 def tag_resource(resource_id, resource_type='ec2', owner=None):
     """
     Adds tags to an AWS resource:
@@ -53,16 +123,16 @@ def tag_resource(resource_id, resource_type='ec2', owner=None):
     ]
 
     if resource_type == 'ec2':
-        ec2 = boto3.client('ec2')
+        ec2 = aws_clients.client('ec2')
         ec2.create_tags(Resources=[resource_id], Tags=tags)
 
     elif resource_type == 's3':
-        s3 = boto3.client('s3')
+        s3 = aws_clients.client('s3')
         tag_set = {'TagSet': [{'Key': t['Key'], 'Value': t['Value']} for t in tags]}
         s3.put_bucket_tagging(Bucket=resource_id, Tagging=tag_set)
 
     elif resource_type == 'route53':
-        tagging = boto3.client('resourcegroupstaggingapi')
+        tagging = aws_clients.client('resourcegroupstaggingapi')
         arn = f'arn:aws:route53:::hostedzone/{resource_id}'
         tagging.tag_resources(
             ResourceARNList=[arn],